@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Feed read-path microbenchmark for GET /api/live-feed.
+
+Compares the old request path (seed check via count_documents, then the
+feed query) with the current one (a single indexed keyset query).
+
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/bench_feed_read.py --posts 20000 --iterations 500
+
+Runs against a scratch database that is dropped afterwards.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+BENCH_DB = 'bench_feed_read'
+
+
+def summarize(name, samples):
+    samples = sorted(samples)
+    pct = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+    print(f"{name:<28} mean {statistics.mean(samples) * 1000:7.3f} ms   "
+          f"p50 {pct(0.50):7.3f}   p95 {pct(0.95):7.3f}   p99 {pct(0.99):7.3f}")
+
+
+async def old_path():
+    await server.seed_live_feed_if_empty()
+    return await server._feed_page(None, server.FEED_PAGE_SIZE, full=False)
+
+
+async def new_path():
+    return await server._feed_page(None, server.FEED_PAGE_SIZE, full=False)
+
+
+async def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+async def main(args):
+    server.db = server.client[BENCH_DB]
+    await server.client.drop_database(BENCH_DB)
+    await server.ensure_indexes()
+    now = datetime.utcnow()
+    docs = [{
+        'id': str(uuid.uuid4()), 'mover_id': str(uuid.uuid4()), 'mover_name': 'Bench', 'company_name': 'Bench Lojistik',
+        'phone': '+90 500 000 00 00', 'title': f'Ilan {i}', 'from_location': 'Beşiktaş', 'to_location': 'Kadıköy',
+        'created_at': now - timedelta(seconds=i),
+    } for i in range(args.posts)]
+    for i in range(0, len(docs), 5000):
+        await server.db.live_feed.insert_many(docs[i:i + 5000])
+    print(f"{args.posts} posts, {args.iterations} iterations")
+    for fn in (old_path, new_path):
+        await timed(fn, 20)  # warm-up
+    summarize('seed check + feed (old)', await timed(old_path, args.iterations))
+    summarize('indexed feed only (new)', await timed(new_path, args.iterations))
+    await server.client.drop_database(BENCH_DB)
+    server.client.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--posts', type=int, default=20000)
+    parser.add_argument('--iterations', type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
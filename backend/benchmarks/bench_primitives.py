@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the per-request CPU costs in server.py.
+
+Covers password hash/verify, JWT encode/decode, User/LivePost construction,
+UserRegister email validation and JSON rendering of the 100-post feed and the
+1000-user admin list (default and FAST_JSON_RESPONSES paths).
+
+    python benchmarks/bench_primitives.py                  # run, save, compare with the previous run
+    python benchmarks/bench_primitives.py --only jwt --no-save
+    python benchmarks/bench_primitives.py --label pbkdf2-29000 --baseline before-change
+    python benchmarks/bench_primitives.py --fail-over 10   # exit 1 if any case got >10% slower
+
+Runs are appended to benchmarks/results/primitives.json (one entry per run,
+with git revision and Python/library versions) and each case is compared
+against the previous run, or the run with --baseline as its label. Numbers
+are only comparable between runs on the same machine. Pure CPU; no database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import fastapi  # noqa: E402
+import pydantic  # noqa: E402
+
+import server  # noqa: E402
+from bench_serialization import feed_docs, json_paths, user_docs  # noqa: E402
+
+RESULTS_FILE = BENCH_DIR / 'results' / 'primitives.json'
+PASSWORD = 'correct horse 42'
+
+
+def cases(loop):
+    hashed = server.get_password_hash(PASSWORD)
+    user_doc = server._build_user_doc('Demo Nakliyeci', 'bench@example.com', '+90 555 000 00 00', 'mover', hashed, 'Demo Lojistik')
+    token = server.jwt_create({'sub': user_doc['id'], 'role': 'mover', 'ver': 0, 'typ': 'access'})
+    post_doc = {**feed_docs(1)[0], 'phone': '+90 555 000 00 00'}
+    register_body = {'name': 'Ayşe Yılmaz', 'email': 'Ayse.Yilmaz@Example.com', 'phone': '+90 555 000 00 00',
+                     'user_type': 'customer', 'password': PASSWORD}
+
+    def json_cases(label, docs, model, defaults):
+        default_path, fast_path = json_paths(loop, docs, model, defaults)
+        return [(f'{label} json default', default_path), (f'{label} json fast', fast_path)]
+
+    return [
+        ('password hash', lambda: server.get_password_hash(PASSWORD)),
+        ('password verify', lambda: server.verify_password(PASSWORD, hashed)),
+        ('jwt encode', lambda: server.jwt_create({'sub': user_doc['id'], 'role': 'mover', 'ver': 0, 'typ': 'access'})),
+        ('jwt decode', lambda: server.jwt.decode(token, server.SECRET_KEY, algorithms=[server.ALGORITHM])),
+        ('User(**doc)', lambda: server.User(**user_doc)),
+        ('LivePost(**doc)', lambda: server.LivePost(**post_doc)),
+        ('UserRegister validation', lambda: server.UserRegister(**register_body)),
+        *json_cases('feed 100 posts', feed_docs(100), server.LivePost, server.LIVE_POST_DEFAULTS),
+        *json_cases('admin users 1000', user_docs(1000), server.AdminUserView, server.ADMIN_USER_DEFAULTS),
+    ]
+
+
+def bench(fn, seconds, min_iterations):
+    # Time-boxed so microsecond cases get many samples and pbkdf2 still finishes quickly
+    for _ in range(3):
+        fn()
+    samples = []
+    deadline = time.perf_counter() + seconds
+    while len(samples) < min_iterations or time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return {
+        'n': len(samples),
+        'mean_us': statistics.mean(samples) * 1e6,
+        'p50_us': samples[len(samples) // 2] * 1e6,
+        'p95_us': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1e6,
+        'min_us': samples[0] * 1e6,
+        'stdev_us': statistics.stdev(samples) * 1e6 if len(samples) > 1 else 0.0,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_runs(path: Path) -> list:
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_runs(path: Path, runs: list):
+    os.makedirs(path.parent, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(runs, f, indent=1)
+    os.replace(tmp, path)
+
+
+def fmt_us(us):
+    return f'{us / 1000:9.3f} ms' if us >= 1000 else f'{us:9.2f} us'
+
+
+def report(run: dict, baseline: dict, noise_percent: float) -> List[str]:
+    # p50 is compared: it is far less sensitive to GC pauses and scheduler noise than the mean
+    base = baseline['results'] if baseline else {}
+    if baseline:
+        print(f"compared with run {baseline.get('label') or baseline['timestamp']} (git {baseline.get('git')})")
+    regressions = []
+    for name, r in run['results'].items():
+        line = f"{name:<30} p50 {fmt_us(r['p50_us'])}   mean {fmt_us(r['mean_us'])}   n {r['n']:>7}"
+        old = base.get(name)
+        if old:
+            change = (r['p50_us'] - old['p50_us']) / old['p50_us'] * 100
+            mark = ''
+            if change > noise_percent:
+                mark = '  slower'
+                regressions.append(name)
+            elif change < -noise_percent:
+                mark = '  faster'
+            line += f'   {change:+6.1f}%{mark}'
+        print(line)
+    return regressions
+
+
+def main(args):
+    loop = asyncio.new_event_loop()
+    run = {
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+        'label': args.label,
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'versions': {'fastapi': fastapi.__version__, 'pydantic': pydantic.VERSION},
+        'results': {},
+    }
+    for name, fn in cases(loop):
+        if args.only and args.only.lower() not in name.lower():
+            continue
+        run['results'][name] = bench(fn, args.seconds, args.min_iterations)
+    loop.close()
+
+    path = Path(args.results)
+    runs = load_runs(path)
+    if args.baseline:
+        baseline = next((r for r in reversed(runs) if r.get('label') == args.baseline), None)
+        if baseline is None:
+            sys.exit(f'No saved run labelled {args.baseline!r}')
+    else:
+        baseline = runs[-1] if runs else None
+    regressions = report(run, baseline, args.noise)
+    if not args.no_save:
+        save_runs(path, runs + [run])
+    if args.fail_over is not None and baseline:
+        base = baseline['results']
+        failed = [n for n in regressions if (run['results'][n]['p50_us'] / base[n]['p50_us'] - 1) * 100 > args.fail_over]
+        if failed:
+            print(f"slower than {args.fail_over}%: {', '.join(failed)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=1.0, help='time budget per case')
+    parser.add_argument('--min-iterations', type=int, default=20)
+    parser.add_argument('--only', help='run cases whose name contains this text')
+    parser.add_argument('--label', help='name this run so later runs can use it as --baseline')
+    parser.add_argument('--baseline', help='compare with the latest run carrying this label instead of the previous run')
+    parser.add_argument('--results', default=str(RESULTS_FILE))
+    parser.add_argument('--no-save', action='store_true')
+    parser.add_argument('--noise', type=float, default=5.0, help='changes within this percent are not flagged')
+    parser.add_argument('--fail-over', type=float, help='exit 1 if any case is slower than the baseline by more than this percent')
+    main(parser.parse_args())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Response serialization benchmark: default path vs FAST_JSON_RESPONSES.
+
+Default: build models from the stored documents, then FastAPI's
+response_model validation + jsonable_encoder, then JSONResponse rendering.
+Fast: fill defaults on the projected documents and render with orjson.
+
+    python benchmarks/bench_serialization.py --iterations 200
+
+Pure CPU; no database needed.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+import server  # noqa: E402
+
+
+def feed_docs(n=100):
+    now = datetime.utcnow()
+    return [{
+        'id': str(uuid.uuid4()), 'mover_id': str(uuid.uuid4()), 'mover_name': 'Demo Nakliyeci',
+        'company_name': 'Demo Lojistik', 'title': '2+1 Ev Taşıma', 'from_location': 'Beşiktaş',
+        'to_location': 'Kadıköy', 'when': 'Yarın sabah', 'vehicle': '3.5 Ton Kamyonet',
+        'price_note': 'Asansör gerekebilir', 'extra': 'Paketleme kısmen hazır',
+        'created_at': now - timedelta(minutes=i),
+    } for i in range(n)]
+
+
+def user_docs(n=1000):
+    now = datetime.utcnow()
+    return [{
+        'id': str(uuid.uuid4()), 'name': f'Kullanıcı {i}', 'email': f'user{i}@example.com', 'phone': '+90 555 000 00 00',
+        'user_type': 'mover' if i % 3 else 'customer', 'is_active': True, 'is_email_verified': True,
+        'is_phone_verified': True, 'is_approved': bool(i % 2), 'company_name': None, 'created_at': now,
+    } for i in range(n)]
+
+
+def json_paths(loop, docs, model, defaults):
+    """Returns (default_path, fast_path): each renders docs as the response body."""
+    field = create_model_field(name='Response', type_=List[model], mode='serialization')
+
+    def default_path():
+        models = [model(**d) for d in docs]
+        content = loop.run_until_complete(serialize_response(field=field, response_content=models))
+        return JSONResponse(content).body
+
+    def fast_path():
+        return server.fast_json_response(server.trusted_docs(docs, defaults)).body
+
+    return default_path, fast_path
+
+
+def bench(fn, iterations):
+    for _ in range(5):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    print(f"{name:<34} mean {statistics.mean(samples) * 1000:8.3f} ms   p50 {samples[len(samples) // 2] * 1000:8.3f} ms")
+
+
+def main(args):
+    loop = asyncio.new_event_loop()
+    cases = [
+        ('feed (100 posts)', feed_docs(), server.LivePost, server.LIVE_POST_DEFAULTS),
+        ('admin users (1000)', user_docs(), server.AdminUserView, server.ADMIN_USER_DEFAULTS),
+    ]
+    for label, docs, model, defaults in cases:
+        default_path, fast_path = json_paths(loop, docs, model, defaults)
+        old = bench(default_path, args.iterations)
+        new = bench(fast_path, args.iterations)
+        report(f'{label}: default', old)
+        report(f'{label}: fast', new)
+        print(f"{'':<34} speedup x{statistics.mean(old) / statistics.mean(new):.1f}")
+    loop.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,47 @@
+import asyncio
+import gzip
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import List
+
+from bson import json_util
+
+
+# Append-only archive of expired live feed posts as gzip-compressed NDJSON,
+# one file per UTC day of created_at. Each batch is appended as its own gzip
+# member, which gzip readers (zcat, gzip.open) treat as one continuous stream.
+# Lines are relaxed extended JSON, so mongoimport can load them back.
+
+class NdjsonArchive:
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.written = 0
+
+    def _path(self, day) -> Path:
+        return self.directory / f'live_feed-{day:%Y%m%d}.ndjson.gz'
+
+    def _write(self, docs: List[dict]):
+        os.makedirs(self.directory, exist_ok=True)
+        by_day = defaultdict(list)
+        for doc in docs:
+            by_day[doc['created_at'].date()].append(json_util.dumps(doc, json_options=json_util.RELAXED_JSON_OPTIONS))
+        for day, lines in by_day.items():
+            with open(self._path(day), 'ab') as f:
+                f.write(gzip.compress(('\n'.join(lines) + '\n').encode('utf-8')))
+
+    async def write(self, docs: List[dict]):
+        # File I/O and compression stay off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self._write, docs)
+        self.written += len(docs)
+
+    def stats(self) -> dict:
+        files = sorted(self.directory.glob('live_feed-*.ndjson.gz')) if self.directory.exists() else []
+        return {
+            'directory': str(self.directory),
+            'files': len(files),
+            'bytes': sum(f.stat().st_size for f in files),
+            'oldest_file': files[0].name if files else None,
+            'newest_file': files[-1].name if files else None,
+            'written_since_start': self.written,
+        }
@@ -0,0 +1,97 @@
+import asyncio
+import json
+from typing import Iterable, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+
+# In-process fan-out for live feed events. Every event is encoded once per
+# audience (public without phone, full with phone) and pushed to bounded
+# subscriber queues; a subscriber whose queue is full is dropped instead of
+# making the publisher wait.
+
+class FeedSubscriber:
+    def __init__(self, full: bool, queue_size: int, route_key: Optional[str] = None):
+        self.full = full
+        # Only posts carrying this gazetteer route key are delivered; deletes always are
+        self.route_key = route_key
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+
+    async def next_event(self, timeout: float) -> Optional[str]:
+        # Returns an encoded event, '' on timeout (keepalive) or None once dropped
+        if self.closed and self.queue.empty():
+            return None
+        try:
+            item = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return ''
+        return item
+
+
+class FeedBroker:
+    def __init__(self, queue_size: int = 100, max_subscribers: int = 5000):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.subscribers: Set[FeedSubscriber] = set()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, full: bool, route_key: Optional[str] = None) -> Optional[FeedSubscriber]:
+        if len(self.subscribers) >= self.max_subscribers:
+            return None
+        sub = FeedSubscriber(full, self.queue_size, route_key)
+        self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: FeedSubscriber):
+        if sub.closed:
+            return
+        sub.closed = True
+        self.subscribers.discard(sub)
+        # Wake the consumer with the terminal None, evicting one event if full
+        try:
+            sub.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            sub.queue.get_nowait()
+            sub.queue.put_nowait(None)
+
+    def _drop(self, sub: FeedSubscriber):
+        self.unsubscribe(sub)
+        self.dropped += 1
+
+    def publish(self, event: str, public: Optional[dict], full: Optional[dict] = None, route_keys: Optional[Iterable[str]] = None):
+        # public/full are the per-audience payloads; full defaults to public.
+        # route_keys=None reaches every subscriber, route-filtered ones included.
+        self.published += 1
+        if not self.subscribers:
+            return
+        encoded = {
+            False: json.dumps({'type': event, **jsonable_encoder(public)}),
+            True: json.dumps({'type': event, **jsonable_encoder(full if full is not None else public)}),
+        }
+        route_keys = set(route_keys) if route_keys is not None else None
+        for sub in list(self.subscribers):
+            if route_keys is not None and sub.route_key is not None and sub.route_key not in route_keys:
+                continue
+            try:
+                sub.queue.put_nowait(encoded[sub.full])
+            except asyncio.QueueFull:
+                self._drop(sub)
+
+    def publish_post(self, post: dict, route_keys: Iterable[str] = ()):
+        public = {k: v for k, v in post.items() if k != 'phone'}
+        public['phone'] = None
+        self.publish('post', {'post': public}, {'post': post}, route_keys)
+
+    def publish_delete(self, post_id: str):
+        self.publish('delete', {'id': post_id})
+
+    def stats(self) -> dict:
+        return {
+            'subscribers': len(self.subscribers),
+            'full_subscribers': sum(1 for s in self.subscribers if s.full),
+            'route_subscribers': sum(1 for s in self.subscribers if s.route_key),
+            'published': self.published,
+            'dropped': self.dropped,
+        }
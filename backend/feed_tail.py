@@ -0,0 +1,181 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger('feed_tail')
+
+
+# Cross-worker fan-out for the live feed. Each worker runs one tailer that
+# follows new posts (live_feed inserts) and deletions (live_feed_tombstones
+# inserts) and hands them to its local FeedBroker, so a post created on one
+# worker reaches stream subscribers on every worker.
+#
+# A database change stream is used where available (replica sets), resumed
+# from the last resume token after errors. Standalone servers fall back to
+# polling the (created_at, id) and deleted_at indexes. The worker that made a
+# change publishes it right away and marks it seen; the tailer skips it.
+
+NOT_REPLICA_SET = 40573
+CHANGE_STREAM_HISTORY_LOST = 286
+
+
+class ChangeStreamsUnavailable(Exception):
+    pass
+
+
+class FeedTailer:
+    def __init__(self, on_post: Callable[[dict], None], on_delete: Callable[[str], None], mode: str = 'auto',
+                 poll_interval: float = 1.0, overlap_seconds: float = 2.0, seen_size: int = 10000):
+        # mode: 'auto' (change stream, else poll), 'change_stream', 'poll' or 'local' (no tailing)
+        self.on_post = on_post
+        self.on_delete = on_delete
+        self.mode = mode
+        self.poll_interval = poll_interval
+        # Polls re-read this far back to catch writes stamped by slower clocks; seen ids dedupe them
+        self.overlap_seconds = overlap_seconds
+        self.seen_size = seen_size
+        self._seen: 'OrderedDict[tuple, None]' = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self.resume_token = None
+        self.active_mode: Optional[str] = None
+        self.posts = 0
+        self.deletes = 0
+        self.skipped = 0
+        self.errors = 0
+
+    def mark_seen(self, kind: str, item_id: str) -> bool:
+        # Returns False if already seen; callers publishing locally mark before writing
+        key = (kind, item_id)
+        if key in self._seen:
+            return False
+        self._seen[key] = None
+        while len(self._seen) > self.seen_size:
+            self._seen.popitem(last=False)
+        return True
+
+    def _post(self, doc: dict):
+        if not self.mark_seen('post', doc['id']):
+            self.skipped += 1
+            return
+        self.posts += 1
+        self.on_post(doc)
+
+    def _delete(self, post_id: str):
+        if not self.mark_seen('delete', post_id):
+            self.skipped += 1
+            return
+        self.deletes += 1
+        self.on_delete(post_id)
+
+    async def _watch(self, db):
+        pipeline = [{'$match': {'operationType': 'insert', 'ns.coll': {'$in': ['live_feed', 'live_feed_tombstones']}}}]
+        backoff = 1.0
+        while True:
+            try:
+                stream = db.watch(pipeline, resume_after=self.resume_token)
+            except (TypeError, NotImplementedError, AttributeError) as e:
+                # Drivers/mocks without change stream support
+                raise ChangeStreamsUnavailable(str(e))
+            try:
+                async with stream:
+                    self.active_mode = 'change_stream'
+                    backoff = 1.0
+                    async for change in stream:
+                        doc = change['fullDocument']
+                        if change['ns']['coll'] == 'live_feed':
+                            self._post(doc)
+                        else:
+                            self._delete(doc['id'])
+                        self.resume_token = stream.resume_token
+            except OperationFailure as e:
+                if e.code == NOT_REPLICA_SET:
+                    raise ChangeStreamsUnavailable(str(e))
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    # Oplog rolled past our token; events in the gap are lost, clients resync on reconnect
+                    self.resume_token = None
+                self.errors += 1
+                logger.warning('live feed change stream failed: %s', e)
+            except PyMongoError as e:
+                self.errors += 1
+                logger.warning('live feed change stream interrupted: %s', e)
+            self.active_mode = None
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    async def _poll(self, db, post_projection: dict):
+        overlap = timedelta(seconds=self.overlap_seconds)
+        backoff = 1.0
+        while True:
+            try:
+                post_mark = deleted_mark = datetime.utcnow()
+                # Whatever already sits inside the first overlap window predates this tailer
+                async for doc in db.live_feed.find({'created_at': {'$gte': post_mark - overlap}}, {'_id': 0, 'id': 1}):
+                    self.mark_seen('post', doc['id'])
+                async for doc in db.live_feed_tombstones.find({'deleted_at': {'$gte': deleted_mark - overlap}}, {'_id': 0, 'id': 1}):
+                    self.mark_seen('delete', doc['id'])
+                break
+            except PyMongoError as e:
+                self.errors += 1
+                logger.warning('live feed poll setup failed, retrying in %.0fs: %s', backoff, e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+        self.active_mode = 'poll'
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                async for doc in db.live_feed.find({'created_at': {'$gte': post_mark - overlap}}, post_projection).sort([('created_at', 1), ('id', 1)]):
+                    self._post(doc)
+                    post_mark = max(post_mark, doc['created_at'])
+                async for doc in db.live_feed_tombstones.find({'deleted_at': {'$gte': deleted_mark - overlap}}, {'_id': 0}).sort('deleted_at', 1):
+                    self._delete(doc['id'])
+                    deleted_mark = max(deleted_mark, doc['deleted_at'])
+            except PyMongoError as e:
+                self.errors += 1
+                logger.warning('live feed poll failed: %s', e)
+
+    async def _run(self, db, post_projection: dict):
+        if self.mode in ('auto', 'change_stream'):
+            try:
+                await self._watch(db)
+            except ChangeStreamsUnavailable as e:
+                if self.mode == 'change_stream':
+                    logger.error('live feed change streams unavailable, cross-worker fan-out disabled: %s', e)
+                    self.active_mode = None
+                    return
+                logger.info('live feed change streams unavailable, polling instead: %s', e)
+        await self._poll(db, post_projection)
+
+    def start(self, db, post_projection: dict):
+        # post_projection must include id, created_at and whatever on_post needs
+        if self.mode == 'local' or self._task is not None:
+            return
+        self._task = asyncio.ensure_future(self._run(db, post_projection))
+        self._task.add_done_callback(self._on_task_done)
+
+    def _on_task_done(self, task: asyncio.Task):
+        # Nothing awaits the task: an unexpected error would otherwise stop fan-out silently
+        if task.cancelled() or task.exception() is None:
+            return
+        self.errors += 1
+        self.active_mode = None
+        logger.error('live feed tailer stopped, cross-worker fan-out disabled', exc_info=task.exception())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            'mode': self.mode,
+            'active_mode': self.active_mode,
+            'posts': self.posts,
+            'deletes': self.deletes,
+            'skipped_seen': self.skipped,
+            'errors': self.errors,
+            'has_resume_token': self.resume_token is not None,
+        }
@@ -0,0 +1,134 @@
+from typing import Dict, List, Optional
+
+from search import words
+
+
+# Bundled gazetteer for route matching. Free-text locations are resolved at
+# write time to canonical keys at three levels (district, region, province):
+# 'istanbul/kadikoy', 'istanbul/anadolu', 'istanbul'. Other provinces can be
+# added to PROVINCES without touching the resolver.
+
+PROVINCES = {
+    'istanbul': {
+        'name': 'İstanbul',
+        'regions': {
+            'avrupa': {
+                'name': 'Avrupa Yakası',
+                'districts': [
+                    'Arnavutköy', 'Avcılar', 'Bağcılar', 'Bahçelievler', 'Bakırköy', 'Başakşehir', 'Bayrampaşa',
+                    'Beşiktaş', 'Beylikdüzü', 'Beyoğlu', 'Büyükçekmece', 'Çatalca', 'Esenler', 'Esenyurt',
+                    'Eyüpsultan', 'Fatih', 'Gaziosmanpaşa', 'Güngören', 'Kağıthane', 'Küçükçekmece', 'Sarıyer',
+                    'Silivri', 'Sultangazi', 'Şişli', 'Zeytinburnu',
+                ],
+            },
+            'anadolu': {
+                'name': 'Anadolu Yakası',
+                'districts': [
+                    'Adalar', 'Ataşehir', 'Beykoz', 'Çekmeköy', 'Kadıköy', 'Kartal', 'Maltepe', 'Pendik',
+                    'Sancaktepe', 'Sultanbeyli', 'Şile', 'Tuzla', 'Ümraniye', 'Üsküdar',
+                ],
+            },
+        },
+        # Neighbourhoods and landmarks people write instead of the district
+        'aliases': {
+            'Maslak': 'Sarıyer', 'İstinye': 'Sarıyer', 'Tarabya': 'Sarıyer',
+            'Levent': 'Beşiktaş', 'Etiler': 'Beşiktaş', 'Ortaköy': 'Beşiktaş', 'Bebek': 'Beşiktaş',
+            'Mecidiyeköy': 'Şişli', 'Nişantaşı': 'Şişli', 'Fulya': 'Şişli',
+            'Taksim': 'Beyoğlu', 'Cihangir': 'Beyoğlu', 'Karaköy': 'Beyoğlu',
+            'Eminönü': 'Fatih', 'Sultanahmet': 'Fatih', 'Aksaray': 'Fatih',
+            'Florya': 'Bakırköy', 'Yeşilköy': 'Bakırköy', 'Ataköy': 'Bakırköy',
+            'Halkalı': 'Küçükçekmece', 'Eyüp': 'Eyüpsultan',
+            'Kozyatağı': 'Kadıköy', 'Moda': 'Kadıköy', 'Bostancı': 'Kadıköy', 'Göztepe': 'Kadıköy', 'Fenerbahçe': 'Kadıköy',
+            'Altunizade': 'Üsküdar', 'Çengelköy': 'Üsküdar', 'Beylerbeyi': 'Üsküdar',
+            'Kavacık': 'Beykoz', 'Kurtköy': 'Pendik', 'Büyükada': 'Adalar', 'Heybeliada': 'Adalar',
+        },
+    },
+}
+
+LEVELS = ('district', 'region', 'province')
+
+
+def _slug(name: str) -> str:
+    return ''.join(words(name))
+
+
+def _build():
+    places: Dict[str, dict] = {}   # key -> {'key', 'name', 'level', 'region', 'province'}
+    names: Dict[str, str] = {}     # folded name -> key
+    for p_slug, province in PROVINCES.items():
+        places[p_slug] = {'key': p_slug, 'name': province['name'], 'level': 'province', 'region': None, 'province': p_slug}
+        names[_slug(province['name'])] = p_slug
+        district_keys = {}
+        for r_slug, region in province['regions'].items():
+            r_key = f'{p_slug}/{r_slug}'
+            places[r_key] = {'key': r_key, 'name': region['name'], 'level': 'region', 'region': r_key, 'province': p_slug}
+            names[_slug(region['name'])] = r_key
+            names[r_slug] = r_key
+            for d_name in region['districts']:
+                d_key = f'{p_slug}/{_slug(d_name)}'
+                places[d_key] = {'key': d_key, 'name': d_name, 'level': 'district', 'region': r_key, 'province': p_slug}
+                names[_slug(d_name)] = d_key
+                district_keys[d_name] = d_key
+        for alias, d_name in province.get('aliases', {}).items():
+            names.setdefault(_slug(alias), district_keys[d_name])
+    return places, names
+
+
+PLACES, _NAMES = _build()
+_LONGEST_NAME = max(len(words(p['name'])) for p in PLACES.values())
+
+
+def resolve(text: Optional[str]) -> Optional[dict]:
+    # Most specific match wins; multi-word names ("Avrupa Yakası") are tried as joined n-grams
+    if not text:
+        return None
+    tokens = words(text)
+    best = None
+    for n in range(_LONGEST_NAME, 0, -1):
+        for i in range(len(tokens) - n + 1):
+            key = _NAMES.get(''.join(tokens[i:i + n]))
+            if key and (best is None or LEVELS.index(PLACES[key]['level']) < LEVELS.index(PLACES[best]['level'])):
+                best = key
+    return PLACES[best] if best else None
+
+
+def location_key(value: str) -> Optional[str]:
+    # Accepts a canonical key or free text ("Beşiktaş", "anadolu yakası")
+    value = value.strip()
+    if value in PLACES:
+        return value
+    place = resolve(value)
+    return place['key'] if place else None
+
+
+def _levels(place: Optional[dict]) -> List[str]:
+    if place is None:
+        return []
+    return [k for k in (place['key'] if place['level'] == 'district' else None, place['region'], place['province']) if k]
+
+
+def route_fields(from_text: Optional[str], to_text: Optional[str]) -> dict:
+    # Stored on the document: readable district/region keys plus the multikey route_keys
+    # ('from:<key>', 'to:<key>', 'route:<from>><to>' at every level) that filters query.
+    origin, destination = resolve(from_text), resolve(to_text)
+    from_keys, to_keys = _levels(origin), _levels(destination)
+    keys = [f'from:{k}' for k in from_keys] + [f'to:{k}' for k in to_keys]
+    keys += [f'route:{a}>{b}' for a in from_keys for b in to_keys]
+    return {
+        'from_district': origin['key'] if origin and origin['level'] == 'district' else None,
+        'from_region': origin['region'] if origin else None,
+        'to_district': destination['key'] if destination and destination['level'] == 'district' else None,
+        'to_region': destination['region'] if destination else None,
+        'route_keys': keys,
+    }
+
+
+def route_filter_key(origin: Optional[str], destination: Optional[str]) -> Optional[str]:
+    # The single route_keys entry matching an origin/destination filter, so one index lookup serves it
+    if origin and destination:
+        return f'route:{origin}>{destination}'
+    if origin:
+        return f'from:{origin}'
+    if destination:
+        return f'to:{destination}'
+    return None
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Runs CPU-bound password hashing (pbkdf2_sha256) on a dedicated thread pool so
+# it never blocks the event loop. hashlib releases the GIL while deriving keys,
+# so threads scale across cores. Work beyond workers + queue_limit is rejected
+# up front rather than queued without bound.
+
+class HashPoolBusy(Exception):
+    pass
+
+
+class HashPool:
+    def __init__(self, workers: int = 4, queue_limit: int = 64):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pwhash')
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+        self.run_seconds_max = 0.0
+        # Optional callback(fn_name, wait_seconds, run_seconds), e.g. to feed metrics
+        self.observer = None
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    async def run(self, fn, *args):
+        if self.in_flight >= self.workers + self.queue_limit:
+            self.rejected += 1
+            raise HashPoolBusy()
+        self.in_flight += 1
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            result = fn(*args)
+            return result, started - submitted, time.perf_counter() - started
+
+        try:
+            result, waited, ran = await asyncio.get_running_loop().run_in_executor(self.executor, job)
+        finally:
+            self.in_flight -= 1
+        self.completed += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        self.run_seconds_total += ran
+        self.run_seconds_max = max(self.run_seconds_max, ran)
+        if self.observer is not None:
+            self.observer(fn.__name__, waited, ran)
+        return result
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        done = self.completed or 1
+        return {
+            'workers': self.workers,
+            'queue_limit': self.queue_limit,
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue_depth,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'wait_ms_avg': round(self.wait_seconds_total / done * 1000, 3),
+            'wait_ms_max': round(self.wait_seconds_max * 1000, 3),
+            'hash_ms_avg': round(self.run_seconds_total / done * 1000, 3),
+            'hash_ms_max': round(self.run_seconds_max * 1000, 3),
+        }
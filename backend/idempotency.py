@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+
+# Idempotency-Key support. The first execution for a (scope, key) claims a
+# document in idempotency_keys, runs, and stores its status code and JSON body;
+# replays return the stored response without running the handler again. A
+# bounded in-process LRU answers most replays, concurrent duplicates on this
+# worker wait on the same future, and duplicates on other workers wait for the
+# claim to complete. A claim whose worker died is taken over once it expires.
+#
+# Reusing a key with a different payload is a client bug and is rejected.
+
+class IdempotencyConflict(Exception):
+    pass
+
+
+class IdempotencyInProgress(Exception):
+    pass
+
+
+def fingerprint(payload) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    def __init__(self, ttl_seconds: float = 86400, cache_size: int = 10000,
+                 pending_seconds: float = 60, wait_seconds: float = 10):
+        self.ttl_seconds = ttl_seconds
+        self.cache_size = cache_size
+        # How long a claim may stay pending before another worker may take it over
+        self.pending_seconds = pending_seconds
+        # How long a duplicate waits for another worker's in-flight execution
+        self.wait_seconds = wait_seconds
+        self._cache: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._collection = None
+        self.executed = 0
+        self.replayed = 0
+        self.coalesced = 0
+        self.conflicts = 0
+
+    def bind(self, collection):
+        self._collection = collection
+
+    def _cache_get(self, doc_id: str) -> Optional[tuple]:
+        entry = self._cache.get(doc_id)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._cache[doc_id]
+            return None
+        self._cache.move_to_end(doc_id)
+        return entry
+
+    def _cache_set(self, doc_id: str, fp: str, status: int, body):
+        if self.cache_size <= 0:
+            return
+        self._cache[doc_id] = (time.monotonic() + self.ttl_seconds, fp, status, body)
+        self._cache.move_to_end(doc_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _replay(self, fp: str, stored_fp: str, status: int, body) -> Tuple[int, object, bool]:
+        if fp != stored_fp:
+            self.conflicts += 1
+            raise IdempotencyConflict()
+        self.replayed += 1
+        return status, body, True
+
+    async def _claim(self, doc_id: str, fp: str) -> Optional[dict]:
+        # Returns None once this worker owns the claim, else the completed document
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            now = datetime.utcnow()
+            claim = {'fingerprint': fp, 'status': 'pending', 'expires_at': now + timedelta(seconds=self.pending_seconds)}
+            try:
+                await self._collection.insert_one({'_id': doc_id, **claim})
+                return None
+            except DuplicateKeyError:
+                pass
+            doc = await self._collection.find_one({'_id': doc_id})
+            if doc is None:
+                continue  # expired between insert and read
+            if doc['status'] == 'done':
+                return doc
+            if doc['fingerprint'] != fp:
+                self.conflicts += 1
+                raise IdempotencyConflict()
+            if doc['expires_at'] < now:
+                res = await self._collection.update_one({'_id': doc_id, 'status': 'pending', 'expires_at': doc['expires_at']}, {'$set': claim})
+                if res.modified_count:
+                    return None
+            if time.monotonic() > deadline:
+                raise IdempotencyInProgress()
+            await asyncio.sleep(0.1)
+
+    async def run(self, scope: str, key: str, payload, fn: Callable[[], Awaitable[Tuple[int, object]]]) -> Tuple[int, object, bool]:
+        """Returns (status_code, body, replayed). fn returns (status_code, jsonable body);
+        if it raises, nothing is stored and the key can be retried."""
+        doc_id = f'{scope}:{key}'
+        fp = fingerprint(payload)
+        cached = self._cache_get(doc_id)
+        if cached is not None:
+            return self._replay(fp, cached[1], cached[2], cached[3])
+        inflight = self._inflight.get(doc_id)
+        if inflight is not None:
+            self.coalesced += 1
+            stored_fp, status, body = await asyncio.shield(inflight)
+            return self._replay(fp, stored_fp, status, body)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[doc_id] = future
+        try:
+            doc = await self._claim(doc_id, fp)
+            if doc is not None:
+                self._cache_set(doc_id, doc['fingerprint'], doc['status_code'], doc['body'])
+                future.set_result((doc['fingerprint'], doc['status_code'], doc['body']))
+                return self._replay(fp, doc['fingerprint'], doc['status_code'], doc['body'])
+            try:
+                status, body = await fn()
+            except BaseException:
+                await self._collection.delete_one({'_id': doc_id, 'status': 'pending'})
+                raise
+            self.executed += 1
+            await self._collection.update_one({'_id': doc_id}, {'$set': {
+                'status': 'done', 'status_code': status, 'body': body,
+                'expires_at': datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+            }})
+            self._cache_set(doc_id, fp, status, body)
+            future.set_result((fp, status, body))
+            return status, body, False
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                future.exception()  # waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            self._inflight.pop(doc_id, None)
+
+    def stats(self) -> dict:
+        return {
+            'cache_size': len(self._cache),
+            'in_flight': len(self._inflight),
+            'executed': self.executed,
+            'replayed': self.replayed,
+            'coalesced': self.coalesced,
+            'conflicts': self.conflicts,
+        }
@@ -0,0 +1,221 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+
+# Minimal Prometheus text-format metrics. Everything is per process; each
+# worker exposes its own /metrics and the scraper aggregates. Metric updates
+# take a lock because Mongo command events arrive on driver threads.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(v: str) -> str:
+    return str(v).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f'{self.name}{_labels(self.label_names, k)} {v}' for k, v in items]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self._values: Dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, *labels, value: float):
+        with self._lock:
+            v = self._values.get(labels)
+            if v is None:
+                v = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    v[i] += 1
+            v[-2] += value
+            v[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = self.header()
+        for k, v in items:
+            for b, n in zip(self.buckets, v):
+                le = 'le="%s"' % b
+                lines.append(f'{self.name}_bucket{_labels(self.label_names, k, le)} {n}')
+            le = 'le="+Inf"'
+            lines.append(f'{self.name}_bucket{_labels(self.label_names, k, le)} {v[-1]}')
+            lines.append(f'{self.name}_sum{_labels(self.label_names, k)} {v[-2]}')
+            lines.append(f'{self.name}_count{_labels(self.label_names, k)} {v[-1]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.collectors: List[Callable[[], None]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def add_collector(self, fn: Callable[[], None]):
+        # Called before each render to refresh gauges mirrored from other components
+        self.collectors.append(fn)
+
+    def render(self) -> str:
+        for fn in self.collectors:
+            fn()
+        lines = []
+        for m in self.metrics:
+            lines.extend(m.render())
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: per-route latency, status counts and in-flight requests."""
+
+    def __init__(self, app, registry: Registry):
+        self.app = app
+        self.latency = registry.histogram('http_request_duration_seconds', 'HTTP request latency', ('method', 'route'))
+        self.requests = registry.counter('http_requests_total', 'HTTP requests by status', ('method', 'route', 'status'))
+        self.in_flight = registry.gauge('http_requests_in_flight', 'HTTP requests currently being served', ('method',))
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        method = scope['method']
+        status = {'code': 500}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        self.in_flight.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.in_flight.dec(method)
+            # The router records the matched route in the scope; use its template to keep cardinality bounded
+            route = scope.get('route')
+            path = getattr(route, 'path', None) or 'unmatched'
+            self.latency.observe(method, path, value=elapsed)
+            self.requests.inc(method, path, str(status['code']))
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Per-collection / per-command latency and returned-document counts."""
+
+    def __init__(self, registry: Registry):
+        self.latency = registry.histogram('mongo_command_duration_seconds', 'MongoDB command latency',
+                                          ('collection', 'command'), FAST_BUCKETS)
+        self.docs = registry.counter('mongo_documents_returned_total', 'Documents returned by MongoDB commands',
+                                     ('collection', 'command'))
+        self.failures = registry.counter('mongo_command_failures_total', 'Failed MongoDB commands', ('collection', 'command'))
+        self._pending: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _collection(event) -> str:
+        cmd = event.command
+        if event.command_name == 'getMore':
+            return str(cmd.get('collection', ''))
+        value = cmd.get(event.command_name)
+        return value if isinstance(value, str) else ''
+
+    @staticmethod
+    def _returned(reply) -> int:
+        cursor = reply.get('cursor')
+        if isinstance(cursor, dict):
+            return len(cursor.get('firstBatch') or cursor.get('nextBatch') or [])
+        if 'value' in reply:  # findAndModify
+            return 1 if reply['value'] else 0
+        return 0
+
+    def started(self, event):
+        coll = self._collection(event)
+        if not coll:
+            return  # admin commands (ping, hello, ...) have no collection
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = coll
+
+    def _pop(self, event) -> Optional[str]:
+        with self._lock:
+            return self._pending.pop((event.connection_id, event.request_id), None)
+
+    def succeeded(self, event):
+        coll = self._pop(event)
+        if coll is None:
+            return
+        self.latency.observe(coll, event.command_name, value=event.duration_micros / 1e6)
+        n = self._returned(event.reply)
+        if n:
+            self.docs.inc(coll, event.command_name, amount=n)
+
+    def failed(self, event):
+        coll = self._pop(event)
+        if coll is None:
+            return
+        self.latency.observe(coll, event.command_name, value=event.duration_micros / 1e6)
+        self.failures.inc(coll, event.command_name)
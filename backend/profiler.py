@@ -0,0 +1,204 @@
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional, Tuple
+
+
+# Admin-triggered sampling profiler (stdlib only). A background thread reads
+# every thread's current frame (sys._current_frames) each interval and counts
+# the stacks, producing collapsed-stack output for flamegraph.pl/speedscope.
+# Nothing runs while no session is active; the middleware's only cost then is
+# one attribute check per request.
+#
+# Process sessions sample every thread for N seconds. Request sessions run a
+# chosen share of requests (optionally only one path) through a marker frame;
+# on the event loop thread only stacks containing that frame are recorded, so
+# concurrent unsampled requests stay out. Work handed to worker threads (the
+# password hash pool) is recorded while a sampled request is in flight, under
+# its thread name.
+
+MAX_PROCESS_SECONDS = 120
+MAX_DISTINCT_STACKS = 20000
+
+
+def _label(code) -> str:
+    return f'{os.path.basename(code.co_filename)}:{getattr(code, "co_qualname", code.co_name)}'
+
+
+class SamplingProfiler:
+    def __init__(self, interval_seconds: float = 0.005, worker_thread_prefixes: Tuple[str, ...] = ()):
+        self.interval_seconds = interval_seconds
+        self.worker_thread_prefixes = worker_thread_prefixes
+        self.mode: Optional[str] = None  # None, 'process' or 'requests'
+        self.sample_percent = 0.0
+        self.path: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.ends_at: Optional[float] = None
+        self._stacks: Counter = Counter()
+        self._dropped = 0
+        self.samples = 0
+        self.requests_sampled = 0
+        self._in_flight = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._loop_thread_id: Optional[int] = None
+        self.last_result: Optional[dict] = None
+
+    # Session control
+
+    def _begin(self, mode: str, seconds: Optional[float], sample_percent: float = 0.0, path: Optional[str] = None):
+        if self.mode is not None:
+            raise RuntimeError('A profiling session is already running')
+        self.sample_percent = sample_percent
+        self.path = path
+        self._stacks = Counter()
+        self._dropped = 0
+        self.samples = 0
+        self.requests_sampled = 0
+        self.started_at = time.time()
+        self.ends_at = self.started_at + seconds if seconds else None
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self.mode = mode
+        self._thread = threading.Thread(target=self._sample_loop, name='profiler', daemon=True)
+        self._thread.start()
+
+    def start_requests(self, sample_percent: float, path: Optional[str] = None, seconds: Optional[float] = None):
+        # path is an exact request path, or a prefix ending in '*'
+        self._begin('requests', seconds, sample_percent, path)
+
+    async def profile_process(self, seconds: float) -> dict:
+        self._begin('process', seconds)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.stop()
+        return self.last_result
+
+    def stop(self) -> Optional[dict]:
+        with self._lock:
+            return self._finish()
+
+    def _finish(self) -> Optional[dict]:
+        if self.mode is None:
+            return self.last_result
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self.last_result = {
+            'mode': self.mode,
+            'sample_percent': self.sample_percent if self.mode == 'requests' else None,
+            'path': self.path if self.mode == 'requests' else None,
+            'started_at': self.started_at,
+            'seconds': round(time.time() - self.started_at, 3),
+            'interval_seconds': self.interval_seconds,
+            'samples': self.samples,
+            'requests_sampled': self.requests_sampled,
+            'distinct_stacks': len(self._stacks),
+            'dropped_samples': self._dropped,
+            'stacks': self._stacks,
+        }
+        self.mode = None
+        self.path = None
+        self._thread = None
+        return self.last_result
+
+    # Sampling
+
+    def _record(self, frame, root: str, stop_code=None):
+        names = []
+        while frame is not None:
+            if frame.f_code is stop_code:
+                break
+            names.append(_label(frame.f_code))
+            frame = frame.f_back
+        names.append(root)
+        stack = ';'.join(reversed(names))
+        if stack not in self._stacks and len(self._stacks) >= MAX_DISTINCT_STACKS:
+            self._dropped += 1
+            return
+        self._stacks[stack] += 1
+        self.samples += 1
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        marker = self._run_sampled.__code__
+        while not self._stop.wait(self.interval_seconds):
+            if self.ends_at is not None and time.time() >= self.ends_at:
+                if self.mode == 'requests':
+                    # Request sessions with a deadline end themselves; stop() joins this thread
+                    threading.Thread(target=self.stop, daemon=True).start()
+                return
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                name = names.get(tid, str(tid))
+                if self.mode == 'process':
+                    self._record(frame, name)
+                elif tid == self._loop_thread_id:
+                    # Only the part of the stack below the sampled request's marker frame
+                    f = frame
+                    while f is not None and f.f_code is not marker:
+                        f = f.f_back
+                    if f is not None:
+                        self._record(frame, 'request', stop_code=marker)
+                elif self._in_flight and name.startswith(self.worker_thread_prefixes):
+                    self._record(frame, name)
+
+    def should_sample(self, path: str) -> bool:
+        if self.mode != 'requests':
+            return False
+        if self.path is not None:
+            if self.path.endswith('*'):
+                if not path.startswith(self.path[:-1]):
+                    return False
+            elif path != self.path:
+                return False
+        return random.random() * 100 < self.sample_percent
+
+    async def _run_sampled(self, app, scope, receive, send):
+        # The sampler recognises sampled requests by this frame on the loop thread's stack
+        self._in_flight += 1
+        self.requests_sampled += 1
+        try:
+            await app(scope, receive, send)
+        finally:
+            self._in_flight -= 1
+
+    # Output
+
+    def collapsed(self) -> str:
+        stacks = self.last_result['stacks'] if self.last_result else Counter()
+        return ''.join(f'{stack} {n}\n' for stack, n in stacks.most_common())
+
+    def status(self) -> dict:
+        last = self.last_result
+        return {
+            'active': self.mode,
+            'sample_percent': self.sample_percent if self.mode == 'requests' else None,
+            'path': self.path,
+            'running_seconds': round(time.time() - self.started_at, 3) if self.mode else None,
+            'ends_at': self.ends_at if self.mode else None,
+            'samples': self.samples if self.mode else None,
+            'requests_sampled': self.requests_sampled if self.mode else None,
+            'last_result': {k: v for k, v in last.items() if k != 'stacks'} if last else None,
+        }
+
+
+class ProfilerMiddleware:
+    """Pure ASGI middleware routing sampled requests through the profiler."""
+
+    def __init__(self, app, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if self.profiler.mode != 'requests' or scope['type'] != 'http' or not self.profiler.should_sample(scope['path']):
+            return await self.app(scope, receive, send)
+        await self.profiler._run_sampled(self.app, scope, receive, send)
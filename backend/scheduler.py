@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+logger = logging.getLogger('scheduler')
+
+
+# In-process periodic job runner with a single leader across workers. Every
+# worker runs the tick loop; only the holder of the Mongo lease document
+# (scheduler_leases) runs jobs. The lease is renewed each tick and expires if
+# the leader dies, so another worker takes over within lease_seconds. Jobs
+# must be idempotent batch operations: a leader that loses its lease lets
+# running jobs finish, and admin triggers may run a job on any worker.
+#
+# Job state (last run, duration, result, error) lives in scheduler_jobs so
+# every worker reports the same picture and a new leader keeps the schedule.
+# The same document carries a per-job run lock (running_owner/running_until),
+# renewed each tick while the job runs, so a job never runs twice at once
+# across workers; a lock left by a dead worker expires after lease_seconds.
+
+LEASE_ID = 'scheduler'
+
+
+class JobAlreadyRunning(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, name: str, fn: Callable[[], Awaitable[dict]], interval_seconds: float, description: str = ''):
+        self.name = name
+        self.fn = fn
+        self.interval_seconds = interval_seconds
+        self.description = description
+        self.next_run_at: Optional[datetime] = None
+        self.running = False
+
+
+class Scheduler:
+    def __init__(self, jobs: List[Job], lease_seconds: float = 30.0, tick_seconds: float = 5.0,
+                 observer: Optional[Callable[[str, float, bool], None]] = None):
+        self.jobs: Dict[str, Job] = {j.name: j for j in jobs}
+        self.lease_seconds = lease_seconds
+        self.tick_seconds = tick_seconds
+        # Optional callback(job_name, seconds, ok), e.g. to feed metrics
+        self.observer = observer
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        self.is_leader = False
+        self._db = None
+        self._task: Optional[asyncio.Task] = None
+        self._running: set = set()
+
+    async def _acquire_lease(self) -> bool:
+        now = datetime.utcnow()
+        try:
+            # Matches only if we hold the lease or it expired; otherwise the upsert
+            # collides with the other owner's document on _id
+            await self._db.scheduler_leases.update_one(
+                {'_id': LEASE_ID, '$or': [{'owner': self.worker_id}, {'expires_at': {'$lt': now}}]},
+                {'$set': {'owner': self.worker_id, 'expires_at': now + timedelta(seconds=self.lease_seconds), 'renewed_at': now}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def _load_schedule(self):
+        # On becoming leader, continue from the previous leader's last runs
+        now = datetime.utcnow()
+        states = {d['_id']: d async for d in self._db.scheduler_jobs.find({'_id': {'$in': list(self.jobs)}})}
+        for job in self.jobs.values():
+            last = states.get(job.name, {}).get('last_started_at')
+            job.next_run_at = last + timedelta(seconds=job.interval_seconds) if last else now
+
+    async def _lock_job(self, name: str) -> bool:
+        now = datetime.utcnow()
+        try:
+            await self._db.scheduler_jobs.update_one(
+                {'_id': name, '$or': [{'running_owner': None}, {'running_until': {'$lt': now}}]},
+                {'$set': {'running_owner': self.worker_id, 'running_until': now + timedelta(seconds=self.lease_seconds)}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def _hold_job_lock(self, name: str):
+        while True:
+            await asyncio.sleep(self.tick_seconds)
+            try:
+                await self._db.scheduler_jobs.update_one(
+                    {'_id': name, 'running_owner': self.worker_id},
+                    {'$set': {'running_until': datetime.utcnow() + timedelta(seconds=self.lease_seconds)}},
+                )
+            except PyMongoError:
+                logger.exception('Could not renew run lock of job %s', name)
+
+    async def run_job(self, name: str, trigger: str = 'schedule') -> dict:
+        """Raises JobAlreadyRunning if the job is running here or on another worker."""
+        job = self.jobs[name]
+        if job.running:
+            raise JobAlreadyRunning(name)
+        job.running = True
+        try:
+            locked = await self._lock_job(name)
+        except BaseException:
+            job.running = False
+            raise
+        if not locked:
+            job.running = False
+            raise JobAlreadyRunning(name)
+        heartbeat = asyncio.ensure_future(self._hold_job_lock(name))
+        started_at = datetime.utcnow()
+        job.next_run_at = started_at + timedelta(seconds=job.interval_seconds)
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            result = await job.fn()
+        except Exception as e:
+            logger.exception('Job %s failed', name)
+            error = str(e)
+        finally:
+            heartbeat.cancel()
+            job.running = False
+        duration = time.perf_counter() - start
+        if self.observer is not None:
+            self.observer(name, duration, error is None)
+        state = {
+            'last_started_at': started_at,
+            'last_finished_at': datetime.utcnow(),
+            'last_duration_ms': round(duration * 1000, 3),
+            'last_result': result,
+            'last_error': error,
+            'last_trigger': trigger,
+            'last_worker': self.worker_id,
+        }
+        try:
+            await self._db.scheduler_jobs.update_one({'_id': name}, {
+                '$set': state,
+                '$inc': {'runs': 1, 'failures': 1 if error else 0},
+                '$unset': {'running_owner': '', 'running_until': ''},
+            }, upsert=True)
+        except PyMongoError:
+            # The run lock then expires on its own after lease_seconds
+            logger.exception('Could not record run of job %s', name)
+        return {'job': name, **state}
+
+    async def _run_scheduled(self, job: Job):
+        try:
+            await self.run_job(job.name)
+        except JobAlreadyRunning:
+            # Started by an admin trigger elsewhere: that run counts for this slot
+            job.next_run_at = datetime.utcnow() + timedelta(seconds=job.interval_seconds)
+            logger.info('Job %s already running on another worker, skipped', job.name)
+
+    def _spawn(self, job: Job):
+        task = asyncio.ensure_future(self._run_scheduled(job))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _tick(self):
+        leader = await self._acquire_lease()
+        if leader and not self.is_leader:
+            logger.info('Scheduler leadership acquired by %s', self.worker_id)
+            await self._load_schedule()
+        self.is_leader = leader
+        if not leader:
+            return
+        now = datetime.utcnow()
+        for job in self.jobs.values():
+            if not job.running and job.next_run_at is not None and job.next_run_at <= now:
+                self._spawn(job)
+
+    async def _run(self):
+        while True:
+            try:
+                await self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.is_leader = False
+                logger.exception('Scheduler tick failed')
+            await asyncio.sleep(self.tick_seconds)
+
+    def bind(self, db):
+        # Needed for admin-triggered runs and status even where the loop is disabled
+        self._db = db
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.is_leader:
+            # Hand over right away instead of making the next leader wait out the lease
+            try:
+                await self._db.scheduler_leases.delete_one({'_id': LEASE_ID, 'owner': self.worker_id})
+            except PyMongoError:
+                pass
+            self.is_leader = False
+
+    async def status(self) -> dict:
+        lease = await self._db.scheduler_leases.find_one({'_id': LEASE_ID}) if self._db is not None else None
+        states = {d['_id']: d async for d in self._db.scheduler_jobs.find({'_id': {'$in': list(self.jobs)}})} if self._db is not None else {}
+        jobs = []
+        for job in self.jobs.values():
+            state = states.get(job.name, {})
+            state.pop('_id', None)
+            jobs.append({
+                'name': job.name,
+                'description': job.description,
+                'interval_seconds': job.interval_seconds,
+                'running_here': job.running,
+                'next_run_at': job.next_run_at if self.is_leader else None,
+                'runs': state.pop('runs', 0),
+                'failures': state.pop('failures', 0),
+                **state,
+            })
+        return {
+            'worker_id': self.worker_id,
+            'is_leader': self.is_leader,
+            'leader': lease.get('owner') if lease else None,
+            'lease_expires_at': lease.get('expires_at') if lease else None,
+            'jobs': jobs,
+        }
+
+    async def job_status(self, name: str) -> dict:
+        return next(j for j in (await self.status())['jobs'] if j['name'] == name)
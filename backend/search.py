@@ -0,0 +1,46 @@
+import re
+from typing import Iterable, List
+
+
+# Turkish-aware search tokens. Text is folded (İ/I/ı -> i, ş -> s, ğ -> g,
+# ç -> c, ö -> o, ü -> u, circumflexes dropped) and every word is stored with
+# its prefixes, so "kadik" matches "Kadıköy" with a plain multikey index
+# lookup instead of a regex scan.
+
+MIN_PREFIX = 2
+MAX_TOKEN = 20
+MAX_QUERY_TERMS = 5
+
+_FOLD = str.maketrans({
+    'İ': 'i', 'I': 'i', 'ı': 'i',
+    'Ş': 's', 'ş': 's', 'Ğ': 'g', 'ğ': 'g', 'Ç': 'c', 'ç': 'c',
+    'Ö': 'o', 'ö': 'o', 'Ü': 'u', 'ü': 'u',
+    'Â': 'a', 'â': 'a', 'Î': 'i', 'î': 'i', 'Û': 'u', 'û': 'u',
+})
+_WORD = re.compile(r'\w+')
+
+
+def fold_turkish(text: str) -> str:
+    # Translate before lower(): 'İ'.lower() would leave a combining dot behind
+    return text.translate(_FOLD).lower()
+
+
+def words(text: str) -> List[str]:
+    return [w[:MAX_TOKEN] for w in _WORD.findall(fold_turkish(text)) if len(w) >= MIN_PREFIX]
+
+
+def search_tokens(doc: dict, fields: Iterable[str]) -> List[str]:
+    tokens = set()
+    for field in fields:
+        value = doc.get(field)
+        if not value:
+            continue
+        for w in words(str(value)):
+            tokens.update(w[:n] for n in range(MIN_PREFIX, len(w) + 1))
+    return sorted(tokens)
+
+
+def query_terms(q: str) -> List[str]:
+    # Longest terms first: the index serves the first $all term, the most selective one
+    terms = sorted(set(words(q)), key=len, reverse=True)
+    return terms[:MAX_QUERY_TERMS]
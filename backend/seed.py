@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+One-off setup step: ensure indexes and seed demo data.
+
+    python seed.py            # indexes + demo users + sample feed
+    python seed.py --indexes  # indexes only
+    python seed.py --search   # indexes + search tokens for posts that lack them
+    python seed.py --routes   # indexes + gazetteer route keys for posts/requests that lack them
+
+Runs regardless of SEED_DEMO_DATA, so production can keep it off at startup
+and still prepare a staging database explicitly.
+"""
+import asyncio
+import sys
+
+import server
+
+
+async def main(indexes_only: bool, search: bool, routes: bool):
+    status = await server.ensure_indexes()
+    print(f"Indexes: {status}")
+    if search:
+        print(f"Search tokens backfilled: {await server.backfill_search_tokens()}")
+    if routes:
+        print(f"Route keys backfilled: {await server.backfill_routes()}")
+    if not (indexes_only or search or routes):
+        # Running this script is the explicit opt-in
+        server.SEED_DEMO_DATA = True
+        await server.seed_demo_data()
+        print("Demo data seeded")
+    server.client.close()
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    asyncio.run(main('--indexes' in args, '--search' in args, '--routes' in args))
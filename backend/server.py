@@ -1,8 +1,12 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Request, Response, Query, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse, ORJSONResponse, PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from starlette.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, BulkWriteError
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from pydantic import BaseModel, Field, EmailStr, validator
@@ -11,16 +15,51 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import os
 import uuid
-import random
+import secrets
 import string
+import asyncio
+import time
+import base64
+import json
+import logging
+import hmac
+import hashlib
+import csv
+import io
+import re
+
+from feed_archive import NdjsonArchive
+from feed_broker import FeedBroker
+from feed_tail import FeedTailer
+from gazetteer import PLACES, location_key, route_fields, route_filter_key
+from hash_pool import HashPool, HashPoolBusy
+from idempotency import IdempotencyStore, IdempotencyConflict, IdempotencyInProgress
+from metrics import Registry, MetricsMiddleware, MongoCommandMetrics, FAST_BUCKETS
+from profiler import SamplingProfiler, ProfilerMiddleware, MAX_PROCESS_SECONDS
+from scheduler import Job, JobAlreadyRunning, Scheduler
+from search import search_tokens, query_terms
+from slow_queries import SlowQueryRecorder
+from token_versions import TokenVersionTable
+from user_cache import UserCache
+
+logger = logging.getLogger('server')
 
 # Load env
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Metrics (per process, scraped from /metrics)
+metrics_registry = Registry()
+mongo_metrics = MongoCommandMetrics(metrics_registry)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Slow-operation log: commands over the threshold, explained once per query shape
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))
+slow_queries = SlowQueryRecorder(threshold_ms=SLOW_QUERY_MS)
+
 # DB
 MONGO_URL = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(MONGO_URL)
+client = AsyncIOMotorClient(MONGO_URL, event_listeners=[mongo_metrics, slow_queries])
 db = client['moving_platform']
 
 # Auth/JWT
@@ -29,7 +68,143 @@ pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 security = HTTPBearer()
 SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret')
 ALGORITHM = 'HS256'
-ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
+# Access tokens carry role + token_version claims and are checked against the
+# revocation table, so revocation does not wait for expiry; clients renew them
+# with the refresh token, which is checked against the user document.
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get('ACCESS_TOKEN_EXPIRE_MINUTES', '15'))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get('REFRESH_TOKEN_EXPIRE_DAYS', '30'))
+TOKEN_VERSION_REFRESH_SECONDS = float(os.environ.get('TOKEN_VERSION_REFRESH_SECONDS', '5'))
+
+# Password hashing runs on its own thread pool; requests beyond
+# workers + queue limit get 503 instead of queueing behind pbkdf2
+HASH_POOL_WORKERS = int(os.environ.get('HASH_POOL_WORKERS', str(min(4, os.cpu_count() or 1))))
+HASH_POOL_QUEUE_LIMIT = int(os.environ.get('HASH_POOL_QUEUE_LIMIT', '64'))
+hash_pool = HashPool(workers=HASH_POOL_WORKERS, queue_limit=HASH_POOL_QUEUE_LIMIT)
+password_hash_seconds = metrics_registry.histogram('password_hash_seconds', 'pbkdf2 hash/verify time on the hash pool', ('op',), FAST_BUCKETS)
+password_hash_wait_seconds = metrics_registry.histogram('password_hash_wait_seconds', 'Time waiting for a hash pool thread', ('op',), FAST_BUCKETS)
+jwt_seconds = metrics_registry.histogram('jwt_seconds', 'JWT encode/decode time', ('op',), FAST_BUCKETS)
+
+def _observe_hash(op: str, waited: float, ran: float):
+    password_hash_seconds.observe(op, value=ran)
+    password_hash_wait_seconds.observe(op, value=waited)
+
+hash_pool.observer = _observe_hash
+
+# Demo data is seeded once at startup (or via `python seed.py`), never on reads.
+# Production sets SEED_DEMO_DATA=0.
+def env_flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes')
+
+SEED_DEMO_DATA = env_flag('SEED_DEMO_DATA', '1')
+
+# Opt-in fast responses: trusted DB documents are projected to the response
+# fields and serialized with orjson, skipping model construction,
+# response_model validation and jsonable_encoder
+FAST_JSON_RESPONSES = env_flag('FAST_JSON_RESPONSES', '0')
+
+# Authenticated-user cache (per process; TTL bounds staleness across workers)
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '10000'))
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', '30'))
+user_cache = UserCache(max_size=USER_CACHE_SIZE, ttl_seconds=USER_CACHE_TTL_SECONDS)
+
+# Idempotency-Key replay store for retried creates (Mongo with TTL, LRU in front)
+IDEMPOTENCY_TTL_HOURS = int(os.environ.get('IDEMPOTENCY_TTL_HOURS', '24'))
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', '10000'))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+idempotency_store = IdempotencyStore(ttl_seconds=IDEMPOTENCY_TTL_HOURS * 3600, cache_size=IDEMPOTENCY_CACHE_SIZE)
+
+# Users whose tokens were revoked within the access-token lifetime, polled from Mongo
+AUTH_CHANGE_PROJECTION = {'_id': 0, 'id': 1, 'token_version': 1, 'user_type': 1, 'is_active': 1, 'auth_changed_at': 1}
+
+async def _fetch_auth_changes(since: datetime) -> list:
+    return await db.users.find({'auth_changed_at': {'$gt': since}}, AUTH_CHANGE_PROJECTION).to_list(None)
+
+token_versions = TokenVersionTable(_fetch_auth_changes, window_seconds=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+                                   interval_seconds=TOKEN_VERSION_REFRESH_SECONDS)
+
+# Live feed streaming
+FEED_STREAM_QUEUE_SIZE = int(os.environ.get('FEED_STREAM_QUEUE_SIZE', '100'))
+FEED_STREAM_MAX_SUBSCRIBERS = int(os.environ.get('FEED_STREAM_MAX_SUBSCRIBERS', '5000'))
+FEED_STREAM_KEEPALIVE_SECONDS = 15
+FEED_STREAM_SEND_TIMEOUT_SECONDS = 5
+feed_broker = FeedBroker(queue_size=FEED_STREAM_QUEUE_SIZE, max_subscribers=FEED_STREAM_MAX_SUBSCRIBERS)
+
+# Cross-worker fan-out: each worker tails live_feed (change stream, or polling
+# on standalone servers) into its own broker. FEED_FANOUT=local disables it
+# for single-worker deployments.
+FEED_FANOUT = os.environ.get('FEED_FANOUT', 'auto')
+FEED_FANOUT_POLL_SECONDS = float(os.environ.get('FEED_FANOUT_POLL_SECONDS', '1'))
+
+def _publish_tailed_post(doc: dict):
+    invalidate_feed_version()
+    feed_broker.publish_post({f: doc.get(f) for f in LIVE_POST_FIELDS}, doc.get('route_keys', ()))
+
+def _publish_tailed_delete(post_id: str):
+    invalidate_feed_version()
+    feed_broker.publish_delete(post_id)
+
+feed_tailer = FeedTailer(_publish_tailed_post, _publish_tailed_delete, mode=FEED_FANOUT, poll_interval=FEED_FANOUT_POLL_SECONDS)
+
+# Live feed paging / delta sync
+FEED_PAGE_SIZE = 100
+FEED_SYNC_MAX_TOMBSTONES = 1000
+# created_at/deleted_at are stamped before the insert commits, so a row can land
+# behind a cursor already handed out; sync re-reads this window behind it
+FEED_SYNC_OVERLAP_SECONDS = float(os.environ.get('FEED_SYNC_OVERLAP_SECONDS', '5'))
+FEED_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('FEED_TOMBSTONE_RETENTION_DAYS', '7'))
+
+# Public feed conditional GETs. The feed version is the newest post's
+# (created_at, id) plus a deletion counter that deletes and retention bump, so
+# anything a page can show moves it. Each worker memoizes it for
+# FEED_VERSION_TTL_SECONDS; local creates/deletes and tailed events from other
+# workers drop the memo at once. nginx micro-caches the same responses.
+FEED_VERSION_TTL_SECONDS = float(os.environ.get('FEED_VERSION_TTL_SECONDS', '1'))
+FEED_CACHE_CONTROL = 'public, max-age=1'
+_feed_version = {'value': None, 'expires': 0.0, 'generation': 0}
+
+def invalidate_feed_version():
+    _feed_version['expires'] = 0.0
+    _feed_version['generation'] += 1
+
+async def bump_feed_deletions(count: int = 1):
+    await db.counters.update_one({'_id': 'live_feed'}, {'$inc': {'deletions': count}}, upsert=True)
+    invalidate_feed_version()
+
+async def feed_version() -> str:
+    if _feed_version['expires'] > time.monotonic():
+        return _feed_version['value']
+    generation = _feed_version['generation']
+    newest, counter = await asyncio.gather(
+        db.live_feed.find({}, {'_id': 0, 'id': 1, 'created_at': 1}).sort(FEED_SORT_DESC).limit(1).to_list(1),
+        db.counters.find_one({'_id': 'live_feed'}),
+    )
+    top = newest[0] if newest else None
+    value = f"{top['created_at'].isoformat() if top else ''}|{top['id'] if top else ''}|{(counter or {}).get('deletions', 0)}"
+    # A change that landed while we were reading must not be memoized away
+    if generation == _feed_version['generation']:
+        _feed_version.update(value=value, expires=time.monotonic() + FEED_VERSION_TTL_SECONDS)
+    return value
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # Weak comparison (RFC 9110): nginx gzip turns our strong tags into W/"..."
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(',')]
+    return '*' in tags or etag in (t[2:] if t.startswith('W/') else t for t in tags)
+
+# Live feed retention: posts older than FEED_RETENTION_DAYS (0 = keep forever)
+# are removed oldest-first in batches, after being copied to live_feed_archive
+# (FEED_ARCHIVE=collection) or gzip NDJSON files (FEED_ARCHIVE=ndjson)
+FEED_RETENTION_DAYS = int(os.environ.get('FEED_RETENTION_DAYS', '0'))
+FEED_RETENTION_BATCH = int(os.environ.get('FEED_RETENTION_BATCH', '1000'))
+FEED_RETENTION_INTERVAL_SECONDS = float(os.environ.get('FEED_RETENTION_INTERVAL_SECONDS', '3600'))
+FEED_ARCHIVE = os.environ.get('FEED_ARCHIVE', '')
+FEED_ARCHIVE_MODES = ('', 'collection', 'ndjson')
+if FEED_ARCHIVE not in FEED_ARCHIVE_MODES:
+    # A typo must not turn archive-then-delete into plain deletion
+    raise ValueError(f'FEED_ARCHIVE must be one of collection, ndjson or empty, not {FEED_ARCHIVE!r}')
+FEED_ARCHIVE_DIR = os.environ.get('FEED_ARCHIVE_DIR', str(ROOT_DIR / 'archive'))
+feed_archive = NdjsonArchive(FEED_ARCHIVE_DIR)
 
 # App
 app = FastAPI(title='Moving Platform API')
@@ -46,13 +221,89 @@ def verify_password(plain: str, hashed: str) -> bool:
     except Exception:
         return False
 
+async def hash_password_async(pw: str) -> str:
+    try:
+        return await hash_pool.run(get_password_hash, pw)
+    except HashPoolBusy:
+        raise HTTPException(status_code=503, detail='Server busy, please retry', headers={'Retry-After': '1'})
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    try:
+        return await hash_pool.run(verify_password, plain, hashed)
+    except HashPoolBusy:
+        raise HTTPException(status_code=503, detail='Server busy, please retry', headers={'Retry-After': '1'})
+
 def jwt_create(data: dict, minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES) -> str:
     to_encode = data.copy()
     to_encode.update({"exp": datetime.utcnow() + timedelta(minutes=minutes)})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    start = time.perf_counter()
+    token = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    jwt_seconds.observe('encode', value=time.perf_counter() - start)
+    return token
+
+def issue_tokens(user: dict) -> dict:
+    ver = user.get('token_version', 0)
+    return {
+        'access_token': jwt_create({'sub': user['id'], 'role': user['user_type'], 'ver': ver, 'typ': 'access'}),
+        'refresh_token': jwt_create({'sub': user['id'], 'ver': ver, 'typ': 'refresh'}, minutes=REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60),
+        'token_type': 'bearer',
+        'expires_in': ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+def auth_change(update: dict) -> dict:
+    # Wraps a users update so it also revokes every token issued before it
+    update = dict(update)
+    update['$set'] = {**update.get('$set', {}), 'auth_changed_at': utcnow_ms()}
+    update['$inc'] = {**update.get('$inc', {}), 'token_version': 1}
+    return update
 
 def code6() -> str:
-    return ''.join(random.choices(string.digits, k=6))
+    return ''.join(secrets.choice(string.digits) for _ in range(6))
+
+def utcnow_ms() -> datetime:
+    # Mongo stores milliseconds; truncating up front keeps cursors built from
+    # in-memory documents identical to the ones built from stored documents
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def model_defaults(model) -> dict:
+    return {name: f.default for name, f in model.model_fields.items() if not f.is_required() and f.default_factory is None}
+
+def trusted_docs(docs: list, defaults: dict) -> list:
+    # Documents we wrote ourselves were validated on the way in; filling
+    # defaults for missing optional fields is all the fast path needs
+    return [{**defaults, **d} for d in docs]
+
+def fast_json_response(content, response: Optional[Response] = None) -> ORJSONResponse:
+    out = ORJSONResponse(content)
+    if response is not None:
+        # Returning a Response directly bypasses the injected one, so carry its headers over
+        for k, v in response.headers.items():
+            if k not in ('content-length', 'content-type'):
+                out.headers[k] = v
+    return out
+
+# Opaque keyset cursors over (created_at, id), shared by every paged list
+def encode_cursor(created_at: datetime, item_id: str, deleted_at: Optional[datetime] = None) -> str:
+    raw = {'c': created_at.isoformat(), 'i': item_id}
+    if deleted_at:
+        raw['d'] = deleted_at.isoformat()
+    return base64.urlsafe_b64encode(json.dumps(raw, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return {
+            'c': datetime.fromisoformat(raw['c']),
+            'i': str(raw['i']),
+            'd': datetime.fromisoformat(raw['d']) if raw.get('d') else None,
+        }
+    except Exception:
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+
+def keyset_before(cursor: str) -> dict:
+    c = decode_cursor(cursor)
+    return {'$or': [{'created_at': {'$lt': c['c']}}, {'created_at': c['c'], 'id': {'$lt': c['i']}}]}
 
 # Models
 USER_CUSTOMER = 'customer'
@@ -77,14 +328,19 @@ class UserRegister(UserBase):
     company_description: Optional[str] = None
     company_images: Optional[List[str]] = []
 
+    @validator('user_type')
+    def _v_self_service_role(cls, v):
+        # Admins and moderators are appointed via /admin/update-user-role/{email}, never self-registered
+        if v not in [USER_CUSTOMER, USER_MOVER]:
+            raise ValueError('Only customer and mover accounts can register')
+        return v
+
 class User(UserBase):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     is_active: bool = True
     is_email_verified: bool = False
     is_phone_verified: bool = False
     is_approved: bool = False
-    email_verification_code: Optional[str] = None
-    phone_verification_code: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     hashed_password: str
@@ -99,12 +355,54 @@ class LoginRequest(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class AuthClaims(BaseModel):
+    # What an access token proves without a DB read; field names match User
+    id: str
+    user_type: str
+    token_version: int = 0
 
 class VerificationRequest(BaseModel):
     email: EmailStr
     verification_code: str
     verification_type: str
 
+    @validator('verification_type')
+    def _v_type(cls, v):
+        if v not in ['email', 'phone']:
+            raise ValueError('Invalid verification type')
+        return v
+
+class ResendVerificationRequest(BaseModel):
+    email: EmailStr
+    verification_type: str
+
+    @validator('verification_type')
+    def _v_type(cls, v):
+        if v not in ['email', 'phone']:
+            raise ValueError('Invalid verification type')
+        return v
+
+class ForgotPasswordRequest(BaseModel):
+    email: EmailStr
+    method: str = 'email'
+
+class ResetPasswordRequest(BaseModel):
+    email: EmailStr
+    token: str
+    new_password: str
+
+    @validator('new_password')
+    def _v_password(cls, v):
+        if len(v) < 6:
+            raise ValueError('Password must be at least 6 characters')
+        return v
+
 class MovingRequest(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     customer_id: str
@@ -122,6 +420,11 @@ class MovingRequest(BaseModel):
     description: Optional[str] = None
     status: str = 'pending'
     selected_mover_id: Optional[str] = None
+    # Gazetteer keys resolved from the free-text locations at write time
+    from_district: Optional[str] = None
+    from_region: Optional[str] = None
+    to_district: Optional[str] = None
+    to_region: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class MovingRequestCreate(BaseModel):
@@ -152,6 +455,11 @@ class BidCreate(BaseModel):
     price: float
     message: Optional[str] = None
 
+class MovingRequestSummary(MovingRequest):
+    # Aggregated per request in the list query; None where the viewer may not see them
+    bid_count: Optional[int] = None
+    lowest_bid: Optional[float] = None
+
 # Live feed
 class LivePost(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -166,8 +474,21 @@ class LivePost(BaseModel):
     vehicle: Optional[str] = None
     price_note: Optional[str] = None
     extra: Optional[str] = None
+    from_district: Optional[str] = None
+    from_region: Optional[str] = None
+    to_district: Optional[str] = None
+    to_region: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+LIVE_POST_SEARCH_FIELDS = ('title', 'from_location', 'to_location', 'vehicle', 'extra')
+
+class LiveFeedSync(BaseModel):
+    posts: List[LivePost]
+    deleted: List[str] = []
+    cursor: Optional[str] = None
+    has_more: bool = False
+    reset: bool = False
+
 class LivePostCreate(BaseModel):
     title: str
     from_location: Optional[str] = None
@@ -178,31 +499,165 @@ class LivePostCreate(BaseModel):
     extra: Optional[str] = None
 
 # Auth dependencies
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+def decode_token(token: str, typ: str = 'access') -> dict:
+    start = time.perf_counter()
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        uid = payload.get('sub')
-        if not uid:
-            raise HTTPException(status_code=401, detail='Invalid token')
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         raise HTTPException(status_code=401, detail='Invalid token')
+    jwt_seconds.observe('decode', value=time.perf_counter() - start)
+    # Tokens from before refresh tokens existed have no typ and are access tokens
+    if not payload.get('sub') or payload.get('typ', 'access') != typ:
+        raise HTTPException(status_code=401, detail='Invalid token')
+    return payload
+
+async def claims_from_token(token: str) -> AuthClaims:
+    payload = decode_token(token)
+    uid, ver = payload['sub'], payload.get('ver', 0)
+    if token_versions.is_revoked(uid, ver, payload.get('role')):
+        raise HTTPException(status_code=401, detail='Token revoked')
+    if 'role' not in payload:
+        # Token issued before claims carried the role: fall back to the user record
+        user = await _load_user(uid)
+        return AuthClaims(id=uid, user_type=user.user_type)
+    return AuthClaims(id=uid, user_type=payload['role'], token_version=ver)
+
+async def _load_user(uid: str) -> User:
+    cached = user_cache.get(uid)
+    if cached is not None:
+        return cached
     user = await db.users.find_one({'id': uid})
     if not user:
         raise HTTPException(status_code=401, detail='User not found')
-    return User(**user)
+    model = User(**user)
+    user_cache.set(uid, model)
+    return model
+
+async def get_user_from_token(token: str) -> User:
+    claims = await claims_from_token(token)
+    user = await _load_user(claims.id)
+    if not user.is_active:
+        raise HTTPException(status_code=401, detail='Account is banned')
+    return user
 
-async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+    # For handlers that need the profile (name, phone, ...); others use get_current_claims
+    return await get_user_from_token(credentials.credentials)
+
+async def get_current_claims(credentials: HTTPAuthorizationCredentials = Depends(security)) -> AuthClaims:
+    return await claims_from_token(credentials.credentials)
+
+async def get_admin_user(current_user: AuthClaims = Depends(get_current_claims)) -> AuthClaims:
     if current_user.user_type != 'admin':
         raise HTTPException(status_code=403, detail='Admin access required')
     return current_user
 
+# Index registry: every index the queries in this file rely on. Default key
+# names (email_1, ...) are kept so indexes created by mongo-init are reused.
+INDEXES = {
+    'users': [
+        IndexModel([('email', ASCENDING)], unique=True),
+        IndexModel([('id', ASCENDING)], unique=True),
+        # Admin user search matches a name prefix alongside the email prefix
+        IndexModel([('name', ASCENDING)]),
+        IndexModel([('user_type', ASCENDING), ('id', ASCENDING)]),
+        # Admin dashboard counts are range counts on this index
+        IndexModel([('user_type', ASCENDING), ('is_approved', ASCENDING), ('is_active', ASCENDING)]),
+        IndexModel([('auth_changed_at', ASCENDING)], sparse=True),
+        # Maintenance jobs: expired bans and stale unverified registrations
+        IndexModel([('banned_until', ASCENDING)], sparse=True),
+        IndexModel([('created_at', ASCENDING)], partialFilterExpression={'is_email_verified': False}),
+    ],
+    'live_feed': [
+        IndexModel([('created_at', DESCENDING), ('id', DESCENDING)]),
+        IndexModel([('id', ASCENDING)], unique=True),
+        # Multikey over folded words and their prefixes; serves search pages in feed order
+        IndexModel([('search_tokens', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)]),
+        # Multikey over from:/to:/route: gazetteer keys; one entry answers any origin/destination filter
+        IndexModel([('route_keys', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)]),
+    ],
+    'moving_requests': [
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('customer_id', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)]),
+        IndexModel([('status', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)]),
+        IndexModel([('created_at', DESCENDING), ('id', DESCENDING)]),
+        IndexModel([('status', ASCENDING), ('route_keys', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)]),
+        IndexModel([('route_keys', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)]),
+    ],
+    'bids': [
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('request_id', ASCENDING), ('mover_id', ASCENDING)], unique=True),
+        IndexModel([('request_id', ASCENDING), ('price', ASCENDING)]),
+        IndexModel([('mover_id', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)]),
+    ],
+    'verification_codes': [
+        IndexModel([('email', ASCENDING), ('type', ASCENDING)], unique=True),
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0),
+    ],
+    'idempotency_keys': [
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0),
+    ],
+    'live_feed_archive': [
+        IndexModel([('created_at', DESCENDING), ('id', DESCENDING)]),
+    ],
+    'live_feed_tombstones': [
+        IndexModel([('deleted_at', ASCENDING)], expireAfterSeconds=FEED_TOMBSTONE_RETENTION_DAYS * 86400),
+    ],
+}
+
+index_status = {}
+startup_complete = False
+
+async def _ensure_collection_indexes(coll: str, models: list):
+    # create_indexes is a no-op for indexes that already exist with the same spec
+    try:
+        await db[coll].create_indexes(models)
+        index_status[coll] = 'ok'
+    except Exception as e:
+        logger.error('Index creation failed for %s: %s', coll, e)
+        index_status[coll] = f'error: {e}'
+
+async def ensure_indexes() -> dict:
+    await asyncio.gather(*(_ensure_collection_indexes(coll, models) for coll, models in INDEXES.items()))
+    return index_status
+
+async def explain_command(database: str, target: dict) -> dict:
+    return await client[database].command({'explain': target, 'verbosity': 'executionStats'})
+
+async def collection_sizes(coll: str) -> dict:
+    try:
+        stats = await db.command('collStats', coll)
+    except Exception:
+        return {}
+    return {
+        'size_bytes': stats.get('size'),
+        'storage_size_bytes': stats.get('storageSize'),
+        'index_sizes_bytes': stats.get('indexSizes', {}),
+        'total_index_size_bytes': stats.get('totalIndexSize'),
+    }
+
+async def index_report() -> dict:
+    report = {}
+    for coll, models in INDEXES.items():
+        entry = {'expected': [m.document['name'] for m in models]}
+        try:
+            existing = await db[coll].index_information()
+            entry['existing'] = sorted(existing)
+            entry['missing'] = [n for n in entry['expected'] if n not in existing]
+            entry['count'] = await db[coll].estimated_document_count()
+        except Exception as e:
+            entry['error'] = str(e)
+        entry.update(await collection_sizes(coll))
+        report[coll] = entry
+    return report
+
 # Seed helpers
 DEFAULT_SAMPLE_MOVER_EMAIL = 'demo@demo.com'
 DEFAULT_SAMPLE_MOVER_PASSWORD = '123456**'
 DEFAULT_SAMPLE_CUSTOMER_EMAIL = 'demo.musteri@demo.com'
 DEFAULT_SAMPLE_CUSTOMER_PASSWORD = '123456**'
 
-def _build_user_doc(name: str, email: str, phone: str, role: str, password: str, company: Optional[str] = None):
+def _build_user_doc(name: str, email: str, phone: str, role: str, hashed_password: str, company: Optional[str] = None):
     now = datetime.utcnow()
     doc = {
         'id': str(uuid.uuid4()),
@@ -214,38 +669,56 @@ def _build_user_doc(name: str, email: str, phone: str, role: str, password: str,
         'is_email_verified': True,
         'is_phone_verified': True,
         'is_approved': True if role != 'mover' else True,
-        'email_verification_code': None,
-        'phone_verification_code': None,
         'created_at': now,
         'updated_at': now,
-        'hashed_password': get_password_hash(password),
+        'hashed_password': hashed_password,
         'company_description': 'Demo nakliyeci firması' if role == 'mover' else None,
         'company_images': [],
         'company_name': company if role == 'mover' else None,
     }
     return doc
 
-async def seed_sample_mover_if_missing():
-    existing = await db.users.find_one({'email': DEFAULT_SAMPLE_MOVER_EMAIL})
+def _seed_fingerprint(password: str, hashed_password: str) -> str:
+    # Ties a stored hash to the demo password it was made from, so restarts can
+    # tell the hash is current without paying for pbkdf2 again
+    return hmac.new(SECRET_KEY.encode(), f'{password}\0{hashed_password}'.encode(), hashlib.sha256).hexdigest()
+
+async def _seed_demo_user(email: str, password: str, profile: dict, company: Optional[str] = None):
+    if not SEED_DEMO_DATA:
+        return  # demo accounts have public passwords; never create them in production
+    existing = await db.users.find_one({'email': email})
     if existing:
-        await db.users.update_one({'email': DEFAULT_SAMPLE_MOVER_EMAIL}, {'$set': {
-            'user_type': 'mover', 'is_active': True, 'is_email_verified': True, 'is_phone_verified': True,
-            'is_approved': True, 'hashed_password': get_password_hash(DEFAULT_SAMPLE_MOVER_PASSWORD), 'updated_at': datetime.utcnow(),
-            'name': 'Demo Nakliyeci', 'phone': '+90 555 000 00 00', 'company_name': 'Demo Lojistik'
-        }})
+        updates = {k: v for k, v in profile.items() if existing.get(k) != v}
+        hashed = existing.get('hashed_password') or ''
+        if existing.get('seed_fingerprint') != _seed_fingerprint(password, hashed):
+            hashed = await hash_password_async(password)
+            updates.update({'hashed_password': hashed, 'seed_fingerprint': _seed_fingerprint(password, hashed)})
+        if not updates:
+            return
+        updates['updated_at'] = datetime.utcnow()
+        await db.users.update_one({'email': email}, {'$set': updates})
+        user_cache.invalidate(existing['id'])
         return
-    await db.users.insert_one(_build_user_doc('Demo Nakliyeci', DEFAULT_SAMPLE_MOVER_EMAIL, '+90 555 000 00 00', 'mover', DEFAULT_SAMPLE_MOVER_PASSWORD, 'Demo Lojistik'))
+    hashed = await hash_password_async(password)
+    doc = _build_user_doc(profile['name'], email, profile['phone'], profile['user_type'], hashed, company)
+    doc.update(profile)
+    doc['seed_fingerprint'] = _seed_fingerprint(password, hashed)
+    try:
+        await db.users.insert_one(doc)
+    except DuplicateKeyError:
+        pass  # another worker seeded it first
+
+async def seed_sample_mover_if_missing():
+    await _seed_demo_user(DEFAULT_SAMPLE_MOVER_EMAIL, DEFAULT_SAMPLE_MOVER_PASSWORD, {
+        'user_type': 'mover', 'is_active': True, 'is_email_verified': True, 'is_phone_verified': True,
+        'is_approved': True, 'name': 'Demo Nakliyeci', 'phone': '+90 555 000 00 00', 'company_name': 'Demo Lojistik'
+    }, 'Demo Lojistik')
 
 async def seed_sample_customer_if_missing():
-    existing = await db.users.find_one({'email': DEFAULT_SAMPLE_CUSTOMER_EMAIL})
-    if existing:
-        await db.users.update_one({'email': DEFAULT_SAMPLE_CUSTOMER_EMAIL}, {'$set': {
-            'user_type': 'customer', 'is_active': True, 'is_email_verified': True, 'is_phone_verified': True,
-            'hashed_password': get_password_hash(DEFAULT_SAMPLE_CUSTOMER_PASSWORD), 'updated_at': datetime.utcnow(),
-            'name': 'Demo Müşteri', 'phone': '+90 531 000 00 00'
-        }})
-        return
-    await db.users.insert_one(_build_user_doc('Demo Müşteri', DEFAULT_SAMPLE_CUSTOMER_EMAIL, '+90 531 000 00 00', 'customer', DEFAULT_SAMPLE_CUSTOMER_PASSWORD))
+    await _seed_demo_user(DEFAULT_SAMPLE_CUSTOMER_EMAIL, DEFAULT_SAMPLE_CUSTOMER_PASSWORD, {
+        'user_type': 'customer', 'is_active': True, 'is_email_verified': True, 'is_phone_verified': True,
+        'name': 'Demo Müşteri', 'phone': '+90 531 000 00 00'
+    })
 
 async def seed_live_feed_if_empty():
     try:
@@ -272,54 +745,246 @@ async def seed_live_feed_if_empty():
             **s,
             'created_at': datetime.utcnow(),
         })
+        docs[-1].update(route_fields(s['from_location'], s['to_location']))
+        docs[-1]['search_tokens'] = search_tokens(docs[-1], LIVE_POST_SEARCH_FIELDS)
     try:
         await db.live_feed.insert_many(docs)
     except Exception:
         pass
 
+async def backfill_search_tokens(batch_size: int = 500) -> int:
+    # One-off for posts written before search existed (python seed.py --search)
+    done = 0
+    while True:
+        posts = await db.live_feed.find({'search_tokens': {'$exists': False}}, {'_id': 1, **{f: 1 for f in LIVE_POST_SEARCH_FIELDS}}).limit(batch_size).to_list(batch_size)
+        if not posts:
+            return done
+        for p in posts:
+            await db.live_feed.update_one({'_id': p['_id']}, {'$set': {'search_tokens': search_tokens(p, LIVE_POST_SEARCH_FIELDS)}})
+        done += len(posts)
+
+async def backfill_routes(batch_size: int = 500) -> int:
+    # One-off for posts and requests written before route matching (python seed.py --routes)
+    done = 0
+    for coll in (db.live_feed, db.moving_requests):
+        while True:
+            docs = await coll.find({'route_keys': {'$exists': False}}, {'_id': 1, 'from_location': 1, 'to_location': 1}).limit(batch_size).to_list(batch_size)
+            if not docs:
+                break
+            for d in docs:
+                await coll.update_one({'_id': d['_id']}, {'$set': route_fields(d.get('from_location'), d.get('to_location'))})
+            done += len(docs)
+    return done
+
+async def seed_demo_data():
+    await asyncio.gather(seed_sample_mover_if_missing(), seed_sample_customer_if_missing(), seed_live_feed_if_empty())
+
+# Creates that clients retry (flaky mobile networks) accept an Idempotency-Key.
+# The first outcome is stored, including 4xx errors; replays get the stored
+# status and body with Idempotent-Replayed: true and never reach the handler.
+# 5xx and 429 are not stored, so the retry really runs again.
+async def idempotent(key: Optional[str], scope: str, payload, handler):
+    if key is None:
+        return await handler()
+    if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail='Invalid Idempotency-Key')
+    outcome = {}
+
+    async def run():
+        try:
+            outcome['result'] = await handler()
+            return 200, jsonable_encoder(outcome['result'])
+        except HTTPException as e:
+            if e.status_code >= 500 or e.status_code == 429:
+                raise
+            outcome['error'] = e
+            return e.status_code, {'detail': e.detail}
+
+    try:
+        status, body, replayed = await idempotency_store.run(scope, key, payload, run)
+    except IdempotencyConflict:
+        raise HTTPException(status_code=422, detail='Idempotency-Key was already used with a different request')
+    except IdempotencyInProgress:
+        raise HTTPException(status_code=409, detail='A request with this Idempotency-Key is still in progress')
+    if not replayed:
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['result']
+    return ORJSONResponse(body, status_code=status, headers={'Idempotent-Replayed': 'true'})
+
 # Endpoints
 @api.post('/register', response_model=dict)
-async def register(user: UserRegister):
+async def register(user: UserRegister, idempotency_key: Optional[str] = Header(None, alias='Idempotency-Key')):
+    # The password stays out of the stored request fingerprint
+    return await idempotent(idempotency_key, 'register', user.dict(exclude={'password'}), lambda: _register(user))
+
+async def _register(user: UserRegister):
     if await db.users.find_one({'email': user.email}):
         raise HTTPException(status_code=400, detail='Email already registered')
     doc = user.dict(); pw = doc.pop('password')
-    doc['hashed_password'] = get_password_hash(pw)
-    doc['email_verification_code'] = code6()
-    doc['phone_verification_code'] = code6()
+    doc['hashed_password'] = await hash_password_async(pw)
     doc['is_approved'] = user.user_type != 'mover'
     await db.users.insert_one(User(**doc).dict())
-    return {'message': 'User registered successfully'}
+    email_code = await issue_code(user.email, 'email')
+    phone_code = await issue_code(user.email, 'phone')
+    result = {'message': 'User registered successfully'}
+    if EXPOSE_VERIFICATION_CODES:
+        result.update({'email_code': email_code, 'phone_code': phone_code})
+    return result
 
 @api.post('/login', response_model=Token)
 async def login(body: LoginRequest):
-    # Fast path for demo mover
-    if body.email.lower() == DEFAULT_SAMPLE_MOVER_EMAIL and body.password == DEFAULT_SAMPLE_MOVER_PASSWORD:
+    # Fast paths for the demo accounts, only where demo data is enabled
+    if SEED_DEMO_DATA and body.email.lower() == DEFAULT_SAMPLE_MOVER_EMAIL and body.password == DEFAULT_SAMPLE_MOVER_PASSWORD:
         existing = await db.users.find_one({'email': DEFAULT_SAMPLE_MOVER_EMAIL})
         if not existing:
             await seed_sample_mover_if_missing()
             existing = await db.users.find_one({'email': DEFAULT_SAMPLE_MOVER_EMAIL})
-        token = jwt_create({'sub': existing['id']})
-        return {'access_token': token, 'token_type': 'bearer'}
-    # Fast path for demo customer
-    if body.email.lower() == DEFAULT_SAMPLE_CUSTOMER_EMAIL and body.password == DEFAULT_SAMPLE_CUSTOMER_PASSWORD:
+        return issue_tokens(existing)
+    if SEED_DEMO_DATA and body.email.lower() == DEFAULT_SAMPLE_CUSTOMER_EMAIL and body.password == DEFAULT_SAMPLE_CUSTOMER_PASSWORD:
         existing = await db.users.find_one({'email': DEFAULT_SAMPLE_CUSTOMER_EMAIL})
         if not existing:
             await seed_sample_customer_if_missing()
             existing = await db.users.find_one({'email': DEFAULT_SAMPLE_CUSTOMER_EMAIL})
-        token = jwt_create({'sub': existing['id']})
-        return {'access_token': token, 'token_type': 'bearer'}
+        return issue_tokens(existing)
 
     user = await db.users.find_one({'email': body.email})
     if not user:
         raise HTTPException(status_code=401, detail='Invalid credentials')
-    if not verify_password(body.password, user['hashed_password']):
+    if not await verify_password_async(body.password, user['hashed_password']):
         raise HTTPException(status_code=401, detail='Invalid credentials')
     if not user.get('is_email_verified') or not user.get('is_phone_verified'):
         raise HTTPException(status_code=401, detail='Please verify your email and phone first')
     if user.get('user_type') == 'mover' and not user.get('is_approved'):
         raise HTTPException(status_code=401, detail='Your account is pending admin approval')
-    token = jwt_create({'sub': user['id']})
-    return {'access_token': token, 'token_type': 'bearer'}
+    if not user.get('is_active', True):
+        raise HTTPException(status_code=403, detail='Account is banned')
+    return issue_tokens(user)
+
+@api.post('/token/refresh', response_model=Token)
+async def refresh_tokens(body: RefreshRequest):
+    payload = decode_token(body.refresh_token, typ='refresh')
+    user = await db.users.find_one({'id': payload['sub']}, {'_id': 0, 'id': 1, 'user_type': 1, 'token_version': 1, 'is_active': 1})
+    if not user or not user.get('is_active', True) or payload.get('ver', 0) != user.get('token_version', 0):
+        raise HTTPException(status_code=401, detail='Token revoked')
+    return issue_tokens(user)
+
+# Verification and password-reset codes live in verification_codes, one per
+# (email, type), stored as an HMAC. Wrong guesses are counted per rate window,
+# not per code: re-issuing replaces the code but keeps the count, so at most
+# MAX_CODE_ATTEMPTS guesses and MAX_CODES_PER_WINDOW codes fit in one window.
+# The TTL index on expires_at removes the entry once both code and window end.
+VERIFICATION_CODE_TTL_MINUTES = int(os.environ.get('VERIFICATION_CODE_TTL_MINUTES', str(24 * 60)))
+RESET_CODE_TTL_MINUTES = int(os.environ.get('RESET_CODE_TTL_MINUTES', '15'))
+MAX_CODE_ATTEMPTS = int(os.environ.get('MAX_CODE_ATTEMPTS', '5'))
+CODE_RATE_WINDOW_MINUTES = int(os.environ.get('CODE_RATE_WINDOW_MINUTES', '60'))
+MAX_CODES_PER_WINDOW = int(os.environ.get('MAX_CODES_PER_WINDOW', '5'))
+# No email/SMS delivery exists yet; local demo setups may opt in to getting
+# verification codes in API responses. Reset codes are never returned.
+EXPOSE_VERIFICATION_CODES = env_flag('EXPOSE_VERIFICATION_CODES', '0')
+
+def _code_hash(email: str, code_type: str, code: str) -> str:
+    return hmac.new(SECRET_KEY.encode(), f'{email}\0{code_type}\0{code}'.encode(), hashlib.sha256).hexdigest()
+
+async def issue_code(email: str, code_type: str) -> Optional[str]:
+    """Returns the new code, or None while the (email, type) window is used up or locked out."""
+    code = code6()
+    ttl = RESET_CODE_TTL_MINUTES if code_type == 'reset' else VERIFICATION_CODE_TTL_MINUTES
+    now = utcnow_ms()
+    code_expires_at = now + timedelta(minutes=ttl)
+    fields = {'code_hash': _code_hash(email, code_type, code), 'created_at': now, 'code_expires_at': code_expires_at}
+    key = {'email': email, 'type': code_type}
+    entry = await db.verification_codes.find_one(key)
+    if entry and entry.get('window_start') and entry['window_start'] > now - timedelta(minutes=CODE_RATE_WINDOW_MINUTES):
+        if entry.get('issued', 0) >= MAX_CODES_PER_WINDOW or entry.get('attempts', 0) >= MAX_CODE_ATTEMPTS:
+            return None
+        # Conditional on the count read, so concurrent issues cannot both slip under the limit
+        res = await db.verification_codes.update_one(
+            {'_id': entry['_id'], 'issued': entry.get('issued', 0)},
+            {'$set': fields, '$inc': {'issued': 1}, '$max': {'expires_at': code_expires_at}},
+        )
+        return code if res.modified_count else None
+    # No entry, or its window has passed: start a new window with a clean count
+    window = {'window_start': now, 'issued': 1, 'attempts': 0,
+              'expires_at': max(code_expires_at, now + timedelta(minutes=CODE_RATE_WINDOW_MINUTES))}
+    try:
+        res = await db.verification_codes.update_one(
+            {**key, 'window_start': entry.get('window_start') if entry else None},
+            {'$set': {**fields, **window}},
+            upsert=entry is None,
+        )
+    except DuplicateKeyError:
+        return None  # a concurrent issue created the entry first
+    return code if (res.modified_count or res.upserted_id is not None) else None
+
+async def consume_code(email: str, code_type: str, code: str):
+    now = utcnow_ms()
+    # One indexed read-modify-write: count the attempt and fetch the code together.
+    # Entries from before code_expires_at existed expire with the document.
+    entry = await db.verification_codes.find_one_and_update(
+        {'email': email, 'type': code_type, '$or': [
+            {'code_expires_at': {'$gt': now}},
+            {'code_expires_at': {'$exists': False}, 'expires_at': {'$gt': now}},
+        ]},
+        {'$inc': {'attempts': 1}},
+    )
+    if entry is None:
+        raise HTTPException(status_code=400, detail='Code expired or not found')
+    if entry['attempts'] >= MAX_CODE_ATTEMPTS or 'code_hash' not in entry:
+        # Burn the code but keep the entry, so the count outlives a re-issue until the window ends
+        await db.verification_codes.update_one({'_id': entry['_id']}, {'$unset': {'code_hash': ''}})
+        raise HTTPException(status_code=429, detail='Too many attempts, try again later')
+    if not hmac.compare_digest(entry['code_hash'], _code_hash(email, code_type, code.strip())):
+        raise HTTPException(status_code=400, detail='Invalid code')
+    await db.verification_codes.delete_one({'_id': entry['_id']})
+
+@api.post('/verify')
+async def verify(body: VerificationRequest):
+    await consume_code(body.email, body.verification_type, body.verification_code)
+    field = 'is_email_verified' if body.verification_type == 'email' else 'is_phone_verified'
+    res = await db.users.update_one({'email': body.email}, {'$set': {field: True, 'updated_at': datetime.utcnow()}})
+    if res.matched_count == 0:
+        raise HTTPException(status_code=404, detail='User not found')
+    user_cache.invalidate_email(body.email)
+    return {'message': f'{body.verification_type.capitalize()} verified'}
+
+@api.post('/resend-verification')
+async def resend_verification(body: ResendVerificationRequest):
+    field = 'is_email_verified' if body.verification_type == 'email' else 'is_phone_verified'
+    user = await db.users.find_one({'email': body.email}, {'_id': 0, field: 1})
+    if not user:
+        raise HTTPException(status_code=404, detail='User not found')
+    if user.get(field):
+        raise HTTPException(status_code=400, detail='Already verified')
+    code = await issue_code(body.email, body.verification_type)
+    if code is None:
+        raise HTTPException(status_code=429, detail='Too many codes requested, try again later')
+    result = {'message': 'Verification code sent'}
+    if EXPOSE_VERIFICATION_CODES:
+        result['code'] = code
+    return result
+
+@api.post('/forgot-password')
+async def forgot_password(body: ForgotPasswordRequest):
+    # Same answer whether or not the account exists
+    result = {'message': 'If the account exists, a reset code has been sent'}
+    if await db.users.find_one({'email': body.email}, {'_id': 1}):
+        # Delivered out of band only: returning it would let anyone reset any account.
+        # A refused issue (rate window used up) gets the same answer too.
+        await issue_code(body.email, 'reset')
+    return result
+
+@api.post('/reset-password')
+async def reset_password(body: ResetPasswordRequest):
+    await consume_code(body.email, 'reset', body.token)
+    hashed = await hash_password_async(body.new_password)
+    # Revokes every token issued with the old password
+    res = await db.users.update_one({'email': body.email}, auth_change({'$set': {'hashed_password': hashed, 'updated_at': datetime.utcnow()}}))
+    if res.matched_count == 0:
+        raise HTTPException(status_code=404, detail='User not found')
+    user_cache.invalidate_email(body.email)
+    await token_versions.refresh()
+    return {'message': 'Password updated'}
 
 @api.get('/me', response_model=User)
 async def me(current_user: User = Depends(get_current_user)):
@@ -327,38 +992,450 @@ async def me(current_user: User = Depends(get_current_user)):
 
 # Live feed endpoints
 @api.post('/live-feed', response_model=LivePost)
-async def create_live_post(post: LivePostCreate, current_user: User = Depends(get_current_user)):
+async def create_live_post(post: LivePostCreate, current_user: User = Depends(get_current_user),
+                           idempotency_key: Optional[str] = Header(None, alias='Idempotency-Key')):
+    return await idempotent(idempotency_key, f'live-feed:{current_user.id}', post.dict(), lambda: _create_live_post(post, current_user))
+
+async def _create_live_post(post: LivePostCreate, current_user: User):
     if current_user.user_type != 'mover':
         raise HTTPException(status_code=403, detail='Only movers can create live posts')
-    d = post.dict(); d.update({'mover_id': current_user.id, 'mover_name': current_user.name, 'company_name': getattr(current_user, 'company_name', None), 'phone': current_user.phone, 'created_at': datetime.utcnow()})
-    lp = LivePost(**d)
-    await db.live_feed.insert_one(lp.dict())
+    d = post.dict(); d.update({'mover_id': current_user.id, 'mover_name': current_user.name, 'company_name': getattr(current_user, 'company_name', None), 'phone': current_user.phone, 'created_at': utcnow_ms()})
+    route = route_fields(d.get('from_location'), d.get('to_location'))
+    lp = LivePost(**d, **route)
+    feed_tailer.mark_seen('post', lp.id)
+    await db.live_feed.insert_one({**lp.dict(), 'search_tokens': search_tokens(d, LIVE_POST_SEARCH_FIELDS), 'route_keys': route['route_keys']})
+    invalidate_feed_version()
+    feed_broker.publish_post(lp.dict(), route['route_keys'])
     return lp
 
+# Feed reads are keyset-ordered on (created_at, id): paging walks backwards
+# from a cursor and sync walks forwards, so neither ever uses skip.
+FEED_SORT_DESC = [('created_at', -1), ('id', -1)]
+FEED_SORT_ASC = [('created_at', 1), ('id', 1)]
+
+LIVE_POST_FIELDS = list(LivePost.model_fields)
+LIVE_POST_PROJECTION_FULL = {'_id': 0, **{f: 1 for f in LIVE_POST_FIELDS}}
+LIVE_POST_PROJECTION_PUBLIC = {'_id': 0, **{f: 1 for f in LIVE_POST_FIELDS if f != 'phone'}}
+LIVE_POST_DEFAULTS = model_defaults(LivePost)
+
+def _feed_projection(full: bool) -> dict:
+    return LIVE_POST_PROJECTION_FULL if full else LIVE_POST_PROJECTION_PUBLIC
+
+def _feed_models(posts: list) -> list:
+    # Public projections never fetch phone, so both views only differ in the query
+    if FAST_JSON_RESPONSES:
+        return trusted_docs(posts, LIVE_POST_DEFAULTS)
+    return [LivePost(**p) for p in posts]
+
+async def _feed_page(before: Optional[str], limit: int, full: bool, response: Optional[Response] = None, query: Optional[dict] = None):
+    query = dict(query or {})
+    if before:
+        query.update(keyset_before(before))
+    posts = await db.live_feed.find(query, _feed_projection(full)).sort(FEED_SORT_DESC).limit(limit).to_list(limit)
+    if response is not None and len(posts) == limit:
+        response.headers['X-Next-Cursor'] = encode_cursor(posts[-1]['created_at'], posts[-1]['id'])
+    if FAST_JSON_RESPONSES:
+        return fast_json_response(_feed_models(posts), response)
+    return _feed_models(posts)
+
+async def _feed_sync(since: Optional[str], limit: int, full: bool):
+    now = utcnow_ms()
+    c = decode_cursor(since) if since else None
+    projection = _feed_projection(full)
+    if c is None or c['d'] is None or c['d'] < now - timedelta(days=FEED_TOMBSTONE_RETENTION_DAYS):
+        # No cursor, or one older than the tombstones we keep: start from a fresh snapshot
+        posts = await db.live_feed.find({}, projection).sort(FEED_SORT_DESC).limit(limit).to_list(limit)
+        cursor = encode_cursor(posts[0]['created_at'], posts[0]['id'], now) if posts else encode_cursor(datetime(1970, 1, 1), '', now)
+        return _feed_sync_result(posts, [], cursor, False, c is not None)
+    overlap = timedelta(seconds=FEED_SYNC_OVERLAP_SECONDS)
+    query = {'$or': [{'created_at': {'$gt': c['c']}}, {'created_at': c['c'], 'id': {'$gt': c['i']}}]}
+    posts = await db.live_feed.find(query, projection).sort(FEED_SORT_ASC).limit(limit + 1).to_list(limit + 1)
+    has_more = len(posts) > limit
+    posts = posts[:limit]
+    tombstones = await db.live_feed_tombstones.find({'deleted_at': {'$gt': c['d']}}, {'_id': 0, 'id': 1, 'deleted_at': 1}).sort('deleted_at', 1).limit(FEED_SYNC_MAX_TOMBSTONES).to_list(FEED_SYNC_MAX_TOMBSTONES)
+    has_more = has_more or len(tombstones) == FEED_SYNC_MAX_TOMBSTONES
+    last = posts[-1] if posts else None
+    cursor = encode_cursor(
+        last['created_at'] if last else c['c'],
+        last['id'] if last else c['i'],
+        tombstones[-1]['deleted_at'] if tombstones else c['d'],
+    )
+    # Re-read the overlap window at or behind the cursor, as FeedTailer._poll does
+    # (disjoint from the reads above). The cursor itself only moves forward; clients
+    # apply posts and deletions by id, so rows they already have are harmless repeats.
+    behind = {'$or': [{'created_at': {'$gte': c['c'] - overlap, '$lt': c['c']}}, {'created_at': c['c'], 'id': {'$lte': c['i']}}]}
+    late_posts = await db.live_feed.find(behind, projection).sort(FEED_SORT_ASC).limit(limit).to_list(limit)
+    late_tombstones = await db.live_feed_tombstones.find({'deleted_at': {'$gte': c['d'] - overlap, '$lte': c['d']}}, {'_id': 0, 'id': 1}).limit(FEED_SYNC_MAX_TOMBSTONES).to_list(FEED_SYNC_MAX_TOMBSTONES)
+    posts = late_posts + posts
+    posts.reverse()
+    return _feed_sync_result(posts, [t['id'] for t in late_tombstones + tombstones], cursor, has_more, False)
+
+def _feed_sync_result(posts: list, deleted: List[str], cursor: str, has_more: bool, reset: bool):
+    result = {'posts': _feed_models(posts), 'deleted': deleted, 'cursor': cursor, 'has_more': has_more, 'reset': reset}
+    if FAST_JSON_RESPONSES:
+        return fast_json_response(result)
+    return LiveFeedSync(**result)
+
 @api.get('/live-feed', response_model=List[LivePost])
-async def get_live_feed_public():
-    await seed_live_feed_if_empty()
-    posts = await db.live_feed.find().sort('created_at', -1).limit(100).to_list(100)
-    sanitized = []
-    for p in posts:
-        p.pop('phone', None)
-        sanitized.append(LivePost(**p))
-    return sanitized
+async def get_live_feed_public(request: Request, response: Response, before: Optional[str] = None, limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_PAGE_SIZE), origin: Optional[str] = None, destination: Optional[str] = None):
+    query = _route_query(origin, destination)
+    # Same version, same query string: same body. Clients revalidate for the cost of a memo lookup.
+    version = await feed_version()
+    etag = '"' + hashlib.sha1(f'{version}?{request.url.query}'.encode()).hexdigest()[:24] + '"'
+    surrogate = f"live-feed live-feed:{query['route_keys']}" if query else 'live-feed'
+    headers = {'ETag': etag, 'Cache-Control': FEED_CACHE_CONTROL, 'Surrogate-Key': surrogate}
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return await _feed_page(before, limit, full=False, response=response, query=query)
 
 @api.get('/live-feed/full', response_model=List[LivePost])
-async def get_live_feed_full(current_user: User = Depends(get_current_user)):
-    if current_user.user_type not in ['mover', 'admin']:
-        return await get_live_feed_public()
-    posts = await db.live_feed.find().sort('created_at', -1).limit(100).to_list(100)
-    return [LivePost(**p) for p in posts]
+async def get_live_feed_full(response: Response, before: Optional[str] = None, limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_PAGE_SIZE), origin: Optional[str] = None, destination: Optional[str] = None, current_user: AuthClaims = Depends(get_current_claims)):
+    return await _feed_page(before, limit, full=current_user.user_type in ['mover', 'admin'], response=response, query=_route_query(origin, destination))
+
+def _route_query(origin: Optional[str], destination: Optional[str]) -> dict:
+    # origin/destination take gazetteer keys (istanbul/besiktas, istanbul/anadolu, istanbul) or place names
+    keys = []
+    for value in (origin, destination):
+        if value is None:
+            keys.append(None)
+            continue
+        key = location_key(value)
+        if key is None:
+            raise HTTPException(status_code=400, detail=f'Unknown location: {value}')
+        keys.append(key)
+    route_key = route_filter_key(*keys)
+    return {'route_keys': route_key} if route_key else {}
+
+def _search_query(q: str) -> dict:
+    terms = query_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail='Search needs at least one word of 2+ characters')
+    return {'search_tokens': terms[0]} if len(terms) == 1 else {'search_tokens': {'$all': terms}}
+
+@api.get('/live-feed/search', response_model=List[LivePost])
+async def search_live_feed_public(response: Response, q: str = Query(..., max_length=200), before: Optional[str] = None, limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_PAGE_SIZE), origin: Optional[str] = None, destination: Optional[str] = None):
+    return await _feed_page(before, limit, full=False, response=response, query={**_search_query(q), **_route_query(origin, destination)})
+
+@api.get('/live-feed/full/search', response_model=List[LivePost])
+async def search_live_feed_full(response: Response, q: str = Query(..., max_length=200), before: Optional[str] = None, limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_PAGE_SIZE), origin: Optional[str] = None, destination: Optional[str] = None, current_user: AuthClaims = Depends(get_current_claims)):
+    return await _feed_page(before, limit, full=current_user.user_type in ['mover', 'admin'], response=response, query={**_search_query(q), **_route_query(origin, destination)})
+
+@api.get('/locations')
+async def list_locations():
+    # The gazetteer behind origin/destination filters, for route pickers and subscriptions
+    return list(PLACES.values())
+
+@api.get('/live-feed/sync', response_model=LiveFeedSync)
+async def sync_live_feed_public(since: Optional[str] = None, limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_PAGE_SIZE)):
+    return await _feed_sync(since, limit, full=False)
+
+@api.get('/live-feed/full/sync', response_model=LiveFeedSync)
+async def sync_live_feed_full(since: Optional[str] = None, limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_PAGE_SIZE), current_user: AuthClaims = Depends(get_current_claims)):
+    return await _feed_sync(since, limit, full=current_user.user_type in ['mover', 'admin'])
 
 @api.delete('/admin/live-feed/{post_id}')
-async def delete_live_post(post_id: str, current_user: User = Depends(get_admin_user)):
+async def delete_live_post(post_id: str, current_user: AuthClaims = Depends(get_admin_user)):
     res = await db.live_feed.delete_one({'id': post_id})
     if res.deleted_count == 0:
         raise HTTPException(status_code=404, detail='Post not found')
+    # Tombstone so delta-sync clients (and other workers' tailers) learn about the removal
+    feed_tailer.mark_seen('delete', post_id)
+    await db.live_feed_tombstones.insert_one({'id': post_id, 'deleted_at': utcnow_ms()})
+    await bump_feed_deletions()
+    feed_broker.publish_delete(post_id)
     return {'message': 'Post deleted'}
 
+# Live feed streaming: new posts and deletions are pushed as they happen, so
+# open screens no longer need to poll. Public subscribers never see phone.
+def _feed_sse_response(request: Request, full: bool, route: dict) -> StreamingResponse:
+    sub = feed_broker.subscribe(full, route.get('route_keys'))
+    if sub is None:
+        raise HTTPException(status_code=503, detail='Too many live feed subscribers')
+
+    async def events():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                item = await sub.next_event(FEED_STREAM_KEEPALIVE_SECONDS)
+                if item is None:
+                    break
+                if item == '':
+                    if await request.is_disconnected():
+                        break
+                    yield ': keepalive\n\n'
+                    continue
+                yield f'data: {item}\n\n'
+        finally:
+            feed_broker.unsubscribe(sub)
+
+    return StreamingResponse(events(), media_type='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@api.get('/live-feed/stream')
+async def stream_live_feed_public(request: Request, origin: Optional[str] = None, destination: Optional[str] = None):
+    return _feed_sse_response(request, full=False, route=_route_query(origin, destination))
+
+@api.get('/live-feed/full/stream')
+async def stream_live_feed_full(request: Request, origin: Optional[str] = None, destination: Optional[str] = None, current_user: AuthClaims = Depends(get_current_claims)):
+    return _feed_sse_response(request, full=current_user.user_type in ['mover', 'admin'], route=_route_query(origin, destination))
+
+@api.websocket('/live-feed/ws')
+async def live_feed_ws(websocket: WebSocket, token: Optional[str] = None, origin: Optional[str] = None, destination: Optional[str] = None):
+    # Browsers cannot set headers on a WebSocket, so the full view takes the JWT as ?token=
+    try:
+        route = _route_query(origin, destination)
+    except HTTPException:
+        await websocket.close(code=4400)
+        return
+    full = False
+    if token:
+        try:
+            user = await claims_from_token(token)
+        except HTTPException:
+            await websocket.close(code=4401)
+            return
+        full = user.user_type in ['mover', 'admin']
+    sub = feed_broker.subscribe(full, route.get('route_keys'))
+    if sub is None:
+        await websocket.close(code=1013)
+        return
+    await websocket.accept()
+
+    async def watch_disconnect():
+        # Clients never send anything meaningful; this only notices them leaving
+        try:
+            while True:
+                await websocket.receive_text()
+        except (WebSocketDisconnect, RuntimeError):
+            feed_broker.unsubscribe(sub)
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        while True:
+            item = await sub.next_event(FEED_STREAM_KEEPALIVE_SECONDS)
+            if item is None:
+                # Dropped for falling behind, unless the client already left; it reconnects and refetches
+                if not watcher.done():
+                    await websocket.close(code=1013)
+                break
+            await asyncio.wait_for(websocket.send_text(item or '{"type": "ping"}'), FEED_STREAM_SEND_TIMEOUT_SECONDS)
+    except (WebSocketDisconnect, asyncio.TimeoutError, RuntimeError):
+        pass
+    finally:
+        watcher.cancel()
+        feed_broker.unsubscribe(sub)
+
+@api.get('/admin/live-feed/stream-stats')
+async def live_feed_stream_stats(current_user: AuthClaims = Depends(get_admin_user)):
+    return {**feed_broker.stats(), 'fanout': feed_tailer.stats()}
+
+# Live feed retention (runs as the prune_live_feed scheduler job)
+FEED_AGE_BUCKETS_DAYS = [1, 7, 30, 90, 365]
+
+async def _archive_posts(docs: list):
+    if FEED_ARCHIVE == 'collection':
+        try:
+            await db.live_feed_archive.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Duplicates are rows archived by a run that died before deleting them
+            if any(err.get('code') != 11000 for err in e.details.get('writeErrors', [])):
+                raise
+    elif FEED_ARCHIVE == 'ndjson':
+        await feed_archive.write(docs)
+    else:
+        # Never report a batch as archived (and then delete it) without writing it
+        raise ValueError(f'Unknown FEED_ARCHIVE {FEED_ARCHIVE!r}')
+
+async def prune_live_feed() -> dict:
+    if FEED_RETENTION_DAYS <= 0:
+        return {'removed': 0, 'archived': 0, 'cutoff': None}
+    cutoff = utcnow_ms() - timedelta(days=FEED_RETENTION_DAYS)
+    removed = archived = 0
+    while True:
+        # Oldest first on the (created_at, id) index; search tokens are derived data and not archived
+        docs = await db.live_feed.find({'created_at': {'$lt': cutoff}}, {'search_tokens': 0}).sort(FEED_SORT_ASC).limit(FEED_RETENTION_BATCH).to_list(FEED_RETENTION_BATCH)
+        if not docs:
+            break
+        if FEED_ARCHIVE:
+            await _archive_posts(docs)
+            archived += len(docs)
+        # Tombstones first, as delete_live_post does: delta-sync clients and other
+        # workers' tailers must learn these posts are gone
+        deleted_at = utcnow_ms()
+        ids = [d['id'] for d in docs]
+        await db.live_feed_tombstones.insert_many([{'id': i, 'deleted_at': deleted_at} for i in ids])
+        res = await db.live_feed.delete_many({'_id': {'$in': [d['_id'] for d in docs]}})
+        removed += res.deleted_count
+        for i in ids:
+            feed_tailer.mark_seen('delete', i)
+            feed_broker.publish_delete(i)
+    if removed:
+        await bump_feed_deletions(removed)
+    return {'removed': removed, 'archived': archived, 'cutoff': cutoff}
+
+async def feed_age_report() -> dict:
+    now = utcnow_ms()
+    edges = [now - timedelta(days=d) for d in FEED_AGE_BUCKETS_DAYS]
+    ranges = [({'$gte': edges[0]}, f'<{FEED_AGE_BUCKETS_DAYS[0]}d')]
+    ranges += [({'$lt': edges[i], '$gte': edges[i + 1]}, f'{FEED_AGE_BUCKETS_DAYS[i]}-{FEED_AGE_BUCKETS_DAYS[i + 1]}d') for i in range(len(edges) - 1)]
+    ranges.append(({'$lt': edges[-1]}, f'>{FEED_AGE_BUCKETS_DAYS[-1]}d'))
+    # Each bucket is a range count on the created_at index, never a collection scan
+    counts = await asyncio.gather(*(db.live_feed.count_documents({'created_at': r}) for r, _ in ranges))
+    oldest = await db.live_feed.find({}, {'_id': 0, 'created_at': 1}).sort(FEED_SORT_ASC).limit(1).to_list(1)
+    newest = await db.live_feed.find({}, {'_id': 0, 'created_at': 1}).sort(FEED_SORT_DESC).limit(1).to_list(1)
+    return {
+        'buckets': [{'age': label, 'count': n} for (_, label), n in zip(ranges, counts)],
+        'oldest': oldest[0]['created_at'] if oldest else None,
+        'newest': newest[0]['created_at'] if newest else None,
+    }
+
+@api.get('/admin/live-feed/retention')
+async def live_feed_retention_report(current_user: AuthClaims = Depends(get_admin_user)):
+    report = {
+        'retention_days': FEED_RETENTION_DAYS,
+        'archive': FEED_ARCHIVE or None,
+        'live_feed': {'count': await db.live_feed.estimated_document_count(), **await collection_sizes('live_feed')},
+        'age': await feed_age_report(),
+        'job': await scheduler.job_status('prune_live_feed'),
+    }
+    if FEED_ARCHIVE == 'collection':
+        report['archive_collection'] = {'count': await db.live_feed_archive.estimated_document_count(), **await collection_sizes('live_feed_archive')}
+    elif FEED_ARCHIVE == 'ndjson':
+        report['archive_files'] = feed_archive.stats()
+    return report
+
+@api.post('/admin/live-feed/retention/run')
+async def live_feed_retention_run(current_user: AuthClaims = Depends(get_admin_user)):
+    return await run_job_now('prune_live_feed')
+
+# Moving requests and bids
+MOVING_REQUESTS_PAGE_SIZE = 100
+KEYSET_SORT_DESC = {'created_at': -1, 'id': -1}
+
+def _with_bid_stats(query: dict, limit: int) -> list:
+    # One aggregation for the page: bid count and lowest bid per request come
+    # from a $lookup on the bids.request_id index instead of one query per row
+    return [
+        {'$match': query},
+        {'$sort': KEYSET_SORT_DESC},
+        {'$limit': limit},
+        {'$lookup': {'from': 'bids', 'localField': 'id', 'foreignField': 'request_id', 'as': 'bid_stats'}},
+        {'$addFields': {'bid_count': {'$size': '$bid_stats'}, 'lowest_bid': {'$min': '$bid_stats.price'}}},
+        {'$project': {'_id': 0, 'bid_stats': 0, 'route_keys': 0}},
+    ]
+
+async def _get_moving_request(request_id: str, projection: Optional[dict] = None) -> dict:
+    req = await db.moving_requests.find_one({'id': request_id}, projection or {'_id': 0})
+    if not req:
+        raise HTTPException(status_code=404, detail='Moving request not found')
+    return req
+
+@api.post('/moving-requests', response_model=MovingRequest)
+async def create_moving_request(body: MovingRequestCreate, current_user: User = Depends(get_current_user)):
+    if current_user.user_type != 'customer':
+        raise HTTPException(status_code=403, detail='Only customers can create moving requests')
+    route = route_fields(body.from_location, body.to_location)
+    mr = MovingRequest(customer_id=current_user.id, customer_name=current_user.name, created_at=utcnow_ms(), **body.dict(), **route)
+    await db.moving_requests.insert_one({**mr.dict(), 'route_keys': route['route_keys']})
+    return mr
+
+@api.get('/moving-requests', response_model=List[MovingRequestSummary])
+async def list_moving_requests(response: Response, before: Optional[str] = None, limit: int = Query(MOVING_REQUESTS_PAGE_SIZE, ge=1, le=MOVING_REQUESTS_PAGE_SIZE), origin: Optional[str] = None, destination: Optional[str] = None, current_user: AuthClaims = Depends(get_current_claims)):
+    # Customers see their own requests, admins everything (both with bid stats);
+    # movers see open requests only, without competitors' prices
+    query = _route_query(origin, destination)
+    if before:
+        query.update(keyset_before(before))
+    if current_user.user_type == 'mover':
+        query['status'] = 'pending'
+        items = await db.moving_requests.find(query, {'_id': 0, 'route_keys': 0}).sort(list(KEYSET_SORT_DESC.items())).limit(limit).to_list(limit)
+    else:
+        if current_user.user_type != 'admin':
+            query['customer_id'] = current_user.id
+        items = await db.moving_requests.aggregate(_with_bid_stats(query, limit)).to_list(limit)
+    if len(items) == limit:
+        response.headers['X-Next-Cursor'] = encode_cursor(items[-1]['created_at'], items[-1]['id'])
+    return items
+
+@api.post('/moving-requests/{request_id}/bids', response_model=Bid)
+async def create_bid(request_id: str, body: BidCreate, current_user: User = Depends(get_current_user),
+                     idempotency_key: Optional[str] = Header(None, alias='Idempotency-Key')):
+    return await idempotent(idempotency_key, f'bids:{current_user.id}:{request_id}', body.dict(), lambda: _create_bid(request_id, body, current_user))
+
+async def _create_bid(request_id: str, body: BidCreate, current_user: User):
+    if current_user.user_type != 'mover':
+        raise HTTPException(status_code=403, detail='Only movers can place bids')
+    req = await _get_moving_request(request_id, {'_id': 0, 'status': 1})
+    if req.get('status') != 'pending':
+        raise HTTPException(status_code=400, detail='Moving request is no longer open')
+    bid = Bid(request_id=request_id, mover_id=current_user.id, mover_name=current_user.name,
+              company_name=current_user.company_name or '', price=body.price, message=body.message, created_at=utcnow_ms())
+    try:
+        await db.bids.insert_one(bid.dict())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail='You already placed a bid on this request')
+    # accept_bid closes the request before settling its bids, so a bid inserted after
+    # that settle would stay pending on a closed request. Still pending here means any
+    # acceptance has yet to settle and will include this bid.
+    req = await _get_moving_request(request_id, {'_id': 0, 'status': 1, 'selected_mover_id': 1})
+    if req.get('status') != 'pending' and req.get('selected_mover_id') != current_user.id:
+        res = await db.bids.delete_one({'id': bid.id, 'status': 'pending'})
+        if res.deleted_count:
+            raise HTTPException(status_code=400, detail='Moving request is no longer open')
+        bid.status = 'rejected'  # settled by the acceptance in the meantime
+    return bid
+
+@api.get('/moving-requests/{request_id}/bids', response_model=List[Bid])
+async def list_request_bids(request_id: str, current_user: AuthClaims = Depends(get_current_claims)):
+    req = await _get_moving_request(request_id, {'_id': 0, 'customer_id': 1})
+    query = {'request_id': request_id}
+    if current_user.user_type == 'mover':
+        query['mover_id'] = current_user.id
+    elif current_user.user_type != 'admin' and req.get('customer_id') != current_user.id:
+        raise HTTPException(status_code=403, detail='Not allowed to view these bids')
+    return await db.bids.find(query, {'_id': 0}).sort('price', 1).to_list(1000)
+
+@api.get('/bids/mine', response_model=List[Bid])
+async def list_my_bids(response: Response, before: Optional[str] = None, limit: int = Query(MOVING_REQUESTS_PAGE_SIZE, ge=1, le=MOVING_REQUESTS_PAGE_SIZE), current_user: AuthClaims = Depends(get_current_claims)):
+    if current_user.user_type != 'mover':
+        raise HTTPException(status_code=403, detail='Only movers have bids')
+    query = keyset_before(before) if before else {}
+    query['mover_id'] = current_user.id
+    items = await db.bids.find(query, {'_id': 0}).sort(list(KEYSET_SORT_DESC.items())).limit(limit).to_list(limit)
+    if len(items) == limit:
+        response.headers['X-Next-Cursor'] = encode_cursor(items[-1]['created_at'], items[-1]['id'])
+    return items
+
+@api.post('/bids/{bid_id}/accept')
+async def accept_bid(bid_id: str, current_user: AuthClaims = Depends(get_current_claims)):
+    bid = await db.bids.find_one({'id': bid_id}, {'_id': 0, 'request_id': 1, 'mover_id': 1})
+    if not bid:
+        raise HTTPException(status_code=404, detail='Bid not found')
+    req = await _get_moving_request(bid['request_id'], {'_id': 0, 'customer_id': 1})
+    if req.get('customer_id') != current_user.id:
+        raise HTTPException(status_code=403, detail='Only the request owner can accept bids')
+    # The status guard makes acceptance single-winner even under concurrent clicks
+    won = await db.moving_requests.find_one_and_update(
+        {'id': bid['request_id'], 'status': 'pending'},
+        {'$set': {'status': 'accepted', 'selected_mover_id': bid['mover_id']}},
+        projection={'_id': 0, 'id': 1},
+    )
+    if not won:
+        raise HTTPException(status_code=400, detail='A bid was already accepted for this request')
+    # One pipeline update settles every bid on the request: the winner accepted, the rest rejected
+    await db.bids.update_many({'request_id': bid['request_id']}, [
+        {'$set': {'status': {'$cond': [{'$eq': ['$id', bid_id]}, 'accepted', 'rejected']}}},
+    ])
+    return {'message': 'Bid accepted'}
+
+@api.delete('/admin/delete-request/{request_id}')
+async def admin_delete_request(request_id: str, current_user: AuthClaims = Depends(get_admin_user)):
+    res = await db.moving_requests.delete_one({'id': request_id})
+    if res.deleted_count == 0:
+        raise HTTPException(status_code=404, detail='Moving request not found')
+    await db.bids.delete_many({'request_id': request_id})
+    return {'message': 'Moving request deleted'}
+
 # Admin endpoints
 class UpdateRoleBody(BaseModel):
     role: str
@@ -366,45 +1443,370 @@ class UpdateRoleBody(BaseModel):
 class BanBody(BaseModel):
     ban_days: int
 
-@api.get('/admin/users', response_model=List[User])
-async def admin_users(current_user: User = Depends(get_admin_user)):
-    items = await db.users.find().to_list(1000)
-    return [User(**i) for i in items]
+# Admin user listing: filtered server-side, keyset-paged on id and projected
+# to what the panel shows (never hashes or verification codes)
+class AdminUserView(BaseModel):
+    id: str
+    name: str
+    email: str
+    phone: str
+    user_type: str
+    is_active: bool = True
+    is_email_verified: bool = False
+    is_phone_verified: bool = False
+    is_approved: bool = False
+    company_name: Optional[str] = None
+    created_at: Optional[datetime] = None
+    banned_until: Optional[datetime] = None
+
+ADMIN_USER_FIELDS = list(AdminUserView.model_fields)
+ADMIN_USER_PROJECTION = {'_id': 0, **{f: 1 for f in ADMIN_USER_FIELDS}}
+ADMIN_USER_DEFAULTS = model_defaults(AdminUserView)
+ADMIN_USERS_PAGE_MAX = 1000
+ADMIN_USERS_EXPORT_BATCH = 1000
+
+def _admin_users_query(user_type: Optional[str], is_approved: Optional[bool], is_active: Optional[bool], q: Optional[str]) -> dict:
+    query = {}
+    if user_type:
+        query['user_type'] = user_type
+    if is_approved is not None:
+        query['is_approved'] = is_approved
+    if is_active is not None:
+        query['is_active'] = is_active
+    if q:
+        # Anchored, case-sensitive prefix: each $or branch is a bounded scan
+        # of its own index (email, name), so neither falls back to a COLLSCAN
+        prefix = {'$regex': '^' + re.escape(q)}
+        query['$or'] = [{'email': prefix}, {'name': prefix}]
+    return query
+
+def _export_value(v):
+    return v.isoformat() if isinstance(v, datetime) else v
+
+async def _admin_users_export(query: dict, fmt: str):
+    # Writes rows as the cursor yields them; memory stays flat at one batch
+    cursor = db.users.find(query, ADMIN_USER_PROJECTION).sort('id', 1).batch_size(ADMIN_USERS_EXPORT_BATCH)
+    if fmt == 'csv':
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=ADMIN_USER_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        yield buf.getvalue()
+        async for doc in cursor:
+            buf.seek(0); buf.truncate()
+            writer.writerow({k: _export_value(v) for k, v in doc.items()})
+            yield buf.getvalue()
+        return
+    async for doc in cursor:
+        yield json.dumps({k: _export_value(v) for k, v in doc.items()}, ensure_ascii=False) + '\n'
+
+@api.get('/admin/users', response_model=List[AdminUserView])
+async def admin_users(
+    response: Response,
+    user_type: Optional[str] = None,
+    is_approved: Optional[bool] = None,
+    is_active: Optional[bool] = None,
+    q: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(ADMIN_USERS_PAGE_MAX, ge=1, le=ADMIN_USERS_PAGE_MAX),
+    export: Optional[str] = Query(None, pattern='^(ndjson|csv)$'),
+    current_user: AuthClaims = Depends(get_admin_user),
+):
+    query = _admin_users_query(user_type, is_approved, is_active, q)
+    if export:
+        media_type = 'text/csv' if export == 'csv' else 'application/x-ndjson'
+        return StreamingResponse(_admin_users_export(query, export), media_type=media_type,
+                                 headers={'Content-Disposition': f'attachment; filename=users.{export}'})
+    if after:
+        query['id'] = {'$gt': after}
+    items = await db.users.find(query, ADMIN_USER_PROJECTION).sort('id', 1).limit(limit).to_list(limit)
+    if len(items) == limit:
+        response.headers['X-Next-Cursor'] = items[-1]['id']
+    if FAST_JSON_RESPONSES:
+        return fast_json_response(trusted_docs(items, ADMIN_USER_DEFAULTS), response)
+    return items
 
 @api.post('/admin/update-user-role/{user_email}')
-async def update_user_role(user_email: str, body: UpdateRoleBody, current_user: User = Depends(get_admin_user)):
+async def update_user_role(user_email: str, body: UpdateRoleBody, current_user: AuthClaims = Depends(get_admin_user)):
     if body.role not in ['customer', 'mover', 'admin', 'moderator']:
         raise HTTPException(status_code=400, detail='Invalid role')
-    res = await db.users.update_one({'email': user_email}, {'$set': {'user_type': body.role}})
+    res = await db.users.update_one({'email': user_email}, auth_change({'$set': {'user_type': body.role}}))
     if res.matched_count == 0:
         raise HTTPException(status_code=404, detail='User not found')
+    user_cache.invalidate_email(user_email)
+    await token_versions.refresh()
     return {'message': 'Role updated'}
 
 @api.post('/admin/ban-user/{user_email}')
-async def ban_user(user_email: str, body: BanBody, current_user: User = Depends(get_admin_user)):
+async def ban_user(user_email: str, body: BanBody, current_user: AuthClaims = Depends(get_admin_user)):
     until = datetime.utcnow() + timedelta(days=body.ban_days)
-    res = await db.users.update_one({'email': user_email}, {'$set': {'is_active': False, 'banned_until': until}})
+    res = await db.users.update_one({'email': user_email}, auth_change({'$set': {'is_active': False, 'banned_until': until}}))
     if res.matched_count == 0:
         raise HTTPException(status_code=404, detail='User not found')
+    user_cache.invalidate_email(user_email)
+    await token_versions.refresh()
     return {'message': f'Banned {body.ban_days} days'}
 
 @api.post('/admin/unban-user/{user_email}')
-async def unban_user(user_email: str, current_user: User = Depends(get_admin_user)):
-    res = await db.users.update_one({'email': user_email}, {'$set': {'is_active': True}, '$unset': {'banned_until': ''}})
+async def unban_user(user_email: str, current_user: AuthClaims = Depends(get_admin_user)):
+    res = await db.users.update_one({'email': user_email}, auth_change({'$set': {'is_active': True}, '$unset': {'banned_until': ''}}))
     if res.matched_count == 0:
         raise HTTPException(status_code=404, detail='User not found')
+    user_cache.invalidate_email(user_email)
+    await token_versions.refresh()
     return {'message': 'Unbanned'}
 
 @api.post('/admin/approve-mover/{mover_id}')
-async def approve_mover(mover_id: str, current_user: User = Depends(get_admin_user)):
+async def approve_mover(mover_id: str, current_user: AuthClaims = Depends(get_admin_user)):
     res = await db.users.update_one({'id': mover_id, 'user_type': 'mover'}, {'$set': {'is_approved': True}})
     if res.matched_count == 0:
         raise HTTPException(status_code=404, detail='Mover not found')
+    user_cache.invalidate(mover_id)
     return {'message': 'Mover approved'}
 
+# Readiness (distinct from nginx's static /health): OK only once startup has
+# finished, the DB answers a ping and every registered index is in place
+@api.get('/ready')
+async def ready(response: Response):
+    checks = {'startup': startup_complete, 'indexes': bool(index_status) and all(v == 'ok' for v in index_status.values())}
+    try:
+        await client.admin.command('ping')
+        checks['db'] = True
+    except Exception:
+        checks['db'] = False
+    ok = all(checks.values())
+    if not ok:
+        response.status_code = 503
+    return {'status': 'ready' if ok else 'not ready', 'checks': checks}
+
+@api.get('/admin/db-report')
+async def admin_db_report(current_user: AuthClaims = Depends(get_admin_user)):
+    return {'ensure': index_status, 'collections': await index_report()}
+
+@api.get('/admin/slow-queries')
+async def admin_slow_queries(limit: int = Query(100, ge=1, le=500), current_user: AuthClaims = Depends(get_admin_user)):
+    return slow_queries.report(limit)
+
+@api.get('/admin/cache-stats')
+async def admin_cache_stats(current_user: AuthClaims = Depends(get_admin_user)):
+    return {'users': user_cache.stats()}
+
+@api.get('/admin/hash-stats')
+async def admin_hash_stats(current_user: AuthClaims = Depends(get_admin_user)):
+    return hash_pool.stats()
+
+@api.get('/admin/auth-stats')
+async def admin_auth_stats(current_user: AuthClaims = Depends(get_admin_user)):
+    return token_versions.stats()
+
+# Admin dashboard figures. Each number is a count over an index range (a
+# handful per role, one per day, one per request status), never a scan of the
+# users or requests, and the snapshot is shared for ADMIN_STATS_TTL_SECONDS so
+# a busy panel costs at most one refresh per TTL per worker.
+ADMIN_STATS_TTL_SECONDS = float(os.environ.get('ADMIN_STATS_TTL_SECONDS', '10'))
+ADMIN_STATS_DAYS = 14
+USER_ROLES = ['customer', 'mover', 'admin', 'moderator']
+_admin_stats = {'value': None, 'expires': 0.0}
+_admin_stats_lock = asyncio.Lock()
+
+async def _role_counts(role: str) -> dict:
+    total, unapproved, banned = await asyncio.gather(
+        db.users.count_documents({'user_type': role}),
+        db.users.count_documents({'user_type': role, 'is_approved': False}),
+        db.users.count_documents({'user_type': role, 'is_active': False}),
+    )
+    return {'total': total, 'approved': total - unapproved, 'unapproved': unapproved, 'active': total - banned, 'banned': banned}
+
+async def _posts_per_day() -> list:
+    today = utcnow_ms().replace(hour=0, minute=0, second=0, microsecond=0)
+    days = [today - timedelta(days=i) for i in range(ADMIN_STATS_DAYS)]
+    counts = await asyncio.gather(*(db.live_feed.count_documents({'created_at': {'$gte': d, '$lt': d + timedelta(days=1)}}) for d in days))
+    return [{'date': d.date().isoformat(), 'count': n} for d, n in zip(days, counts)]
+
+async def _request_status_counts() -> dict:
+    statuses = await db.moving_requests.distinct('status')
+    counts = await asyncio.gather(*(db.moving_requests.count_documents({'status': st}) for st in statuses))
+    return dict(zip(statuses, counts))
+
+async def admin_stats_snapshot() -> dict:
+    roles = await asyncio.gather(*(_role_counts(r) for r in USER_ROLES))
+    by_role = dict(zip(USER_ROLES, roles))
+    posts_per_day, requests_by_status = await asyncio.gather(_posts_per_day(), _request_status_counts())
+    return {
+        'users': {
+            'total': sum(r['total'] for r in roles),
+            'banned': sum(r['banned'] for r in roles),
+            'by_role': by_role,
+        },
+        'pending_mover_approvals': by_role['mover']['unapproved'],
+        'live_feed': {'total': await db.live_feed.estimated_document_count(), 'posts_per_day': posts_per_day},
+        'moving_requests': {'total': sum(requests_by_status.values()), 'by_status': requests_by_status},
+        'generated_at': utcnow_ms(),
+    }
+
+@api.get('/admin/stats')
+async def admin_stats(fresh: bool = False, current_user: AuthClaims = Depends(get_admin_user)):
+    if fresh or _admin_stats['expires'] <= time.monotonic():
+        # One refresh at a time; concurrent loads reuse its result
+        async with _admin_stats_lock:
+            if fresh or _admin_stats['expires'] <= time.monotonic():
+                _admin_stats['value'] = await admin_stats_snapshot()
+                _admin_stats['expires'] = time.monotonic() + ADMIN_STATS_TTL_SECONDS
+    return _admin_stats['value']
+
+@api.get('/admin/idempotency-stats')
+async def admin_idempotency_stats(current_user: AuthClaims = Depends(get_admin_user)):
+    return idempotency_store.stats()
+
+# On-demand sampling profiler (per worker; check worker_pid when behind a
+# multi-worker server). Output is collapsed stacks: flamegraph.pl or speedscope.
+PROFILER_INTERVAL_MS = float(os.environ.get('PROFILER_INTERVAL_MS', '5'))
+profiler = SamplingProfiler(interval_seconds=PROFILER_INTERVAL_MS / 1000, worker_thread_prefixes=('pwhash',))
+
+class ProfileRequestsBody(BaseModel):
+    sample_percent: float = Field(10.0, gt=0, le=100)
+    # Exact path such as /api/login, or a prefix ending in '*'
+    path: Optional[str] = None
+    # Stops by itself after this long; None runs until /admin/profiler/stop
+    seconds: Optional[float] = Field(300.0, gt=0, le=3600)
+
+def _profiler_status() -> dict:
+    return {'worker_pid': os.getpid(), **profiler.status()}
+
+@api.get('/admin/profiler')
+async def admin_profiler_status(current_user: AuthClaims = Depends(get_admin_user)):
+    return _profiler_status()
+
+@api.post('/admin/profiler/requests')
+async def admin_profile_requests(body: ProfileRequestsBody, current_user: AuthClaims = Depends(get_admin_user)):
+    try:
+        profiler.start_requests(body.sample_percent, body.path, body.seconds)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _profiler_status()
+
+@api.post('/admin/profiler/process')
+async def admin_profile_process(seconds: float = Query(10, gt=0, le=MAX_PROCESS_SECONDS), current_user: AuthClaims = Depends(get_admin_user)):
+    try:
+        await profiler.profile_process(seconds)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _profiler_status()
+
+@api.post('/admin/profiler/stop')
+async def admin_profiler_stop(current_user: AuthClaims = Depends(get_admin_user)):
+    profiler.stop()
+    return _profiler_status()
+
+@api.get('/admin/profiler/collapsed')
+async def admin_profiler_collapsed(current_user: AuthClaims = Depends(get_admin_user)):
+    if profiler.last_result is None:
+        raise HTTPException(status_code=404, detail='No finished profile')
+    filename = f"profile-{profiler.last_result['mode']}-{os.getpid()}-{int(profiler.last_result['started_at'])}.folded"
+    return PlainTextResponse(profiler.collapsed(), headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+# Scheduled maintenance: one leader across workers (Mongo lease) runs these
+# idempotent batch jobs; admins can list them and trigger a run on demand
+SCHEDULER_ENABLED = env_flag('SCHEDULER_ENABLED', '1')
+SCHEDULER_LEASE_SECONDS = float(os.environ.get('SCHEDULER_LEASE_SECONDS', '30'))
+SCHEDULER_TICK_SECONDS = float(os.environ.get('SCHEDULER_TICK_SECONDS', '5'))
+UNVERIFIED_USER_RETENTION_DAYS = int(os.environ.get('UNVERIFIED_USER_RETENTION_DAYS', '7'))
+JOB_BATCH_SIZE = 1000
+
+async def unban_expired_users() -> dict:
+    res = await db.users.update_many({'is_active': False, 'banned_until': {'$lte': utcnow_ms()}},
+                                     auth_change({'$set': {'is_active': True}, '$unset': {'banned_until': ''}}))
+    if res.modified_count:
+        # Ids are not known here; a rare full clear beats a per-user lookup
+        user_cache.clear()
+        await token_versions.refresh()
+    return {'unbanned': res.modified_count}
+
+async def purge_unverified_users() -> dict:
+    cutoff = utcnow_ms() - timedelta(days=UNVERIFIED_USER_RETENTION_DAYS)
+    query = {'is_email_verified': False, 'created_at': {'$lt': cutoff}, 'user_type': {'$ne': 'admin'}}
+    removed = 0
+    while True:
+        ids = [u['id'] for u in await db.users.find(query, {'_id': 0, 'id': 1}).limit(JOB_BATCH_SIZE).to_list(JOB_BATCH_SIZE)]
+        if not ids:
+            break
+        res = await db.users.delete_many({**query, 'id': {'$in': ids}})
+        removed += res.deleted_count
+    return {'removed': removed, 'cutoff': cutoff}
+
+job_seconds = metrics_registry.histogram('scheduler_job_seconds', 'Scheduled job run time', ('job',))
+job_runs = metrics_registry.counter('scheduler_job_runs_total', 'Scheduled job runs by outcome', ('job', 'status'))
+
+def _observe_job(name: str, seconds: float, ok: bool):
+    job_seconds.observe(name, value=seconds)
+    job_runs.inc(name, 'ok' if ok else 'error')
+
+scheduler = Scheduler([
+    Job('unban_expired_users', unban_expired_users, 300, 'Reactivate users whose banned_until has passed'),
+    Job('purge_unverified_users', purge_unverified_users, 3600, f'Delete registrations left unverified for {UNVERIFIED_USER_RETENTION_DAYS} days'),
+    Job('prune_live_feed', prune_live_feed, FEED_RETENTION_INTERVAL_SECONDS, 'Archive and remove posts past FEED_RETENTION_DAYS'),
+], lease_seconds=SCHEDULER_LEASE_SECONDS, tick_seconds=SCHEDULER_TICK_SECONDS, observer=_observe_job)
+
+@api.get('/admin/jobs')
+async def admin_jobs(current_user: AuthClaims = Depends(get_admin_user)):
+    return await scheduler.status()
+
+@api.post('/admin/jobs/{name}/run')
+async def admin_run_job(name: str, current_user: AuthClaims = Depends(get_admin_user)):
+    if name not in scheduler.jobs:
+        raise HTTPException(status_code=404, detail='Job not found')
+    return await run_job_now(name)
+
+async def run_job_now(name: str) -> dict:
+    try:
+        return await scheduler.run_job(name, trigger='admin')
+    except JobAlreadyRunning:
+        raise HTTPException(status_code=409, detail=f'Job {name} is already running')
+
 # Mount router
 app.include_router(api)
 
+# Metrics: outside /api so nginx never proxies it; set METRICS_TOKEN to require a bearer token
+metrics_gauges = {
+    'hash_pool_in_flight': metrics_registry.gauge('hash_pool_in_flight', 'Hash jobs running or queued'),
+    'hash_pool_queue_depth': metrics_registry.gauge('hash_pool_queue_depth', 'Hash jobs waiting for a thread'),
+    'hash_pool_rejected': metrics_registry.gauge('hash_pool_rejected', 'Hash jobs rejected with 503 since start'),
+    'user_cache_entries': metrics_registry.gauge('user_cache_entries', 'Users held in the auth cache'),
+    'user_cache_hits': metrics_registry.gauge('user_cache_hits', 'Auth cache hits since start'),
+    'user_cache_misses': metrics_registry.gauge('user_cache_misses', 'Auth cache misses since start'),
+    'live_feed_subscribers': metrics_registry.gauge('live_feed_subscribers', 'Open live feed streams'),
+    'live_feed_dropped_subscribers': metrics_registry.gauge('live_feed_dropped_subscribers', 'Streams dropped for falling behind'),
+    'scheduler_is_leader': metrics_registry.gauge('scheduler_is_leader', '1 on the worker holding the scheduler lease'),
+    'idempotent_replays': metrics_registry.gauge('idempotent_replays', 'Idempotency-Key requests answered from a stored response'),
+}
+
+def _collect_component_metrics():
+    values = {
+        'hash_pool_in_flight': hash_pool.in_flight,
+        'hash_pool_queue_depth': hash_pool.queue_depth,
+        'hash_pool_rejected': hash_pool.rejected,
+        'user_cache_entries': user_cache.stats()['size'],
+        'user_cache_hits': user_cache.hits,
+        'user_cache_misses': user_cache.misses,
+        'live_feed_subscribers': len(feed_broker.subscribers),
+        'live_feed_dropped_subscribers': feed_broker.dropped,
+        'scheduler_is_leader': int(scheduler.is_leader),
+        'idempotent_replays': idempotency_store.replayed,
+    }
+    for name, value in values.items():
+        metrics_gauges[name].set(value=value)
+
+metrics_registry.add_collector(_collect_component_metrics)
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics(request: Request):
+    if METRICS_TOKEN and request.headers.get('authorization') != f'Bearer {METRICS_TOKEN}':
+        raise HTTPException(status_code=403, detail='Forbidden')
+    return PlainTextResponse(metrics_registry.render(), media_type='text/plain; version=0.0.4')
+
+# Innermost, so sampled stacks start at the app rather than the metrics wrapper
+app.add_middleware(ProfilerMiddleware, profiler=profiler)
+app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -412,14 +1814,31 @@ app.add_middleware(
     allow_methods=['*'],
     allow_headers=['*'],
     allow_credentials=True,
+    # Paged lists return their next cursor in a header the browser must be allowed to read
+    expose_headers=['X-Next-Cursor', 'ETag'],
 )
 
 @app.on_event('startup')
 async def startup_seed():
-    await seed_sample_mover_if_missing()
-    await seed_sample_customer_if_missing()
-    await seed_live_feed_if_empty()
+    global startup_complete
+    slow_queries.bind(asyncio.get_running_loop(), explain_command)
+    await ensure_indexes()
+    if SEED_DEMO_DATA:
+        await seed_demo_data()
+    await token_versions.refresh()
+    token_versions.start()
+    feed_tailer.start(db, {**LIVE_POST_PROJECTION_FULL, 'route_keys': 1})
+    scheduler.bind(db)
+    idempotency_store.bind(db.idempotency_keys)
+    if SCHEDULER_ENABLED:
+        scheduler.start()
+    startup_complete = True
 
 @app.on_event('shutdown')
 async def shutdown_db():
-    client.close()
\ No newline at end of file
+    await scheduler.stop()
+    token_versions.stop()
+    feed_tailer.stop()
+    profiler.stop()
+    client.close()
+    hash_pool.shutdown()
\ No newline at end of file
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from pymongo import monitoring
+
+
+# Slow-operation recorder fed by PyMongo command monitoring. Commands over the
+# threshold are kept (values redacted) in a bounded ring buffer; the first time
+# a query shape is seen, an executionStats explain runs in the background so
+# the report shows whether it was a COLLSCAN or which index served it.
+
+TRACKED_COMMANDS = {'find', 'count', 'aggregate', 'distinct', 'update', 'delete', 'findAndModify'}
+DRIVER_FIELDS = {'lsid', 'txnNumber', 'writeConcern', 'readConcern', 'startTransaction', 'autocommit',
+                 'apiVersion', 'apiStrict', 'apiDeprecationErrors', 'maxTimeMS', 'comment'}
+
+
+def redact(value):
+    # Keep keys and operators, replace every literal with '?'
+    if isinstance(value, dict):
+        return {k: redact(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(not isinstance(v, (dict, list, tuple)) for v in value):
+            return ['?']
+        return [redact(v) for v in value]
+    return '?'
+
+
+def command_shape(name: str, cmd: dict) -> dict:
+    if name == 'find':
+        return {k: redact(cmd[k]) if k == 'filter' else cmd[k] for k in ('filter', 'sort', 'projection') if k in cmd}
+    if name in ('count', 'distinct', 'findAndModify'):
+        shape = {'query': redact(cmd.get('query', {}))}
+        if 'sort' in cmd:
+            shape['sort'] = cmd['sort']
+        return shape
+    if name == 'aggregate':
+        return {'pipeline': redact(cmd.get('pipeline', []))}
+    if name == 'update':
+        return {'updates': [{'q': redact(u.get('q', {})), 'multi': u.get('multi', False)} for u in cmd.get('updates', [])[:1]]}
+    if name == 'delete':
+        return {'deletes': [{'q': redact(d.get('q', {}))} for d in cmd.get('deletes', [])[:1]]}
+    return {}
+
+
+def plan_summary(explain: dict) -> dict:
+    stages, indexes = [], []
+
+    def walk(stage):
+        if not isinstance(stage, dict):
+            return
+        name = stage.get('stage')
+        if name:
+            stages.append(name)
+        if stage.get('indexName'):
+            indexes.append(stage['indexName'])
+        for key in ('inputStage', 'queryPlan'):
+            walk(stage.get(key))
+        for child in stage.get('inputStages', []):
+            walk(child)
+
+    planner = explain.get('queryPlanner') or (explain.get('stages') or [{}])[0].get('$cursor', {}).get('queryPlanner', {})
+    walk(planner.get('winningPlan', {}))
+    stats = explain.get('executionStats') or (explain.get('stages') or [{}])[0].get('$cursor', {}).get('executionStats', {})
+    return {
+        'stages': stages,
+        'indexes': indexes,
+        'collscan': 'COLLSCAN' in stages,
+        'docs_examined': stats.get('totalDocsExamined'),
+        'keys_examined': stats.get('totalKeysExamined'),
+        'returned': stats.get('nReturned'),
+        'execution_ms': stats.get('executionTimeMillis'),
+    }
+
+
+class SlowQueryRecorder(monitoring.CommandListener):
+    def __init__(self, threshold_ms: float = 100.0, capacity: int = 500, max_shapes: int = 1000):
+        self.threshold_ms = threshold_ms
+        self.recent = deque(maxlen=capacity)
+        self.shapes: 'OrderedDict[str, dict]' = OrderedDict()
+        self.max_shapes = max_shapes
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._explain: Optional[Callable[[str, dict], Awaitable[dict]]] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop, explain: Callable[[str, dict], Awaitable[dict]]):
+        # explain(db_name, explain_target) runs the explain command; set once the loop is running
+        self._loop = loop
+        self._explain = explain
+
+    def started(self, event):
+        if event.command_name not in TRACKED_COMMANDS:
+            return
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (event.command, event.database_name)
+
+    def _finish(self, event, ok: bool):
+        with self._lock:
+            entry = self._pending.pop((event.connection_id, event.request_id), None)
+        if entry is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+        cmd, database = entry
+        name = event.command_name
+        collection = cmd.get(name) if isinstance(cmd.get(name), str) else ''
+        shape = command_shape(name, cmd)
+        key = f'{collection}.{name}:{json.dumps(shape, sort_keys=True, default=str)}'
+        self.recent.append({
+            'at': datetime.utcnow().isoformat(),
+            'collection': collection,
+            'command': name,
+            'duration_ms': round(duration_ms, 3),
+            'ok': ok,
+            'shape': shape,
+        })
+        with self._lock:
+            known = self.shapes.get(key)
+            if known is None:
+                known = self.shapes[key] = {'collection': collection, 'command': name, 'shape': shape,
+                                            'count': 0, 'max_ms': 0.0, 'total_ms': 0.0, 'plan': None}
+                while len(self.shapes) > self.max_shapes:
+                    self.shapes.popitem(last=False)
+                new_shape = True
+            else:
+                new_shape = False
+            known['count'] += 1
+            known['total_ms'] += duration_ms
+            known['max_ms'] = max(known['max_ms'], duration_ms)
+            known['last_at'] = datetime.utcnow().isoformat()
+        if new_shape and self._loop is not None and self._explain is not None:
+            target = {k: v for k, v in cmd.items() if k not in DRIVER_FIELDS and not k.startswith('$')}
+            self._loop.call_soon_threadsafe(self._schedule_explain, known, database, target)
+
+    def _schedule_explain(self, known: dict, database: str, target: dict):
+        async def run():
+            try:
+                known['plan'] = plan_summary(await self._explain(database, target))
+            except Exception as e:
+                known['plan'] = {'error': str(e)}
+        asyncio.ensure_future(run())
+
+    def succeeded(self, event):
+        self._finish(event, True)
+
+    def failed(self, event):
+        self._finish(event, False)
+
+    def report(self, limit: int = 100) -> dict:
+        with self._lock:
+            shapes = [dict(v, avg_ms=round(v['total_ms'] / v['count'], 3)) for v in self.shapes.values()]
+        shapes.sort(key=lambda v: v['total_ms'], reverse=True)
+        return {
+            'threshold_ms': self.threshold_ms,
+            'recent': list(self.recent)[-limit:][::-1],
+            'shapes': shapes[:limit],
+        }
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger('token_versions')
+
+
+# Revocation table for claims-based auth. Access tokens carry the user's role
+# and token_version; anything that must revoke them (ban, role change) bumps
+# token_version and stamps auth_changed_at. Each worker polls for users changed
+# since its last refresh, so a revocation made on any worker takes effect
+# everywhere within one refresh interval without a per-request user lookup.
+#
+# Only changes inside the access-token lifetime matter: a token issued before
+# an older change has already expired, so entries past that window are pruned.
+
+class TokenVersionTable:
+    def __init__(self, fetch_changes: Callable[[datetime], Awaitable[List[dict]]],
+                 window_seconds: float, interval_seconds: float = 5.0, overlap_seconds: float = 5.0):
+        # fetch_changes(since) returns user docs with id, token_version, user_type, is_active, auth_changed_at
+        self.fetch_changes = fetch_changes
+        self.window_seconds = window_seconds
+        self.interval_seconds = interval_seconds
+        # Re-read a little behind the newest change seen, for writes stamped by slightly slower clocks
+        self.overlap_seconds = overlap_seconds
+        self._entries: Dict[str, dict] = {}
+        self._since: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.last_refresh_at: Optional[float] = None
+
+    async def refresh(self):
+        now = datetime.utcnow()
+        horizon = now - timedelta(seconds=self.window_seconds)
+        since = max(self._since - timedelta(seconds=self.overlap_seconds), horizon) if self._since else horizon
+        for doc in await self.fetch_changes(since):
+            changed_at = doc.get('auth_changed_at') or now
+            self._entries[doc['id']] = {
+                'version': doc.get('token_version', 0),
+                'role': doc.get('user_type'),
+                'active': doc.get('is_active', True),
+                'changed_at': changed_at,
+            }
+            if self._since is None or changed_at > self._since:
+                self._since = changed_at
+        if self._since is None:
+            self._since = horizon
+        for uid in [uid for uid, e in self._entries.items() if e['changed_at'] < horizon]:
+            del self._entries[uid]
+        self.refreshes += 1
+        self.last_refresh_at = time.time()
+
+    def is_revoked(self, user_id: str, version: int, role: Optional[str]) -> bool:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return False
+        revoked = version < entry['version'] or not entry['active'] or (role is not None and role != entry['role'])
+        if revoked:
+            self.rejected += 1
+        return revoked
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+                logger.exception('token version refresh failed')
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'window_seconds': self.window_seconds,
+            'interval_seconds': self.interval_seconds,
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'last_refresh_age_seconds': round(time.time() - self.last_refresh_at, 3) if self.last_refresh_at else None,
+        }
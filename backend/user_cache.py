@@ -0,0 +1,80 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+# Bounded TTL + LRU cache for authenticated users, keyed by user id. Write
+# paths invalidate explicitly; the TTL bounds staleness for writes made by
+# other workers, which this process never hears about.
+
+class UserCache:
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 30.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._items: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._by_email: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str) -> Optional[Any]:
+        entry = self._items.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            self._remove(user_id)
+            self.misses += 1
+            return None
+        self._items.move_to_end(user_id)
+        self.hits += 1
+        return user
+
+    def set(self, user_id: str, user: Any):
+        if self.max_size <= 0:
+            return
+        if user_id in self._items:
+            self._remove(user_id)
+        self._items[user_id] = (time.monotonic() + self.ttl_seconds, user)
+        email = getattr(user, 'email', None)
+        if email:
+            self._by_email[email] = user_id
+        while len(self._items) > self.max_size:
+            oldest = next(iter(self._items))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, user_id: str):
+        _, user = self._items.pop(user_id)
+        email = getattr(user, 'email', None)
+        if email and self._by_email.get(email) == user_id:
+            del self._by_email[email]
+
+    def invalidate(self, user_id: str):
+        if user_id in self._items:
+            self._remove(user_id)
+            self.invalidations += 1
+
+    def invalidate_email(self, email: str):
+        user_id = self._by_email.get(email)
+        if user_id:
+            self.invalidate(user_id)
+
+    def clear(self):
+        self._items.clear()
+        self._by_email.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._items),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
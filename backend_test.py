@@ -111,7 +111,7 @@ def test_user_registration():
     except Exception as e:
         results.log_fail("Mover registration", str(e))
     
-    # Test admin registration
+    # Admin accounts cannot be self-registered (they are appointed by an admin)
     try:
         admin_data = {
             "name": "Admin User",
@@ -122,15 +122,12 @@ def test_user_registration():
         }
         
         response = requests.post(f"{API_BASE}/register", json=admin_data)
-        if response.status_code == 200:
-            data = response.json()
-            test_data['admin_email_code'] = data.get('email_code')
-            test_data['admin_phone_code'] = data.get('phone_code')
-            results.log_pass("Admin registration")
+        if response.status_code == 422:
+            results.log_pass("Admin self-registration rejected")
         else:
-            results.log_fail("Admin registration", f"Status: {response.status_code}, Response: {response.text}")
+            results.log_fail("Admin self-registration rejected", f"Status: {response.status_code}, Response: {response.text}")
     except Exception as e:
-        results.log_fail("Admin registration", str(e))
+        results.log_fail("Admin self-registration rejected", str(e))
 
 def test_email_phone_verification():
     """Test email and phone verification"""
@@ -17,6 +17,7 @@ import { Ionicons } from '@expo/vector-icons';
 import { LinearGradient } from 'expo-linear-gradient';
 import Head from 'expo-router/head';
 import { adminStyles } from '../components/AdminStyles';
+import { authFetch, clearTokens, saveTokens, TokenPair } from '../utils/auth';
 import { useRouter } from 'expo-router';
 
 const BACKEND_URL = process.env.EXPO_PUBLIC_BACKEND_URL;
@@ -69,6 +70,10 @@ export default function Index() {
   // Admin panel states
   const [allUsers, setAllUsers] = useState<User[]>([]);
   const [allRequests, setAllRequests] = useState<any[]>([]);
+  const [adminStats, setAdminStats] = useState<any>(null);
+  const [adminUsersCursor, setAdminUsersCursor] = useState<string | null>(null);
+  const [adminRequestsCursor, setAdminRequestsCursor] = useState<string | null>(null);
+  const [adminLoadedTabs, setAdminLoadedTabs] = useState({ users: false, requests: false });
   const [adminTab, setAdminTab] = useState<'users' | 'requests'>('users');
   
   // Sample data for homepage
@@ -241,6 +246,13 @@ export default function Index() {
     }
   }, [currentScreen]);
 
+  // Load a tab's list the first time it is opened
+  React.useEffect(() => {
+    if (currentScreen === 'admin_panel' && token && !adminLoadedTabs[adminTab]) {
+      fetchAdminListPage(adminTab, null).catch(error => console.error('Admin list fetch error:', error));
+    }
+  }, [adminTab]);
+
   // Auto-load sample data on component mount
   React.useEffect(() => {
     fetchSampleData();
@@ -273,9 +285,9 @@ export default function Index() {
   };
 
   // Save session to AsyncStorage
-  const saveSession = async (tokenData: string, userData: User) => {
+  const saveSession = async (tokenData: TokenPair, userData: User) => {
     try {
-      await AsyncStorage.setItem('userToken', tokenData);
+      await saveTokens(tokenData);
       await AsyncStorage.setItem('userData', JSON.stringify(userData));
       console.log('Session saved for:', userData.email);
     } catch (error) {
@@ -286,7 +298,7 @@ export default function Index() {
   // Clear session from AsyncStorage  
   const clearSession = async () => {
     try {
-      await AsyncStorage.removeItem('userToken');
+      await clearTokens();
       await AsyncStorage.removeItem('userData');
       console.log('Session cleared');
     } catch (error) {
@@ -403,7 +415,7 @@ export default function Index() {
           if (meRes.ok) {
             const currentUser = await meRes.json();
             setUser(currentUser);
-            await saveSession(data.access_token, currentUser);
+            await saveSession(data, currentUser);
 
             if (currentUser.user_type === 'admin') {
               router.push('/yonetim/panel');
@@ -427,7 +439,7 @@ export default function Index() {
               is_approved: true,
             };
             setUser(fallbackUser);
-            await saveSession(data.access_token, fallbackUser);
+            await saveSession(data, fallbackUser);
             router.push('/musteri-paneli');
             showSuccess('Başarıyla giriş yapıldı!');
           }
@@ -444,7 +456,7 @@ export default function Index() {
             is_approved: true,
           };
           setUser(fallbackUser);
-          await saveSession(data.access_token, fallbackUser);
+          await saveSession(data, fallbackUser);
           router.push('/musteri-paneli');
           showSuccess('Başarıyla giriş yapıldı!');
         }
@@ -504,7 +516,7 @@ export default function Index() {
 
       if (response.ok) {
         showSuccess(data.message);
-        setResetToken(data.reset_token); // For demo purposes
+        setResetToken('');
         setCurrentScreen('reset_password');
       } else {
         showError('general', data.detail || 'Şifre sıfırlama isteği gönderilemedi');
@@ -654,58 +666,79 @@ export default function Index() {
     }
   };
 
-  const fetchAdminData = async () => {
+  // Admin panel: header counts come pre-aggregated from /api/admin/stats; the
+  // user and request lists load one keyset page at a time, only once their
+  // tab is opened.
+  const ADMIN_PAGE_SIZE = 50;
+  const adminListConfig = {
+    users: { path: '/api/admin/users', cursorParam: 'after', setItems: setAllUsers, setCursor: setAdminUsersCursor, label: 'Kullanıcı' },
+    requests: { path: '/api/moving-requests', cursorParam: 'before', setItems: setAllRequests, setCursor: setAdminRequestsCursor, label: 'Talep' },
+  };
+
+  const fetchAdminStats = async (fresh = false) => {
+    const statsResponse = await authFetch(`${BACKEND_URL}/api/admin/stats${fresh ? '?fresh=true' : ''}`, {
+      headers: {
+        'Content-Type': 'application/json',
+      },
+    });
+    if (statsResponse.ok) {
+      setAdminStats(await statsResponse.json());
+    } else {
+      console.error('Stats fetch error:', statsResponse.status);
+    }
+  };
+
+  const fetchAdminListPage = async (tab: 'users' | 'requests', cursor: string | null) => {
+    const config = adminListConfig[tab];
+    const params = new URLSearchParams({ limit: String(ADMIN_PAGE_SIZE) });
+    if (cursor) params.set(config.cursorParam, cursor);
+
+    const response = await authFetch(`${BACKEND_URL}${config.path}?${params.toString()}`, {
+      headers: {
+        'Content-Type': 'application/json',
+      },
+    });
+
+    if (response.ok) {
+      const items = await response.json();
+      config.setItems((prev: any[]) => (cursor ? [...prev, ...items] : items));
+      // No header means this was the last page
+      config.setCursor(response.headers.get('X-Next-Cursor'));
+      setAdminLoadedTabs(prev => ({ ...prev, [tab]: true }));
+    } else {
+      const errorText = await response.text();
+      console.error(`${tab} fetch error:`, response.status, errorText);
+      showError('general', `${config.label} verileri yüklenemedi: ` + response.status);
+    }
+  };
+
+  const loadMoreAdminList = async () => {
+    const cursor = adminTab === 'users' ? adminUsersCursor : adminRequestsCursor;
+    if (!token || !cursor) return;
+    setLoading(true);
+    try {
+      await fetchAdminListPage(adminTab, cursor);
+    } catch (error) {
+      showError('general', 'Veri yükleme hatası: ' + (error instanceof Error ? error.message : String(error)));
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  // Refreshes the counts and the first page of the open tab; the other tab reloads when opened
+  const fetchAdminData = async (fresh = false) => {
     if (!token) {
       console.log('No token available for admin data fetch');
       return;
     }
-    
-    console.log('Fetching admin data with token:', token.substring(0, 20) + '...');
+
     setLoading(true);
-    
+    setAdminLoadedTabs({ users: false, requests: false });
     try {
-      // Fetch all users
-      const usersResponse = await fetch(`${BACKEND_URL}/api/admin/users`, {
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json',
-        },
-      });
-      
-      console.log('Users response status:', usersResponse.status);
-      
-      if (usersResponse.ok) {
-        const users = await usersResponse.json();
-        console.log('Fetched users:', users.length);
-        setAllUsers(users);
-      } else {
-        const errorText = await usersResponse.text();
-        console.error('Users fetch error:', usersResponse.status, errorText);
-        showError('general', 'Kullanıcı verileri yüklenemedi: ' + usersResponse.status);
-      }
-      
-      // Fetch all moving requests  
-      const requestsResponse = await fetch(`${BACKEND_URL}/api/moving-requests`, {
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json',
-        },
-      });
-      
-      console.log('Requests response status:', requestsResponse.status);
-      
-      if (requestsResponse.ok) {
-        const requests = await requestsResponse.json();
-        console.log('Fetched requests:', requests.length);
-        setAllRequests(requests);
-      } else {
-        const errorText = await requestsResponse.text();
-        console.error('Requests fetch error:', requestsResponse.status, errorText);
-        showError('general', 'Talep verileri yüklenemedi: ' + requestsResponse.status);
-      }
+      await Promise.all([fetchAdminStats(fresh), fetchAdminListPage(adminTab, null)]);
     } catch (error) {
       console.error('Admin data fetch error:', error);
-      showError('general', 'Veri yükleme hatası: ' + error.message);
+      showError('general', 'Veri yükleme hatası: ' + (error instanceof Error ? error.message : String(error)));
     } finally {
       setLoading(false);
     }
@@ -789,10 +822,9 @@ export default function Index() {
       
       switch (action) {
         case 'make_moderator':
-          response = await fetch(`${BACKEND_URL}/api/admin/update-user-role/${userEmail}`, {
+          response = await authFetch(`${BACKEND_URL}/api/admin/update-user-role/${userEmail}`, {
             method: 'POST',
             headers: {
-              'Authorization': `Bearer ${token}`,
               'Content-Type': 'application/json',
             },
             body: JSON.stringify({ role: 'moderator' })
@@ -800,10 +832,9 @@ export default function Index() {
           break;
           
         case 'ban_3_days':
-          response = await fetch(`${BACKEND_URL}/api/admin/ban-user/${userEmail}`, {
+          response = await authFetch(`${BACKEND_URL}/api/admin/ban-user/${userEmail}`, {
             method: 'POST',
             headers: {
-              'Authorization': `Bearer ${token}`,
               'Content-Type': 'application/json',
             },
             body: JSON.stringify({ 
@@ -814,10 +845,9 @@ export default function Index() {
           break;
           
         case 'ban_5_days':
-          response = await fetch(`${BACKEND_URL}/api/admin/ban-user/${userEmail}`, {
+          response = await authFetch(`${BACKEND_URL}/api/admin/ban-user/${userEmail}`, {
             method: 'POST',
             headers: {
-              'Authorization': `Bearer ${token}`,
               'Content-Type': 'application/json',
             },
             body: JSON.stringify({ 
@@ -828,10 +858,9 @@ export default function Index() {
           break;
           
         case 'ban_7_days':
-          response = await fetch(`${BACKEND_URL}/api/admin/ban-user/${userEmail}`, {
+          response = await authFetch(`${BACKEND_URL}/api/admin/ban-user/${userEmail}`, {
             method: 'POST',
             headers: {
-              'Authorization': `Bearer ${token}`,
               'Content-Type': 'application/json',
             },
             body: JSON.stringify({ 
@@ -842,10 +871,9 @@ export default function Index() {
           break;
           
         case 'unban':
-          response = await fetch(`${BACKEND_URL}/api/admin/unban-user/${userEmail}`, {
+          response = await authFetch(`${BACKEND_URL}/api/admin/unban-user/${userEmail}`, {
             method: 'POST',
             headers: {
-              'Authorization': `Bearer ${token}`,
               'Content-Type': 'application/json',
             }
           });
@@ -860,7 +888,7 @@ export default function Index() {
         showSuccess(data.message);
         
         // Refresh user data
-        await fetchAdminData();
+        await fetchAdminData(true);
         setShowUserActions(false);
         setSelectedUser(null);
       } else {
@@ -879,17 +907,16 @@ export default function Index() {
     
     setLoading(true);
     try {
-      const response = await fetch(`${BACKEND_URL}/api/admin/delete-request/${requestId}`, {
+      const response = await authFetch(`${BACKEND_URL}/api/admin/delete-request/${requestId}`, {
         method: 'DELETE',
         headers: {
-          'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
         }
       });
       
       if (response.ok) {
         showSuccess('Talep başarıyla silindi');
-        await fetchAdminData();
+        await fetchAdminData(true);
       } else {
         const errorData = await response.json();
         showError('general', errorData?.detail || 'Talep silinemedi');
@@ -1871,6 +1898,12 @@ export default function Index() {
           <Text style={adminStyles.adminWelcomeText}>
             Hoş geldiniz, {user?.name || 'Admin'}!
           </Text>
+
+          {adminStats && (
+            <Text style={adminStyles.adminSectionTitle}>
+              Onay bekleyen nakliyeci: {adminStats.pending_mover_approvals} · Yasaklı: {adminStats.users.banned} · Bugünkü ilan: {adminStats.live_feed.posts_per_day[0]?.count ?? 0}
+            </Text>
+          )}
           
           {/* Tab selector */}
           <View style={adminStyles.adminTabSelector}>
@@ -1885,7 +1918,7 @@ export default function Index() {
                 adminStyles.adminTabText,
                 adminTab === 'users' && adminStyles.adminTabTextActive
               ]}>
-                Kullanıcılar ({allUsers.length})
+                Kullanıcılar ({adminStats ? adminStats.users.total : '…'})
               </Text>
             </TouchableOpacity>
             
@@ -1900,7 +1933,7 @@ export default function Index() {
                 adminStyles.adminTabText,
                 adminTab === 'requests' && adminStyles.adminTabTextActive
               ]}>
-                Talepler ({allRequests.length})
+                Talepler ({adminStats ? adminStats.moving_requests.total : '…'})
               </Text>
             </TouchableOpacity>
           </View>
@@ -2009,6 +2042,16 @@ export default function Index() {
                 ))}
               </View>
             )}
+
+            {(adminTab === 'users' ? adminUsersCursor : adminRequestsCursor) && (
+              <TouchableOpacity
+                style={[adminStyles.adminBadge, { backgroundColor: '#3498db', alignSelf: 'center', marginVertical: 12 }]}
+                onPress={loadMoreAdminList}
+                disabled={loading}
+              >
+                <Text style={adminStyles.adminBadgeText}>Daha fazla yükle</Text>
+              </TouchableOpacity>
+            )}
           </ScrollView>
           
           {/* User Actions Modal */}
@@ -14,6 +14,7 @@ import {
   useWindowDimensions,
 } from 'react-native';
 import AsyncStorage from '@react-native-async-storage/async-storage';
+import { authFetch, refreshAccessToken } from '../utils/auth';
 import { Ionicons } from '@expo/vector-icons';
 import { LinearGradient } from 'expo-linear-gradient';
 
@@ -81,9 +82,7 @@ export default function LiveFeedScreen() {
   const fetchFeed = async () => {
     try {
       const endpoint = user && (user.user_type === 'mover' || user.user_type === 'admin') ? '/api/live-feed/full' : '/api/live-feed';
-      const res = await fetch(`${BACKEND_URL}${endpoint}`, {
-        headers: token ? { Authorization: `Bearer ${token}` } : undefined,
-      });
+      const res = await authFetch(`${BACKEND_URL}${endpoint}`);
       if (!res.ok) throw new Error('Feed yüklenemedi');
       const data = await res.json();
       setPosts(data);
@@ -96,8 +95,57 @@ export default function LiveFeedScreen() {
 
   React.useEffect(() => {
     loadSession().then(fetchFeed);
-    const interval = setInterval(fetchFeed, 5000);
-    return () => clearInterval(interval);
+
+    // Push updates over WebSocket; fall back to polling only while disconnected
+    let ws: WebSocket | null = null;
+    let interval: ReturnType<typeof setInterval> | null = null;
+    let closed = false;
+    const startPolling = () => {
+      if (!interval) interval = setInterval(fetchFeed, 5000);
+    };
+    const stopPolling = () => {
+      if (interval) clearInterval(interval);
+      interval = null;
+    };
+    const connect = async () => {
+      if (!BACKEND_URL) return startPolling();
+      // The stored token, not the state: it may have been refreshed since this effect ran
+      const current = token ? await AsyncStorage.getItem('userToken') : null;
+      if (closed) return;
+      const wsUrl = `${BACKEND_URL.replace(/^http/, 'ws')}/api/live-feed/ws${current ? `?token=${encodeURIComponent(current)}` : ''}`;
+      try {
+        ws = new WebSocket(wsUrl);
+      } catch (e) {
+        return startPolling();
+      }
+      ws.onopen = () => {
+        stopPolling();
+        fetchFeed();
+      };
+      ws.onmessage = (msg) => {
+        try {
+          const ev = JSON.parse(msg.data);
+          if (ev.type === 'post') {
+            setPosts((prev) => [ev.post, ...prev.filter((p) => p.id !== ev.post.id)].slice(0, 100));
+          } else if (ev.type === 'delete') {
+            setPosts((prev) => prev.filter((p) => p.id !== ev.id));
+          }
+        } catch (e) {}
+      };
+      ws.onclose = (ev) => {
+        if (closed) return;
+        startPolling();
+        // 4401: the access token expired or was revoked; renew it before reconnecting
+        if (ev.code === 4401) refreshAccessToken();
+        setTimeout(() => !closed && connect(), 5000);
+      };
+    };
+    connect();
+    return () => {
+      closed = true;
+      stopPolling();
+      if (ws) ws.close();
+    };
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [token, user]);
 
@@ -119,11 +167,10 @@ export default function LiveFeedScreen() {
     setSubmitting(true);
     setError('');
     try {
-      const res = await fetch(`${BACKEND_URL}/api/live-feed`, {
+      const res = await authFetch(`${BACKEND_URL}/api/live-feed`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
-          Authorization: `Bearer ${token}`,
         },
         body: JSON.stringify(form),
       });
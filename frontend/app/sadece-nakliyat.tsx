@@ -15,6 +15,7 @@ import {
   AppState,
 } from 'react-native';
 import AsyncStorage from '@react-native-async-storage/async-storage';
+import { authFetch } from '../utils/auth';
 import { Ionicons } from '@expo/vector-icons';
 import { LinearGradient } from 'expo-linear-gradient';
 import { useRouter } from 'expo-router';
@@ -101,9 +102,7 @@ export default function SadeceNakliyatScreen() {
     if (!isActiveRef.current) return;
     try {
       const endpoint = user && (user.user_type === 'mover' || user.user_type === 'admin') ? '/api/live-feed/full' : '/api/live-feed';
-      const res = await fetch(`${BACKEND_URL}${endpoint}`, {
-        headers: token ? { Authorization: `Bearer ${token}` } : undefined,
-      });
+      const res = await authFetch(`${BACKEND_URL}${endpoint}`);
       if (!res.ok) throw new Error('Feed yüklenemedi');
       const data = await res.json();
       setPosts(data);
@@ -156,11 +155,10 @@ export default function SadeceNakliyatScreen() {
     setSubmitting(true);
     setError('');
     try {
-      const res = await fetch(`${BACKEND_URL}/api/live-feed`, {
+      const res = await authFetch(`${BACKEND_URL}/api/live-feed`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
-          Authorization: `Bearer ${token}`,
         },
         body: JSON.stringify(form),
       });
@@ -1,6 +1,7 @@
 import React from 'react';
 import { View, Text, StyleSheet, SafeAreaView, KeyboardAvoidingView, Platform, ScrollView, TextInput, TouchableOpacity, ActivityIndicator, Alert } from 'react-native';
 import AsyncStorage from '@react-native-async-storage/async-storage';
+import { authFetch, saveTokens } from '../utils/auth';
 import AppHeader from '../components/AppHeader';
 import Head from 'expo-router/head';
 
@@ -49,7 +50,7 @@ export default function TeklifOlustur() {
       const me = await fetch(`${BACKEND_URL}/api/me`, { headers: { Authorization: `Bearer ${tokenData.access_token}` } });
       if (!me.ok) throw new Error('Kullanıcı bilgisi alınamadı');
       const meUser = await me.json();
-      await AsyncStorage.setItem('userToken', tokenData.access_token);
+      await saveTokens(tokenData);
       await AsyncStorage.setItem('userData', JSON.stringify(meUser));
       setToken(tokenData.access_token);
       setUser(meUser);
@@ -86,9 +87,9 @@ export default function TeklifOlustur() {
         moving_date: new Date(form.moving_date || new Date()).toISOString(),
         description: form.description,
       };
-      const res = await fetch(`${BACKEND_URL}/api/moving-requests`, {
+      const res = await authFetch(`${BACKEND_URL}/api/moving-requests`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json', Authorization: `Bearer ${token}` },
+        headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(payload),
       });
       const j = await res.json().catch(() => ({}));
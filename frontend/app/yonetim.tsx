@@ -1,6 +1,6 @@
 import React from 'react';
 import { View, Text, StyleSheet, KeyboardAvoidingView, Platform, SafeAreaView, TextInput, TouchableOpacity, ActivityIndicator } from 'react-native';
-import AsyncStorage from '@react-native-async-storage/async-storage';
+import { authFetch, saveTokens } from '../utils/auth';
 import Head from 'expo-router/head';
 import { useRouter } from 'expo-router';
 import AppHeader from '../components/AppHeader';
@@ -34,11 +34,9 @@ export default function YonetimLogin() {
         throw new Error(j.detail || 'Giriş başarısız');
       }
       const tokenData = await res.json();
-      await AsyncStorage.setItem('userToken', tokenData.access_token);
+      await saveTokens(tokenData);
       // Admin doğrulaması: admin kullanıcı listesi çekmeyi dene
-      const adminRes = await fetch(`${BACKEND_URL}/api/admin/users`, {
-        headers: { Authorization: `Bearer ${tokenData.access_token}` },
-      });
+      const adminRes = await authFetch(`${BACKEND_URL}/api/admin/users`);
       if (adminRes.ok) {
         setSuccess('Giriş başarılı. Panel açılıyor...');
         setTimeout(() => router.push('/yonetim/panel'), 500);
@@ -1,6 +1,7 @@
 import React from 'react';
 import { View, Text, StyleSheet, SafeAreaView, ScrollView, TouchableOpacity, ActivityIndicator, KeyboardAvoidingView, Platform } from 'react-native';
 import AsyncStorage from '@react-native-async-storage/async-storage';
+import { authFetch } from '../../utils/auth';
 import Head from 'expo-router/head';
 import AppHeader from '../../components/AppHeader';
 
@@ -59,9 +60,7 @@ export default function AdminPanel() {
     setLoadingUsers(true);
     setError('');
     try {
-      const res = await fetch(`${BACKEND_URL}/api/admin/users`, {
-        headers: { Authorization: `Bearer ${tok}` },
-      });
+      const res = await authFetch(`${BACKEND_URL}/api/admin/users`);
       if (!res.ok) throw new Error('Kullanıcılar yüklenemedi');
       const data = await res.json();
       setUsers(data);
@@ -78,9 +77,7 @@ export default function AdminPanel() {
     setLoadingLive(true);
     setError('');
     try {
-      const res = await fetch(`${BACKEND_URL}/api/live-feed/full`, {
-        headers: { Authorization: `Bearer ${tok}` },
-      });
+      const res = await authFetch(`${BACKEND_URL}/api/live-feed/full`);
       if (!res.ok) throw new Error('Canlı akış yüklenemedi');
       const data = await res.json();
       setPosts(data);
@@ -107,9 +104,9 @@ export default function AdminPanel() {
     setError('');
     setSuccess('');
     try {
-      const res = await fetch(url, {
+      const res = await authFetch(url, {
         method: body ? 'POST' : 'POST',
-        headers: { 'Content-Type': 'application/json', Authorization: `Bearer ${token}` },
+        headers: { 'Content-Type': 'application/json' },
         body: body ? JSON.stringify(body) : undefined,
       });
       if (!res.ok) {
@@ -170,9 +167,8 @@ export default function AdminPanel() {
     setError('');
     setSuccess('');
     try {
-      const res = await fetch(`${BACKEND_URL}/api/admin/live-feed/${postId}`, {
+      const res = await authFetch(`${BACKEND_URL}/api/admin/live-feed/${postId}`, {
         method: 'DELETE',
-        headers: { Authorization: `Bearer ${token}` },
       });
       if (!res.ok) {
         const j = await res.json().catch(() => ({}));
@@ -193,9 +189,9 @@ export default function AdminPanel() {
     setError('');
     setSuccess('');
     try {
-      const res = await fetch(`${BACKEND_URL}/api/admin/seed-sample-mover`, {
+      const res = await authFetch(`${BACKEND_URL}/api/admin/seed-sample-mover`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json', Authorization: `Bearer ${token}` },
+        headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ email: 'demo.mover@sadece-nakliyat.local', password: '123456**', name: 'Demo Nakliyeci', phone: '+90 555 000 00 00', company_name: 'Demo Lojistik' }),
       });
       if (!res.ok) {
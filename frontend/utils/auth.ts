@@ -0,0 +1,69 @@
+import AsyncStorage from '@react-native-async-storage/async-storage';
+
+const BACKEND_URL = process.env.EXPO_PUBLIC_BACKEND_URL;
+
+// Access tokens are short-lived (ACCESS_TOKEN_EXPIRE_MINUTES on the backend);
+// the refresh token renews them. authFetch sends the stored access token and,
+// when it is refused with 401, refreshes once and retries the request.
+
+export interface TokenPair {
+  access_token: string;
+  refresh_token?: string | null;
+}
+
+export const saveTokens = async (tokens: TokenPair) => {
+  await AsyncStorage.setItem('userToken', tokens.access_token);
+  if (tokens.refresh_token) {
+    await AsyncStorage.setItem('refreshToken', tokens.refresh_token);
+  }
+};
+
+export const clearTokens = async () => {
+  await AsyncStorage.multiRemove(['userToken', 'refreshToken']);
+};
+
+// Concurrent 401s share one refresh instead of each requesting a new pair
+let refreshing: Promise<string | null> | null = null;
+
+export const refreshAccessToken = (): Promise<string | null> => {
+  if (!refreshing) {
+    refreshing = (async () => {
+      try {
+        const refreshToken = await AsyncStorage.getItem('refreshToken');
+        if (!refreshToken) return null;
+        const res = await fetch(`${BACKEND_URL}/api/token/refresh`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ refresh_token: refreshToken }),
+        });
+        if (!res.ok) {
+          // Revoked (ban, role or password change) or expired: the user has to log in again
+          if (res.status === 401) await clearTokens();
+          return null;
+        }
+        const tokens: TokenPair = await res.json();
+        await saveTokens(tokens);
+        return tokens.access_token;
+      } catch (e) {
+        console.error('Token refresh error:', e);
+        return null;
+      } finally {
+        refreshing = null;
+      }
+    })();
+  }
+  return refreshing;
+};
+
+type AuthFetchInit = Omit<RequestInit, 'headers'> & { headers?: Record<string, string> };
+
+export const authFetch = async (url: string, init: AuthFetchInit = {}) => {
+  const send = (token: string | null) =>
+    fetch(url, { ...init, headers: { ...init.headers, ...(token ? { Authorization: `Bearer ${token}` } : {}) } });
+
+  const token = await AsyncStorage.getItem('userToken');
+  const res = await send(token);
+  if (res.status !== 401 || !token) return res;
+  const renewed = await refreshAccessToken();
+  return renewed ? send(renewed) : res;
+};
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Async load test for the Nakliyat Platform backend.
+
+Runs the backend_test.py scenarios (register, login, live feed read/post,
+admin listing, moving-request/bid flow) as concurrent virtual users arriving
+at configurable rates, and reports throughput and p50/p95/p99 per endpoint.
+
+    # against a running server
+    python loadtest.py --base-url http://localhost:8001 --duration 30
+
+    # in-process through the ASGI app, no network; in-memory Motor stand-in
+    python loadtest.py --in-process --mongo memory --duration 20 --rate feed_read=50
+
+    # save a baseline, later compare a run against it; throughput is only
+    # compared when both runs used the same --seed (same arrivals)
+    python loadtest.py --in-process --seed 1 --save baselines/main.json
+    python loadtest.py --in-process --seed 1 --compare baselines/main.json --threshold 0.2
+
+Needs httpx; --mongo memory additionally needs mongomock-motor.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+ROOT_DIR = Path(__file__).parent
+DEMO_MOVER = ('demo@demo.com', '123456**')
+DEMO_CUSTOMER = ('demo.musteri@demo.com', '123456**')
+LOAD_ADMIN = ('loadtest.admin@example.com', 'loadtest-admin-pass')
+
+DEFAULT_RATES = {
+    'feed_read': 20.0,
+    'feed_post': 2.0,
+    'login': 2.0,
+    'register': 1.0,
+    'admin_users': 1.0,
+    'moving_flow': 1.0,
+}
+
+
+class Stats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+
+    def record(self, name, seconds, status):
+        self.samples[name].append(seconds)
+        self.statuses[name][str(status)] += 1
+        if status == 'error' or int(status) >= 500:
+            self.errors[name] += 1
+
+    def summary(self, elapsed):
+        out = {}
+        for name, samples in sorted(self.samples.items()):
+            s = sorted(samples)
+            pct = lambda p: round(s[min(len(s) - 1, int(len(s) * p))] * 1000, 3)
+            out[name] = {
+                'count': len(s),
+                'errors': self.errors[name],
+                'throughput_rps': round(len(s) / elapsed, 3),
+                'mean_ms': round(statistics.mean(s) * 1000, 3),
+                'p50_ms': pct(0.50),
+                'p95_ms': pct(0.95),
+                'p99_ms': pct(0.99),
+                'statuses': dict(self.statuses[name]),
+            }
+        return out
+
+
+class Session:
+    """Shared HTTP client plus tokens obtained once during setup."""
+
+    def __init__(self, client, stats, has_admin):
+        self.client = client
+        self.stats = stats
+        self.tokens = {}
+        self.has_admin = has_admin
+
+    async def call(self, name, method, path, token=None, **kwargs):
+        headers = kwargs.pop('headers', {})
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        t0 = time.perf_counter()
+        try:
+            resp = await self.client.request(method, f'/api{path}', headers=headers, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(name, time.perf_counter() - t0, 'error')
+            return None
+        self.stats.record(name, time.perf_counter() - t0, resp.status_code)
+        return resp
+
+    async def login(self, email, password):
+        resp = await self.call('POST /login', 'POST', '/login', json={'email': email, 'password': password})
+        if resp is None or resp.status_code != 200:
+            return None
+        return resp.json()['access_token']
+
+
+# Scenarios (same payloads as backend_test.py)
+
+def moving_request_payload():
+    return {
+        'from_location': 'Kadıköy, İstanbul',
+        'to_location': 'Beşiktaş, İstanbul',
+        'from_floor': 3,
+        'to_floor': 2,
+        'has_elevator_from': True,
+        'has_elevator_to': False,
+        'needs_mobile_elevator': True,
+        'truck_distance': 'Kamyon binaya 50 metre mesafede park edebilir',
+        'packing_service': True,
+        'moving_date': (datetime.now() + timedelta(days=7)).isoformat(),
+        'description': '2+1 daire taşınması, beyaz eşyalar dahil',
+    }
+
+
+async def scenario_register(s: Session):
+    await s.call('POST /register', 'POST', '/register', json={
+        'name': 'Ahmet Yılmaz',
+        'email': f'load.{uuid.uuid4().hex[:12]}@example.com',
+        'phone': '+905551234567',
+        'user_type': 'customer',
+        'password': 'securepass123',
+    })
+
+
+async def scenario_login(s: Session):
+    email, password = random.choice([DEMO_MOVER, DEMO_CUSTOMER] + ([LOAD_ADMIN] if s.has_admin else []))
+    await s.login(email, password)
+
+
+async def scenario_feed_read(s: Session):
+    resp = await s.call('GET /live-feed', 'GET', '/live-feed')
+    if resp is not None and resp.status_code == 200:
+        await s.call('GET /live-feed/sync', 'GET', '/live-feed/sync', params={'limit': 20})
+
+
+async def scenario_feed_post(s: Session):
+    token = s.tokens['mover']
+    await s.call('POST /live-feed', 'POST', '/live-feed', token, json={
+        'title': '2+1 Ev Taşıma', 'from_location': 'Beşiktaş', 'to_location': 'Kadıköy',
+        'when': 'Yarın sabah', 'vehicle': '3.5 Ton Kamyonet',
+    })
+    await s.call('GET /live-feed/full', 'GET', '/live-feed/full', token)
+
+
+async def scenario_admin_users(s: Session):
+    if not s.has_admin:
+        return
+    await s.call('GET /admin/users', 'GET', '/admin/users', s.tokens['admin'], params={'limit': 200})
+
+
+async def scenario_moving_flow(s: Session):
+    customer, mover = s.tokens['customer'], s.tokens['mover']
+    resp = await s.call('POST /moving-requests', 'POST', '/moving-requests', customer, json=moving_request_payload())
+    if resp is None or resp.status_code != 200:
+        return
+    request_id = resp.json()['id']
+    resp = await s.call('POST /moving-requests/{id}/bids', 'POST', f'/moving-requests/{request_id}/bids', mover, json={
+        'price': 2500.00, 'message': 'Profesyonel ekip ile güvenli taşıma hizmeti. Sigortalı ve garantili.',
+    })
+    await s.call('GET /moving-requests', 'GET', '/moving-requests', customer)
+    await s.call('GET /moving-requests/{id}/bids', 'GET', f'/moving-requests/{request_id}/bids', customer)
+    if resp is not None and resp.status_code == 200:
+        await s.call('POST /bids/{id}/accept', 'POST', f"/bids/{resp.json()['id']}/accept", customer)
+
+
+SCENARIOS = {
+    'feed_read': scenario_feed_read,
+    'feed_post': scenario_feed_post,
+    'login': scenario_login,
+    'register': scenario_register,
+    'admin_users': scenario_admin_users,
+    'moving_flow': scenario_moving_flow,
+}
+
+
+# Runner
+
+async def arrivals(name, rate, deadline, session, sem, tasks, rng):
+    # Open workload: Poisson arrivals, independent of how fast requests finish.
+    # rng is per scenario so a --seed replays the same arrival times whatever the
+    # scenarios themselves draw from the shared random module.
+    fn = SCENARIOS[name]
+
+    async def one():
+        async with sem:
+            await fn(session)
+
+    while True:
+        await asyncio.sleep(rng.expovariate(rate))
+        if time.perf_counter() >= deadline:
+            return
+        tasks.add(asyncio.create_task(one()))
+
+
+async def prepare_in_process(mongo):
+    if mongo == 'memory':
+        # Only needed so server.py imports; the client is replaced below
+        os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+    else:
+        # An explicit --mongo must win over whatever MONGO_URL the shell has
+        os.environ['MONGO_URL'] = mongo
+    sys.path.insert(0, str(ROOT_DIR / 'backend'))
+    import server
+    if mongo == 'memory':
+        from mongomock_motor import AsyncMongoMockClient
+        server.client = AsyncMongoMockClient()
+        server.db = server.client['moving_platform']
+    else:
+        server.db = server.client[os.environ.get('LOAD_TEST_DB', 'moving_platform_loadtest')]
+    server.SEED_DEMO_DATA = True
+    await server.startup_seed()
+    # A throwaway admin so the admin listing scenario has credentials
+    if not await server.db.users.find_one({'email': LOAD_ADMIN[0]}):
+        await server.db.users.insert_one(server._build_user_doc(
+            'Load Admin', LOAD_ADMIN[0], '+900000000000', 'admin', server.get_password_hash(LOAD_ADMIN[1])))
+    return server, httpx.ASGITransport(app=server.app), 'http://loadtest'
+
+
+async def run(args):
+    rates = dict(DEFAULT_RATES)
+    for item in args.rate:
+        name, _, value = item.partition('=')
+        if name not in SCENARIOS:
+            raise SystemExit(f'Unknown scenario {name!r}; choose from {", ".join(SCENARIOS)}')
+        rates[name] = float(value)
+
+    server = None
+    admin = (args.admin_email, args.admin_password) if args.admin_email else None
+    if args.in_process:
+        server, transport, base_url = await prepare_in_process(args.mongo)
+        admin = LOAD_ADMIN
+        client = httpx.AsyncClient(transport=transport, base_url=base_url, timeout=30)
+    else:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=30,
+                                   limits=httpx.Limits(max_connections=args.concurrency))
+
+    stats = Stats()
+    session = Session(client, stats, has_admin=admin is not None)
+    session.tokens['mover'] = await session.login(*DEMO_MOVER)
+    session.tokens['customer'] = await session.login(*DEMO_CUSTOMER)
+    if admin:
+        session.tokens['admin'] = await session.login(*admin)
+        session.has_admin = session.tokens['admin'] is not None
+    if not session.tokens['mover'] or not session.tokens['customer']:
+        raise SystemExit('Demo accounts could not log in; is SEED_DEMO_DATA enabled on the target?')
+    stats.reset()  # setup logins are not part of the measurement
+
+    sem = asyncio.Semaphore(args.concurrency)
+    tasks = set()
+    started = time.perf_counter()
+    deadline = started + args.duration
+    rng = lambda name: random.Random(f'{args.seed}:{name}') if args.seed is not None else random
+    await asyncio.gather(*(arrivals(n, r, deadline, session, sem, tasks, rng(n)) for n, r in rates.items() if r > 0))
+    # Throughput is over the arrival window; the drain of in-flight requests after it is reported separately
+    window = time.perf_counter() - started
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    drain = time.perf_counter() - started - window
+    await client.aclose()
+    if server is not None:
+        server.hash_pool.shutdown()
+
+    return {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'duration_s': round(window, 3),
+            'drain_s': round(drain, 3),
+            'seed': args.seed,
+            'mode': f'in-process ({args.mongo})' if args.in_process else args.base_url,
+            'rates': rates,
+            'concurrency': args.concurrency,
+        },
+        'endpoints': stats.summary(window),
+    }
+
+
+def print_report(result):
+    meta = result['meta']
+    print(f"\n{meta['mode']} - {meta['duration_s']}s (+{meta.get('drain_s', 0)}s drain), concurrency {meta['concurrency']}")
+    print(f"{'endpoint':<34}{'count':>8}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, e in result['endpoints'].items():
+        print(f"{name:<34}{e['count']:>8}{e['errors']:>6}{e['throughput_rps']:>9.2f}"
+              f"{e['p50_ms']:>10.2f}{e['p95_ms']:>10.2f}{e['p99_ms']:>10.2f}")
+
+
+def compare(result, baseline, threshold, min_samples, min_delta_ms):
+    # Flags endpoints whose p95 grew or errors rose, and throughput drops when comparable.
+    # Arrivals are Poisson, so throughput is just the random number of arrivals unless
+    # both runs replayed the same arrivals with the same --seed.
+    regressions = []
+    seed = result['meta'].get('seed')
+    same_arrivals = seed is not None and seed == baseline['meta'].get('seed')
+    for name, base in baseline['endpoints'].items():
+        cur = result['endpoints'].get(name)
+        if not cur or min(cur['count'], base['count']) < min_samples:
+            continue
+        # Millisecond-level jitter on fast endpoints is noise, whatever its relative size
+        if base['p95_ms'] > 0 and cur['p95_ms'] > max(base['p95_ms'] * (1 + threshold), base['p95_ms'] + min_delta_ms):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.2f} -> {cur['p95_ms']:.2f} ms")
+        if same_arrivals and base['throughput_rps'] > 0 and cur['throughput_rps'] < base['throughput_rps'] * (1 - threshold):
+            regressions.append(f"{name}: throughput {base['throughput_rps']:.2f} -> {cur['throughput_rps']:.2f} rps")
+        if cur['errors'] > base['errors']:
+            regressions.append(f"{name}: errors {base['errors']} -> {cur['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Async load test for the Nakliyat Platform backend')
+    parser.add_argument('--base-url', default=os.getenv('EXPO_PUBLIC_BACKEND_URL', 'http://localhost:8001'))
+    parser.add_argument('--in-process', action='store_true', help='drive the ASGI app directly through httpx')
+    parser.add_argument('--mongo', default='memory', help="'memory' or a MongoDB URL (in-process mode only)")
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--concurrency', type=int, default=100, help='max in-flight virtual users')
+    parser.add_argument('--rate', action='append', default=[], metavar='SCENARIO=PER_SECOND',
+                        help=f"arrival rate override; scenarios: {', '.join(SCENARIOS)}")
+    parser.add_argument('--admin-email')
+    parser.add_argument('--admin-password')
+    parser.add_argument('--seed', type=int, help='random seed for reproducible arrivals')
+    parser.add_argument('--save', help='write results as a JSON baseline')
+    parser.add_argument('--compare', help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative regression (default 0.2)')
+    parser.add_argument('--min-samples', type=int, default=50,
+                        help='skip endpoints with fewer requests than this in either run (default 50)')
+    parser.add_argument('--min-delta-ms', type=float, default=5,
+                        help='ignore p95 increases smaller than this many ms (default 5)')
+    args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    result = asyncio.run(run(args))
+    print_report(result)
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps(result, indent=2))
+        print(f'\nBaseline saved to {args.save}')
+    if args.compare:
+        regressions = compare(result, json.loads(Path(args.compare).read_text()), args.threshold, args.min_samples, args.min_delta_ms)
+        if regressions:
+            print('\nREGRESSIONS:')
+            for r in regressions:
+                print(f'  - {r}')
+            sys.exit(1)
+        print('\nNo regressions against baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# server.py reads these at import; tests run against an in-memory Mongo
+# (mongomock-motor, as loadtest.py --mongo memory does) with background
+# workers off so each test controls every write.
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ['SEED_DEMO_DATA'] = '0'
+os.environ['SCHEDULER_ENABLED'] = '0'
+os.environ['FEED_FANOUT'] = 'local'
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+
+
+@pytest.fixture(scope='session')
+def server():
+    import server as srv
+    from mongomock_motor import AsyncMongoMockClient
+    srv.client = AsyncMongoMockClient()
+    srv.db = srv.client['moving_platform']
+    return srv
+
+
+@pytest.fixture(scope='session')
+def client(server):
+    # One app lifetime for the session: shutdown closes the hash pool for good
+    from fastapi.testclient import TestClient
+    with TestClient(server.app) as c:
+        yield c
+
+
+@pytest.fixture
+def db(server, client):
+    # Fresh collections per test; indexes were ensured at startup and are not needed by mongomock
+    for name in client.portal.call(server.db.list_collection_names):
+        client.portal.call(server.db.drop_collection, name)
+    server.user_cache.clear()
+    server.invalidate_feed_version()
+    return server.db
+
+
+@pytest.fixture
+def make_user(server, client, db):
+    def make(email, role='customer', password='password1', **fields):
+        doc = server._build_user_doc(email.split('@')[0], email, '+90 555 000 00 00', role, server.get_password_hash(password))
+        doc.update(fields)
+        client.portal.call(db.users.insert_one, doc)
+        return doc
+    return make
+
+
+@pytest.fixture
+def login(client):
+    def do(email, password='password1'):
+        r = client.post('/api/login', json={'email': email, 'password': password})
+        assert r.status_code == 200, r.text
+        return r.json()
+    return do
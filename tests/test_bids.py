@@ -0,0 +1,73 @@
+import uuid
+
+import pytest
+
+
+def auth(tokens):
+    return {'Authorization': f"Bearer {tokens['access_token']}"}
+
+
+@pytest.fixture
+def request_id(client, db, make_user):
+    customer = make_user('customer@test.com')
+    make_user('mover1@test.com', role='mover')
+    make_user('mover2@test.com', role='mover')
+    rid = str(uuid.uuid4())
+    client.portal.call(db.moving_requests.insert_one, {'id': rid, 'customer_id': customer['id'], 'status': 'pending'})
+    return rid
+
+
+@pytest.fixture
+def stale_open_check(server, monkeypatch):
+    # Once armed, the next bid passes the open check as if it ran just before an acceptance
+    real = server._get_moving_request
+
+    def arm():
+        calls = []
+
+        async def first_sees_pending(request_id, projection=None):
+            calls.append(request_id)
+            if len(calls) == 1:
+                return {'status': 'pending'}
+            return await real(request_id, projection)
+        monkeypatch.setattr(server, '_get_moving_request', first_sees_pending)
+    return arm
+
+
+def place_bid(client, request_id, mover, price=1000):
+    return client.post(f'/api/moving-requests/{request_id}/bids', json={'price': price}, headers=auth(mover))
+
+
+def test_accept_settles_every_bid(client, db, request_id, login):
+    customer, mover1, mover2 = login('customer@test.com'), login('mover1@test.com'), login('mover2@test.com')
+    won = place_bid(client, request_id, mover1).json()
+    lost = place_bid(client, request_id, mover2, price=900).json()
+    assert client.post(f"/api/bids/{won['id']}/accept", headers=auth(customer)).status_code == 200
+    statuses = {b['id']: b['status'] for b in client.get(f'/api/moving-requests/{request_id}/bids', headers=auth(customer)).json()}
+    assert statuses == {won['id']: 'accepted', lost['id']: 'rejected'}
+    assert place_bid(client, request_id, login('mover2@test.com')).status_code == 400
+
+
+def test_bid_inserted_after_acceptance_is_withdrawn(client, db, request_id, login, stale_open_check):
+    customer, mover1 = login('customer@test.com'), login('mover1@test.com')
+    client.portal.call(db.bids.insert_one, {'id': 'won', 'request_id': request_id, 'mover_id': 'other', 'status': 'pending'})
+    assert client.post('/api/bids/won/accept', headers=auth(customer)).status_code == 200
+    stale_open_check()
+    r = place_bid(client, request_id, mover1)
+    assert r.status_code == 400
+    assert client.portal.call(db.bids.count_documents, {'request_id': request_id, 'status': 'pending'}) == 0
+
+
+def test_bid_accepted_before_the_recheck_is_kept(server, client, db, request_id, login, monkeypatch):
+    mover = login('mover1@test.com')
+    insert = server.db.bids.insert_one
+
+    async def insert_then_win(doc, *args, **kwargs):
+        # The customer accepts this very bid between its insert and the re-check
+        result = await insert(doc, *args, **kwargs)
+        await db.moving_requests.update_one({'id': request_id}, {'$set': {'status': 'accepted', 'selected_mover_id': doc['mover_id']}})
+        return result
+    monkeypatch.setattr(server.db.bids, 'insert_one', insert_then_win)
+    r = place_bid(client, request_id, mover)
+    assert r.status_code == 200
+    assert client.portal.call(db.bids.count_documents, {'id': r.json()['id']}) == 1
@@ -0,0 +1,127 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+
+def insert_posts(client, db, server, count, start=None, same_time=False):
+    start = start or server.utcnow_ms() - timedelta(hours=1)
+    docs = [{
+        'id': str(uuid.uuid4()), 'mover_id': 'm1', 'mover_name': 'Mover', 'title': f'post {i}',
+        'created_at': start if same_time else start + timedelta(seconds=i),
+    } for i in range(count)]
+    client.portal.call(db.live_feed.insert_many, [dict(d) for d in docs])
+    return docs
+
+
+def newest_first(docs):
+    return [d['id'] for d in sorted(docs, key=lambda d: (d['created_at'], d['id']), reverse=True)]
+
+
+def test_cursor_round_trip(server):
+    created = datetime(2025, 3, 1, 12, 30, 15, 123000)
+    deleted = datetime(2025, 3, 2, 8, 0)
+    assert server.decode_cursor(server.encode_cursor(created, 'abc')) == {'c': created, 'i': 'abc', 'd': None}
+    assert server.decode_cursor(server.encode_cursor(created, 'abc', deleted)) == {'c': created, 'i': 'abc', 'd': deleted}
+    # Opaque and URL-safe: no padding or characters that need escaping
+    assert all(ch.isalnum() or ch in '-_' for ch in server.encode_cursor(created, 'abc', deleted))
+
+
+@pytest.mark.parametrize('cursor', ['', 'not-a-cursor', 'eyJ4IjoxfQ'])
+def test_invalid_cursor_is_rejected(server, cursor):
+    with pytest.raises(HTTPException) as exc:
+        server.decode_cursor(cursor)
+    assert exc.value.status_code == 400
+
+
+def test_keyset_before_breaks_ties_on_id(server):
+    created = datetime(2025, 3, 1)
+    assert server.keyset_before(server.encode_cursor(created, 'b')) == {
+        '$or': [{'created_at': {'$lt': created}}, {'created_at': created, 'id': {'$lt': 'b'}}]
+    }
+
+
+@pytest.mark.parametrize('same_time', [False, True])
+def test_paging_walks_the_feed_without_gaps_or_duplicates(server, client, db, same_time):
+    docs = insert_posts(client, db, server, 7, same_time=same_time)
+    seen, before = [], None
+    while True:
+        r = client.get('/api/live-feed', params={'limit': 3, **({'before': before} if before else {})})
+        assert r.status_code == 200
+        seen += [p['id'] for p in r.json()]
+        before = r.headers.get('X-Next-Cursor')
+        if not before:
+            break
+    assert seen == newest_first(docs)
+
+
+def test_sync_without_cursor_returns_snapshot(server, client, db):
+    docs = insert_posts(client, db, server, 3)
+    body = client.get('/api/live-feed/sync').json()
+    assert [p['id'] for p in body['posts']] == newest_first(docs)
+    assert body['deleted'] == [] and body['reset'] is False and body['has_more'] is False
+    assert server.decode_cursor(body['cursor'])['i'] == newest_first(docs)[0]
+
+
+def post_ids(body):
+    return [p['id'] for p in body['posts']]
+
+
+def test_sync_since_cursor_returns_new_posts_and_tombstones(server, client, db):
+    old = insert_posts(client, db, server, 2)
+    cursor = client.get('/api/live-feed/sync').json()['cursor']
+    new = insert_posts(client, db, server, 2, start=server.utcnow_ms() + timedelta(seconds=1))
+    client.portal.call(db.live_feed.delete_one, {'id': old[0]['id']})
+    client.portal.call(db.live_feed_tombstones.insert_one, {'id': old[0]['id'], 'deleted_at': server.utcnow_ms() + timedelta(seconds=1)})
+
+    body = client.get('/api/live-feed/sync', params={'since': cursor}).json()
+    # Newest first; the still-live old post inside the overlap window comes back as a repeat
+    assert post_ids(body) == newest_first(new) + [old[1]['id']]
+    assert body['deleted'] == [old[0]['id']]
+    assert body['reset'] is False
+
+    # Caught up: the returned cursor yields only repeats from the overlap window
+    again = client.get('/api/live-feed/sync', params={'since': body['cursor']}).json()
+    assert set(post_ids(again)) <= set(post_ids(body)) and set(again['deleted']) <= set(body['deleted'])
+
+
+def test_sync_returns_rows_committed_behind_the_cursor(server, client, db):
+    insert_posts(client, db, server, 2, start=server.utcnow_ms() - timedelta(seconds=2))
+    body = client.get('/api/live-feed/sync').json()
+    handed_out = server.decode_cursor(body['cursor'])
+    # Stamped before the cursor's post and deletion marks but committed only now
+    late = insert_posts(client, db, server, 1, start=handed_out['c'] - timedelta(seconds=1))
+    client.portal.call(db.live_feed_tombstones.insert_one, {'id': 'gone', 'deleted_at': handed_out['d'] - timedelta(seconds=1)})
+    again = client.get('/api/live-feed/sync', params={'since': body['cursor']}).json()
+    assert late[0]['id'] in post_ids(again)
+    assert 'gone' in again['deleted']
+    assert server.decode_cursor(again['cursor']) == handed_out
+
+
+def test_sync_overlap_does_not_reach_further_back(server, client, db):
+    old = insert_posts(client, db, server, 1, start=server.utcnow_ms() - timedelta(hours=1))
+    newest = insert_posts(client, db, server, 1, start=server.utcnow_ms())
+    cursor = client.get('/api/live-feed/sync').json()['cursor']
+    body = client.get('/api/live-feed/sync', params={'since': cursor}).json()
+    assert post_ids(body) == [newest[0]['id']]
+    assert old[0]['id'] not in post_ids(body)
+
+
+def test_sync_pages_forward_with_has_more(server, client, db):
+    cursor = client.get('/api/live-feed/sync').json()['cursor']
+    new = insert_posts(client, db, server, 5)
+    first = client.get('/api/live-feed/sync', params={'since': cursor, 'limit': 3}).json()
+    assert first['has_more'] is True
+    second = client.get('/api/live-feed/sync', params={'since': first['cursor'], 'limit': 3}).json()
+    assert second['has_more'] is False
+    seen = list(dict.fromkeys(post_ids(second) + post_ids(first)))
+    assert sorted(seen, key=newest_first(new).index) == newest_first(new)
+
+
+def test_sync_resets_when_cursor_predates_tombstone_retention(server, client, db):
+    docs = insert_posts(client, db, server, 2)
+    stale = server.encode_cursor(datetime(2020, 1, 1), 'x', server.utcnow_ms() - timedelta(days=server.FEED_TOMBSTONE_RETENTION_DAYS + 1))
+    body = client.get('/api/live-feed/sync', params={'since': stale}).json()
+    assert body['reset'] is True
+    assert [p['id'] for p in body['posts']] == newest_first(docs)
@@ -0,0 +1,37 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+
+
+def insert_old_posts(server, client, db, count):
+    old = server.utcnow_ms() - timedelta(days=server.FEED_RETENTION_DAYS + 1)
+    docs = [{'id': str(uuid.uuid4()), 'mover_id': 'm', 'mover_name': 'M', 'title': f'post {i}',
+             'created_at': old + timedelta(seconds=i)} for i in range(count)]
+    client.portal.call(db.live_feed.insert_many, docs)
+    return [d['id'] for d in docs]
+
+
+@pytest.fixture
+def retention(server, monkeypatch):
+    monkeypatch.setattr(server, 'FEED_RETENTION_DAYS', 30)
+    monkeypatch.setattr(server, 'FEED_RETENTION_BATCH', 2)
+
+
+def test_prune_archives_then_deletes_with_tombstones(server, client, db, retention, monkeypatch):
+    monkeypatch.setattr(server, 'FEED_ARCHIVE', 'collection')
+    ids = insert_old_posts(server, client, db, 3)
+    result = client.portal.call(server.prune_live_feed)
+    assert result['removed'] == 3 and result['archived'] == 3
+    assert client.portal.call(db.live_feed.count_documents, {}) == 0
+    assert client.portal.call(db.live_feed_archive.count_documents, {'id': {'$in': ids}}) == 3
+    assert client.portal.call(db.live_feed_tombstones.count_documents, {'id': {'$in': ids}}) == 3
+
+
+def test_unknown_archive_mode_deletes_nothing(server, client, db, retention, monkeypatch):
+    monkeypatch.setattr(server, 'FEED_ARCHIVE', 'ndjosn')
+    insert_old_posts(server, client, db, 3)
+    with pytest.raises(ValueError):
+        client.portal.call(server.prune_live_feed)
+    assert client.portal.call(db.live_feed.count_documents, {}) == 3
+    assert client.portal.call(db.live_feed_tombstones.count_documents, {}) == 0
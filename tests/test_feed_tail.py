@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import AutoReconnect
+
+from feed_tail import FeedTailer
+
+
+class FlakyDb:
+    # Fails the first `failures` live_feed reads, as a Mongo outage at startup would
+    def __init__(self, db, failures):
+        self.db = db
+        self.failures = failures
+        self.live_feed_tombstones = db.live_feed_tombstones
+        self.live_feed = self
+
+    def find(self, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise AutoReconnect('connection refused')
+        return self.db.live_feed.find(*args, **kwargs)
+
+
+def test_poll_setup_is_retried_after_a_database_error():
+    async def main():
+        db = AsyncMongoMockClient()['test']
+        posts = []
+        tailer = FeedTailer(posts.append, lambda i: None, mode='poll', poll_interval=0.01)
+        tailer.start(FlakyDb(db, failures=1), {'_id': 0})
+        await asyncio.sleep(0.01)
+        assert tailer.stats()['active_mode'] is None and tailer.errors == 1
+        while tailer.active_mode != 'poll':
+            await asyncio.sleep(0.05)
+        await db.live_feed.insert_one({'id': 'p1', 'created_at': datetime.utcnow()})
+        await asyncio.sleep(0.1)
+        tailer.stop()
+        return posts
+
+    assert [p['id'] for p in asyncio.run(main())] == ['p1']
+
+
+def test_tailer_that_dies_reports_and_logs_it(caplog):
+    async def main():
+        db = AsyncMongoMockClient()['test']
+
+        def broken(doc):
+            raise KeyError('route_keys')
+        tailer = FeedTailer(broken, lambda i: None, mode='poll', poll_interval=0.01)
+        tailer.start(db, {'_id': 0})
+        await asyncio.sleep(0.02)
+        await db.live_feed.insert_one({'id': 'p1', 'created_at': datetime.utcnow()})
+        await asyncio.sleep(0.1)
+        return tailer.stats()
+
+    with caplog.at_level(logging.ERROR, logger='feed_tail'):
+        stats = asyncio.run(main())
+    assert stats['active_mode'] is None and stats['errors'] == 1
+    assert 'live feed tailer stopped' in caplog.text
@@ -0,0 +1,79 @@
+import uuid
+
+import pytest
+
+from gazetteer import location_key, resolve, route_fields, route_filter_key
+
+
+@pytest.mark.parametrize('text, key', [
+    ('Kadıköy', 'istanbul/kadikoy'),
+    ('KADIKOY', 'istanbul/kadikoy'),
+    ('Moda', 'istanbul/kadikoy'),                  # neighbourhood alias -> its district
+    ('Fenerbahçe, İstanbul', 'istanbul/kadikoy'),
+    ('Avrupa Yakası', 'istanbul/avrupa'),          # two-word name via n-grams
+    ('anadolu yakasi', 'istanbul/anadolu'),
+    ('İstanbul', 'istanbul'),
+])
+def test_resolve(text, key):
+    assert resolve(text)['key'] == key
+
+
+@pytest.mark.parametrize('text', ['Beşiktaş, İstanbul', 'İstanbul Avrupa Yakası Beşiktaş', 'Anadolu Yakası, Moda'])
+def test_most_specific_match_wins(text):
+    assert resolve(text)['level'] == 'district'
+
+
+@pytest.mark.parametrize('text', [None, '', 'Ankara Çankaya', 'xyz'])
+def test_unknown_places_do_not_resolve(text):
+    assert resolve(text) is None
+
+
+def test_location_key_accepts_keys_and_free_text():
+    assert location_key('istanbul/anadolu') == 'istanbul/anadolu'
+    assert location_key('Kozyatağı') == 'istanbul/kadikoy'
+    assert location_key('nowhere') is None
+
+
+def test_route_fields_cover_every_level():
+    fields = route_fields('Moda', 'Beşiktaş')
+    assert fields['from_district'] == 'istanbul/kadikoy' and fields['from_region'] == 'istanbul/anadolu'
+    assert fields['to_district'] == 'istanbul/besiktas' and fields['to_region'] == 'istanbul/avrupa'
+    keys = set(fields['route_keys'])
+    for origin in ['istanbul/kadikoy', 'istanbul/anadolu', 'istanbul']:
+        assert f'from:{origin}' in keys
+        for destination in ['istanbul/besiktas', 'istanbul/avrupa', 'istanbul']:
+            assert f'route:{origin}>{destination}' in keys
+    assert {'to:istanbul/besiktas', 'to:istanbul/avrupa', 'to:istanbul'} <= keys
+
+
+def test_route_fields_for_a_region_or_unknown_side():
+    fields = route_fields('Kadıköy', 'Avrupa Yakası')
+    assert fields['to_district'] is None and fields['to_region'] == 'istanbul/avrupa'
+    assert 'to:istanbul/besiktas' not in fields['route_keys']
+    assert route_fields(None, 'xyz') == {'from_district': None, 'from_region': None, 'to_district': None, 'to_region': None, 'route_keys': []}
+
+
+def test_route_filter_key():
+    assert route_filter_key('istanbul/kadikoy', None) == 'from:istanbul/kadikoy'
+    assert route_filter_key(None, 'istanbul') == 'to:istanbul'
+    assert route_filter_key('istanbul/anadolu', 'istanbul/besiktas') == 'route:istanbul/anadolu>istanbul/besiktas'
+    assert route_filter_key(None, None) is None
+
+
+def test_filter_keys_match_stored_route_keys():
+    stored = set(route_fields('Moda', 'Beşiktaş')['route_keys'])
+    assert route_filter_key(location_key('Anadolu Yakası'), location_key('Avrupa Yakası')) in stored
+    assert route_filter_key(location_key('Kadıköy'), None) in stored
+    assert route_filter_key(location_key('Üsküdar'), None) not in stored
+
+
+def test_feed_route_filter_endpoint(server, client, db):
+    now = server.utcnow_ms()
+    for frm, to in [('Moda', 'Beşiktaş'), ('Şişli', 'Üsküdar')]:
+        route = route_fields(frm, to)
+        doc = {'id': str(uuid.uuid4()), 'mover_id': 'm', 'mover_name': 'M', 'title': f'{frm}-{to}',
+               'from_location': frm, 'to_location': to, 'created_at': now, **route}
+        client.portal.call(db.live_feed.insert_one, doc)
+    r = client.get('/api/live-feed', params={'origin': 'Anadolu Yakası', 'destination': 'avrupa yakasi'})
+    assert [p['title'] for p in r.json()] == ['Moda-Beşiktaş']
+    assert client.get('/api/live-feed', params={'origin': 'Atlantis'}).status_code == 400
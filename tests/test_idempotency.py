@@ -0,0 +1,108 @@
+import asyncio
+import uuid
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from idempotency import IdempotencyConflict, IdempotencyStore
+
+
+def run_with_store(scenario, stores=1):
+    # The mock client binds to the running loop, so it is created inside it
+    async def main():
+        collection = AsyncMongoMockClient()['test']['idempotency_keys']
+        made = []
+        for _ in range(stores):
+            store = IdempotencyStore()
+            store.bind(collection)
+            made.append(store)
+        return await scenario(*made)
+    return asyncio.run(main())
+
+
+def counting_handler(status=201, delay=0):
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return status, {'n': len(calls)}
+    return fn, calls
+
+
+def test_replay_returns_the_stored_response():
+    async def scenario(store):
+        fn, calls = counting_handler()
+        first = await store.run('s', 'k', {'a': 1}, fn)
+        second = await store.run('s', 'k', {'a': 1}, fn)
+        return first, second, calls, store.stats()
+
+    first, second, calls, stats = run_with_store(scenario)
+    assert first == (201, {'n': 1}, False)
+    assert second == (201, {'n': 1}, True)
+    assert len(calls) == 1
+    assert stats['executed'] == 1 and stats['replayed'] == 1
+
+
+def test_same_key_with_a_different_payload_conflicts():
+    async def scenario(store):
+        fn, _ = counting_handler()
+        await store.run('s', 'k', {'a': 1}, fn)
+        with pytest.raises(IdempotencyConflict):
+            await store.run('s', 'k', {'a': 2}, fn)
+        # Scopes keep the same key apart
+        return await store.run('other', 'k', {'a': 2}, fn)
+
+    assert run_with_store(scenario) == (201, {'n': 2}, False)
+
+
+def test_concurrent_duplicates_coalesce_onto_one_execution():
+    async def scenario(store):
+        fn, calls = counting_handler(delay=0.05)
+        results = await asyncio.gather(*[store.run('s', 'k', {'a': 1}, fn) for _ in range(5)])
+        return results, calls, store.stats()
+
+    results, calls, stats = run_with_store(scenario)
+    assert len(calls) == 1
+    assert sorted(r[2] for r in results) == [False, True, True, True, True]
+    assert {(r[0], r[1]['n']) for r in results} == {(201, 1)}
+    assert stats['coalesced'] == 4 and stats['in_flight'] == 0
+
+
+def test_failed_execution_is_not_stored():
+    async def scenario(store):
+        async def fail():
+            raise RuntimeError('boom')
+        with pytest.raises(RuntimeError):
+            await store.run('s', 'k', {'a': 1}, fail)
+        fn, calls = counting_handler()
+        return await store.run('s', 'k', {'a': 1}, fn), calls
+
+    result, calls = run_with_store(scenario)
+    assert result == (201, {'n': 1}, False) and len(calls) == 1
+
+
+def test_other_workers_replay_from_the_collection():
+    async def scenario(first, second):
+        fn, calls = counting_handler()
+        await first.run('s', 'k', {'a': 1}, fn)
+        replay = await second.run('s', 'k', {'a': 1}, fn)
+        with pytest.raises(IdempotencyConflict):
+            await second.run('s', 'k', {'a': 2}, fn)
+        return replay, calls
+
+    replay, calls = run_with_store(scenario, stores=2)
+    assert replay == (201, {'n': 1}, True) and len(calls) == 1
+
+
+def test_register_with_idempotency_key(client, db):
+    headers = {'Idempotency-Key': str(uuid.uuid4())}
+    payload = {'name': 'Ayşe', 'email': 'ayse@test.com', 'phone': '+90 555 000 00 01', 'user_type': 'customer', 'password': 'password1'}
+    first = client.post('/api/register', json=payload, headers=headers)
+    assert first.status_code == 200 and 'Idempotent-Replayed' not in first.headers
+    # The retry is answered from the store, not rejected as a duplicate email
+    retry = client.post('/api/register', json={**payload, 'password': 'other-password'}, headers=headers)
+    assert retry.status_code == 200 and retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.json() == first.json()
+    assert client.post('/api/register', json={**payload, 'name': 'Fatma'}, headers=headers).status_code == 422
+    assert client.portal.call(db.users.count_documents, {'email': 'ayse@test.com'}) == 1
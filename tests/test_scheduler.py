@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from scheduler import Job, JobAlreadyRunning, Scheduler
+
+
+def make_schedulers(db, count, fn):
+    made = []
+    for _ in range(count):
+        scheduler = Scheduler([Job('batch', fn, 3600)], lease_seconds=30, tick_seconds=0.01)
+        scheduler.bind(db)
+        made.append(scheduler)
+    return made
+
+
+def run(scenario):
+    # The mock client binds to the running loop, so it is created inside it
+    async def main():
+        return await scenario(AsyncMongoMockClient()['test'])
+    return asyncio.run(main())
+
+
+def slow_job(calls, release):
+    async def fn():
+        calls.append(1)
+        await release.wait()
+        return {'done': len(calls)}
+    return fn
+
+
+def test_second_run_is_refused_on_the_same_and_other_workers():
+    async def scenario(db):
+        calls, release = [], asyncio.Event()
+        here, other = make_schedulers(db, 2, slow_job(calls, release))
+        first = asyncio.ensure_future(here.run_job('batch'))
+        await asyncio.sleep(0.05)
+        for scheduler in (here, other):
+            with pytest.raises(JobAlreadyRunning):
+                await scheduler.run_job('batch', trigger='admin')
+        lock = await db.scheduler_jobs.find_one({'_id': 'batch'})
+        release.set()
+        result = await first
+        again = await other.run_job('batch', trigger='admin')
+        state = await db.scheduler_jobs.find_one({'_id': 'batch'})
+        return calls, lock, result, again, state, here.worker_id
+
+    calls, lock, result, again, state, owner = run(scenario)
+    assert len(calls) == 2
+    assert lock['running_owner'] == owner
+    assert result['last_result'] == {'done': 1} and again['last_result'] == {'done': 2}
+    assert 'running_owner' not in state and state['runs'] == 2
+
+
+def test_lock_is_renewed_while_the_job_runs():
+    async def scenario(db):
+        calls, release = [], asyncio.Event()
+        scheduler, = make_schedulers(db, 1, slow_job(calls, release))
+        task = asyncio.ensure_future(scheduler.run_job('batch'))
+        await asyncio.sleep(0.02)
+        before = (await db.scheduler_jobs.find_one({'_id': 'batch'}))['running_until']
+        await asyncio.sleep(0.05)
+        after = (await db.scheduler_jobs.find_one({'_id': 'batch'}))['running_until']
+        release.set()
+        await task
+        return before, after
+
+    before, after = run(scenario)
+    assert after > before
+
+
+def test_expired_lock_of_a_dead_worker_is_taken_over():
+    async def scenario(db):
+        await db.scheduler_jobs.insert_one({'_id': 'batch', 'running_owner': 'dead', 'running_until': datetime.utcnow() - timedelta(seconds=1)})
+        calls, release = [], asyncio.Event()
+        release.set()
+        scheduler, = make_schedulers(db, 1, slow_job(calls, release))
+        return await scheduler.run_job('batch')
+
+    assert run(scenario)['last_result'] == {'done': 1}
+
+
+def test_failed_job_releases_the_lock():
+    async def scenario(db):
+        async def fail():
+            raise RuntimeError('boom')
+        scheduler, = make_schedulers(db, 1, fail)
+        first = await scheduler.run_job('batch')
+        second = await scheduler.run_job('batch')
+        return first, second
+
+    first, second = run(scenario)
+    assert first['last_error'] == 'boom' and second['last_error'] == 'boom'
+
+
+def test_admin_run_conflicts_with_a_run_elsewhere(server, client, db, make_user, login):
+    make_user('admin@test.com', role='admin')
+    headers = {'Authorization': f"Bearer {login('admin@test.com')['access_token']}"}
+    lock = {'_id': 'prune_live_feed', 'running_owner': 'other-worker', 'running_until': datetime.utcnow() + timedelta(minutes=1)}
+    client.portal.call(db.scheduler_jobs.insert_one, lock)
+    assert client.post('/api/admin/live-feed/retention/run', headers=headers).status_code == 409
+    assert client.post('/api/admin/jobs/prune_live_feed/run', headers=headers).status_code == 409
+    client.portal.call(db.scheduler_jobs.delete_one, {'_id': 'prune_live_feed'})
+    assert client.post('/api/admin/jobs/prune_live_feed/run', headers=headers).status_code == 200
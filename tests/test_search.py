@@ -0,0 +1,67 @@
+import uuid
+
+import pytest
+
+from search import MAX_QUERY_TERMS, MAX_TOKEN, fold_turkish, query_terms, search_tokens, words
+
+
+@pytest.mark.parametrize('text, folded', [
+    ('İSTANBUL', 'istanbul'),
+    ('Istanbul', 'istanbul'),
+    ('ıspanak', 'ispanak'),
+    ('IĞDIR', 'igdir'),
+    ('Şişli Çağlayan Göztepe Üsküdar', 'sisli caglayan goztepe uskudar'),
+    ('Kâğıthane', 'kagithane'),
+])
+def test_fold_turkish(text, folded):
+    assert fold_turkish(text) == folded
+
+
+def test_fold_leaves_no_combining_dot():
+    # Plain 'İ'.lower() is 'i' + U+0307, which would never match a typed 'i'
+    assert len(fold_turkish('İ')) == 1
+
+
+def test_words_drop_single_characters_and_cap_length():
+    assert words('a 2+1 ev, Kadıköy') == ['ev', 'kadikoy']
+    assert words('x' * 30) == ['x' * MAX_TOKEN]
+
+
+def test_search_tokens_hold_every_prefix_from_two_characters():
+    tokens = search_tokens({'title': 'Kadıköy', 'extra': None}, ['title', 'extra', 'missing'])
+    assert tokens == ['ka', 'kad', 'kadi', 'kadik', 'kadiko', 'kadikoy']
+
+
+def test_search_tokens_span_fields_without_duplicates():
+    tokens = search_tokens({'from_location': 'Beşiktaş', 'to_location': 'Beşiktaş Kadıköy'}, ['from_location', 'to_location'])
+    assert tokens == sorted(set(tokens))
+    assert {'be', 'besiktas', 'ka', 'kadikoy'} <= set(tokens)
+
+
+@pytest.mark.parametrize('query, doc_text', [
+    ('kadik', 'Kadıköy'),
+    ('KADIK', 'kadıköy'),
+    ('İstan', 'ISTANBUL'),
+    ('sisli', 'Şişli'),
+])
+def test_prefix_queries_match_folded_tokens(query, doc_text):
+    tokens = set(search_tokens({'title': doc_text}, ['title']))
+    assert all(term in tokens for term in query_terms(query))
+
+
+def test_query_terms_need_two_characters_and_put_longest_first():
+    assert query_terms('k') == []
+    assert query_terms('a b') == []
+    assert query_terms('ev kadıköy ev') == ['kadikoy', 'ev']
+    assert len(query_terms(' '.join(f'w{i}{"x" * i}' for i in range(10)))) == MAX_QUERY_TERMS
+
+
+def test_search_endpoint(server, client, db):
+    now = server.utcnow_ms()
+    for title in ['Kadıköy eşya', 'Şişli ofis']:
+        doc = {'id': str(uuid.uuid4()), 'mover_id': 'm', 'mover_name': 'M', 'title': title, 'created_at': now}
+        doc['search_tokens'] = search_tokens(doc, server.LIVE_POST_SEARCH_FIELDS)
+        client.portal.call(db.live_feed.insert_one, doc)
+    r = client.get('/api/live-feed/search', params={'q': 'KADIK'})
+    assert [p['title'] for p in r.json()] == ['Kadıköy eşya']
+    assert client.get('/api/live-feed/search', params={'q': 'k'}).status_code == 400
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from token_versions import TokenVersionTable
+
+
+def make_table(changes, window_seconds=600):
+    calls = []
+
+    async def fetch(since):
+        calls.append(since)
+        return [c for c in changes if c['auth_changed_at'] > since]
+
+    table = TokenVersionTable(fetch, window_seconds=window_seconds, overlap_seconds=5)
+    return table, calls
+
+
+def change(uid, version=1, role='customer', active=True, ago=0):
+    return {'id': uid, 'token_version': version, 'user_type': role, 'is_active': active,
+            'auth_changed_at': datetime.utcnow() - timedelta(seconds=ago)}
+
+
+def test_is_revoked():
+    table, _ = make_table([change('u1', version=2), change('u2', active=False), change('u3', role='mover')])
+    asyncio.run(table.refresh())
+    assert table.is_revoked('u1', 1, 'customer') is True
+    assert table.is_revoked('u1', 2, 'customer') is False
+    assert table.is_revoked('u2', 0, 'customer') is True
+    assert table.is_revoked('u3', 1, 'customer') is True       # role changed since the token was issued
+    assert table.is_revoked('u3', 1, 'mover') is False
+    assert table.is_revoked('u3', 1, None) is False            # legacy token without a role claim
+    assert table.is_revoked('unknown', 0, 'admin') is False
+    assert table.rejected == 3
+
+
+def test_refresh_reads_since_newest_change_with_overlap():
+    changes = [change('u1', ago=30)]
+    table, calls = make_table(changes)
+    asyncio.run(table.refresh())
+    assert calls[0] <= datetime.utcnow() - timedelta(seconds=600)
+    asyncio.run(table.refresh())
+    assert calls[1] == changes[0]['auth_changed_at'] - timedelta(seconds=5)
+
+
+def test_refresh_prunes_entries_older_than_the_window():
+    table, _ = make_table([change('u1', version=2, ago=5)], window_seconds=10)
+    asyncio.run(table.refresh())
+    assert table.is_revoked('u1', 1, 'customer') is True
+    table.window_seconds = 1
+    asyncio.run(table.refresh())
+    assert table.stats()['entries'] == 0
+    assert table.is_revoked('u1', 1, 'customer') is False
+
+
+def auth(tokens):
+    return {'Authorization': f"Bearer {tokens['access_token']}"}
+
+
+def test_ban_revokes_existing_access_token(client, make_user, login):
+    make_user('admin@test.com', role='admin')
+    make_user('user@test.com')
+    admin, user = login('admin@test.com'), login('user@test.com')
+    assert client.get('/api/me', headers=auth(user)).status_code == 200
+    r = client.post('/api/admin/ban-user/user@test.com', json={'ban_days': 3}, headers=auth(admin))
+    assert r.status_code == 200
+    assert client.get('/api/me', headers=auth(user)).status_code == 401
+    assert client.post('/api/token/refresh', json={'refresh_token': user['refresh_token']}).status_code == 401
+
+
+def test_role_change_revokes_existing_access_token(client, make_user, login):
+    make_user('admin@test.com', role='admin')
+    make_user('mover@test.com', role='mover')
+    admin, mover = login('admin@test.com'), login('mover@test.com')
+    r = client.post('/api/admin/update-user-role/mover@test.com', json={'role': 'customer'}, headers=auth(admin))
+    assert r.status_code == 200
+    assert client.get('/api/me', headers=auth(mover)).status_code == 401
+    # A fresh login carries the new role
+    assert client.get('/api/me', headers=auth(login('mover@test.com'))).json()['user_type'] == 'customer'
+
+
+def test_access_and_refresh_tokens_are_not_interchangeable(client, make_user, login):
+    make_user('user@test.com')
+    tokens = login('user@test.com')
+    assert client.post('/api/token/refresh', json={'refresh_token': tokens['access_token']}).status_code == 401
+    headers = {'Authorization': f"Bearer {tokens['refresh_token']}"}
+    assert client.get('/api/me', headers=headers).status_code == 401
+    r = client.post('/api/token/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert r.status_code == 200
+    assert client.get('/api/me', headers=auth(r.json())).status_code == 200
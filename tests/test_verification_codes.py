@@ -0,0 +1,59 @@
+def reset(client, email, code):
+    return client.post('/api/reset-password', json={'email': email, 'token': code, 'new_password': 'new-password1'})
+
+
+def wrong(code):
+    return '000000' if code != '000000' else '111111'
+
+
+def test_reset_code_works_once(server, client, make_user, login):
+    make_user('user@test.com')
+    code = client.portal.call(server.issue_code, 'user@test.com', 'reset')
+    assert reset(client, 'user@test.com', code).status_code == 200
+    assert reset(client, 'user@test.com', code).status_code == 400
+    login('user@test.com', 'new-password1')
+
+
+def test_lockout_survives_reissue(server, client, make_user):
+    make_user('user@test.com')
+    code = client.portal.call(server.issue_code, 'user@test.com', 'reset')
+    for _ in range(server.MAX_CODE_ATTEMPTS):
+        assert reset(client, 'user@test.com', wrong(code)).status_code == 400
+    assert reset(client, 'user@test.com', code).status_code == 429
+    # Asking again does not hand out a fresh set of guesses
+    assert client.post('/api/forgot-password', json={'email': 'user@test.com'}).status_code == 200
+    assert client.portal.call(server.issue_code, 'user@test.com', 'reset') is None
+    assert reset(client, 'user@test.com', code).status_code == 429
+
+
+def test_guesses_are_counted_across_codes(server, client, make_user):
+    make_user('user@test.com')
+    for _ in range(server.MAX_CODE_ATTEMPTS):
+        code = client.portal.call(server.issue_code, 'user@test.com', 'reset')
+        assert reset(client, 'user@test.com', wrong(code)).status_code == 400
+    assert client.portal.call(server.issue_code, 'user@test.com', 'reset') is None
+    assert reset(client, 'user@test.com', code).status_code == 429
+
+
+def test_issuing_is_rate_limited_per_email(server, client, make_user):
+    unverified = {'is_email_verified': False, 'is_phone_verified': False}
+    make_user('user@test.com', **unverified)
+    body = {'email': 'user@test.com', 'verification_type': 'email'}
+    for _ in range(server.MAX_CODES_PER_WINDOW):
+        assert client.post('/api/resend-verification', json=body).status_code == 200
+    assert client.post('/api/resend-verification', json=body).status_code == 429
+    # Other code types and other accounts have their own windows
+    assert client.post('/api/resend-verification', json={**body, 'verification_type': 'phone'}).status_code == 200
+    make_user('other@test.com', **unverified)
+    assert client.post('/api/resend-verification', json={**body, 'email': 'other@test.com'}).status_code == 200
+
+
+def test_count_resets_when_the_window_passes(server, client, make_user, db):
+    make_user('user@test.com')
+    for _ in range(server.MAX_CODES_PER_WINDOW):
+        client.portal.call(server.issue_code, 'user@test.com', 'reset')
+    assert client.portal.call(server.issue_code, 'user@test.com', 'reset') is None
+    past = server.utcnow_ms().replace(year=2020)
+    client.portal.call(db.verification_codes.update_one, {'email': 'user@test.com'}, {'$set': {'window_start': past, 'attempts': 99}})
+    code = client.portal.call(server.issue_code, 'user@test.com', 'reset')
+    assert reset(client, 'user@test.com', code).status_code == 200